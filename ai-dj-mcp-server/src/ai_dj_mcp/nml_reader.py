@@ -48,41 +48,68 @@ KEY_NAMES = {
 }
 
 
+def normalise_key(key: str) -> Optional[str]:
+    """
+    Traktor notation for a key given as "8m"/"8d" or Camelot "8A"/"8B".
+
+    Returns None for unrecognised keys.
+    """
+    key = key.strip()
+    if len(key) < 2 or not key[:-1].isdigit():
+        return None
+    mode = {"m": "m", "a": "m", "d": "d", "b": "d"}.get(key[-1].lower())
+    normalised = f"{int(key[:-1])}{mode}" if mode else None
+    return normalised if normalised in CAMELOT_POSITIONS else None
+
+
+def _wheel_steps(key1: str, key2: str) -> int:
+    """Steps around the wheel, plus one to switch mode (m↔d)."""
+    steps = abs(int(key1[:-1]) - int(key2[:-1])) % 12
+    return min(steps, 12 - steps) + (key1[-1] != key2[-1])
+
+
+def _describe(key1: str, key2: str) -> tuple[bool, str]:
+    if key1 == key2:
+        return True, "same key — perfect match"
+    if key1[:-1] == key2[:-1]:
+        # Relative key: same number, different mode (e.g. 8m ↔ 8d)
+        return True, f"relative key ({KEY_NAMES[key1]} ↔ {KEY_NAMES[key2]})"
+    if _wheel_steps(key1, key2) == 1:
+        # Adjacent on same mode ring (±1, wrapping 12→1)
+        return True, "adjacent key — energy shift mix"
+    return False, f"incompatible keys (Camelot {key1} vs {key2}, {_wheel_steps(key1, key2)} steps apart)"
+
+
+# (key1, key2) → (compatible, description) and wheel distance for every
+# pair of keys, computed once at import instead of parsed per call.
+# Same rules as track_selector.harmonic.KEY_DISTANCE / KEY_COMPATIBLE.
+KEY_COMPATIBILITY = {(k1, k2): _describe(k1, k2) for k1 in CAMELOT_POSITIONS for k2 in CAMELOT_POSITIONS}
+KEY_DISTANCE = {(k1, k2): _wheel_steps(k1, k2) for k1 in CAMELOT_POSITIONS for k2 in CAMELOT_POSITIONS}
+
+
 def camelot_compatible(key1: str, key2: str) -> tuple[bool, str]:
     """
     Determine Camelot wheel compatibility between two keys.
 
+    Accepts Traktor ("8m"/"8d") or Camelot ("8A"/"8B") notation.
     Returns (is_compatible, description).
     Compatible = same key, adjacent number same mode, or same number relative (m↔d).
     """
     if not key1 or not key2:
         return False, "unknown key"
 
-    p1 = CAMELOT_POSITIONS.get(key1)
-    p2 = CAMELOT_POSITIONS.get(key2)
-    if p1 is None or p2 is None:
+    k1, k2 = normalise_key(key1), normalise_key(key2)
+    if k1 is None or k2 is None:
         return False, f"unrecognised key ({key1!r} or {key2!r})"
+    return KEY_COMPATIBILITY[k1, k2]
 
-    if key1 == key2:
-        return True, "same key — perfect match"
-
-    # Extract number and mode from each key
-    mode1 = "m" if key1.endswith("m") else "d"
-    mode2 = "m" if key2.endswith("m") else "d"
-    num1 = int(key1[:-1])
-    num2 = int(key2[:-1])
-
-    # Relative key: same number, different mode (e.g. 8m ↔ 8d)
-    if num1 == num2 and mode1 != mode2:
-        return True, f"relative key ({KEY_NAMES.get(key1, key1)} ↔ {KEY_NAMES.get(key2, key2)})"
-
-    # Adjacent on same mode ring (±1, wrapping 12→1)
-    if mode1 == mode2:
-        diff = abs(num1 - num2)
-        if diff == 1 or diff == 11:
-            return True, "adjacent key — energy shift mix"
 
-    return False, f"incompatible keys (Camelot {key1} vs {key2})"
+def camelot_distance(key1: str, key2: str) -> Optional[int]:
+    """Fewest compatible mixes between two keys (either notation); None if unrecognised."""
+    k1, k2 = normalise_key(key1 or ""), normalise_key(key2 or "")
+    if k1 is None or k2 is None:
+        return None
+    return KEY_DISTANCE[k1, k2]
 
 
 class NMLReader:
@@ -119,7 +146,7 @@ class NMLReader:
         1. Entries that have an AutoGrid cue (TYPE=4) — fully analysed
         2. Most recently modified among those
 
-        Ported from deep_house_cue_writer.find_track_entry().
+        Ported from deep_house_cue_writer.select_best_entry().
         """
         root = self._load()
         collection = root.find(".//COLLECTION")
@@ -192,7 +192,7 @@ class TraktorTrack:
             zone_end   = duration_s * zone_end_frac
 
             # Indices within the zone
-            mask = (times >= zone_start) & (times <= zone_end - window_s)
+            mask = (times >= zone_start) & (times <= zone_end)
             if not mask.any():
                 return None
 
@@ -9,6 +9,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from track_selector.library import TrackLibrary
+from track_selector.matching import TrackMatcher
 
 
 def load_custom_playlist(file_path: Path) -> list[tuple[str, str]]:
@@ -30,24 +31,10 @@ def load_custom_playlist(file_path: Path) -> list[tuple[str, str]]:
     return tracks
 
 
-def find_track_in_library(library: TrackLibrary, title: str, artist: str):
+def find_track_in_library(matcher: TrackMatcher, title: str, artist: str):
     """Find a track in the library by title and artist."""
-    # Try exact match first
-    for track in library.tracks:
-        if track.title.lower() == title.lower() and track.artist.lower() == artist.lower():
-            return track
-
-    # Try partial match
-    for track in library.tracks:
-        if title.lower() in track.title.lower() and artist.lower() in track.artist.lower():
-            return track
-
-    # Try artist match only
-    for track in library.tracks:
-        if artist.lower() in track.artist.lower():
-            return track
-
-    return None
+    # Exact, then partial title/artist match, then artist match only
+    return matcher.find(title, artist, fuzzy=False) or matcher.find_by_artist(artist)
 
 
 def main():
@@ -67,6 +54,7 @@ def main():
     print(f"Loading library: {library_file}")
     library = TrackLibrary(library_file)
     print(f"✓ Loaded {len(library.tracks)} tracks\n")
+    matcher = TrackMatcher(library.tracks)
 
     # Load custom playlist
     print(f"Loading custom playlist: {playlist_file}")
@@ -83,7 +71,7 @@ def main():
     not_found = []
 
     for i, (title, artist) in enumerate(playlist_tracks, 1):
-        track = find_track_in_library(library, title, artist)
+        track = find_track_in_library(matcher, title, artist)
 
         if track:
             matched.append(track)
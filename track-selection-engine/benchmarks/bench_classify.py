@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark batch energy/texture classification (track_selector.classify).
+
+Writes synthetic 16-bit WAV tracks (kick, hats, bass, pads and noise in
+varying mixes) to a temporary directory, builds a library over them and
+runs classify_library():
+
+- cold: every file decoded and analysed, at each worker count
+- warm: a second run over the same files, answered from the feature cache
+
+and prints each synthetic style with the energy and textures it was given.
+
+Usage:
+    python3 benchmarks/bench_classify.py
+    python3 benchmarks/bench_classify.py --tracks 120 --seconds 300 --workers 1 4 8
+"""
+
+import sys
+import time
+import wave
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from track_selector.models import TrackMetadata
+from track_selector.library import TrackLibrary
+from track_selector.classify import classify_library, CLASSIFY_WORKERS_DEFAULT
+
+SAMPLE_RATE = 22050
+
+# Synthetic styles: relative levels of each element (hats = hits per beat)
+STYLES = {
+    'ambient': dict(kick=0.0, hats=0, bass=0.0, pad=0.4, noise=0.01),
+    'deep': dict(kick=0.8, hats=1, bass=0.5, pad=0.2, noise=0.0),
+    'driving': dict(kick=1.0, hats=4, bass=0.5, pad=0.0, noise=0.05),
+    'dub': dict(kick=0.9, hats=0, bass=0.9, pad=0.05, noise=0.0),
+    'layered': dict(kick=1.0, hats=4, bass=0.4, pad=0.4, noise=0.2),
+}
+
+
+def synthetic_track(seconds: float, bpm: float, kick: float, hats: int, bass: float,
+                    pad: float, noise: float, rng: np.random.Generator) -> np.ndarray:
+    """Mono samples in -1..1 for one style."""
+    n = int(seconds * SAMPLE_RATE)
+    t = np.arange(n) / SAMPLE_RATE
+    y = np.zeros(n)
+    beat = 60.0 / bpm
+    if kick:
+        length = int(0.25 * SAMPLE_RATE)
+        tt = np.arange(length) / SAMPLE_RATE
+        hit = kick * np.sin(2 * np.pi * (50 + 80 * np.exp(-tt * 30)) * tt) * np.exp(-tt * 12)
+        for start in (np.arange(0, seconds, beat) * SAMPLE_RATE).astype(int):
+            m = min(n - start, length)
+            y[start:start + m] += hit[:m]
+    if hats:
+        length = int(0.04 * SAMPLE_RATE)
+        decay = np.exp(-np.arange(length) / SAMPLE_RATE * 120)
+        for start in (np.arange(beat / hats / 2, seconds, beat / hats) * SAMPLE_RATE).astype(int):
+            m = min(n - start, length)
+            y[start:start + m] += 0.3 * rng.standard_normal(m) * decay[:m]
+    if bass:
+        y += bass * np.sin(2 * np.pi * 55 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * t / beat))
+    if pad:
+        y += pad * sum(np.sin(2 * np.pi * f * t + k) for k, f in enumerate((220, 277, 330, 440))) / 4
+    if noise:
+        y += noise * rng.standard_normal(n)
+    return y / max(1e-9, np.abs(y).max()) * 0.9
+
+
+def write_library(directory: Path, tracks: int, seconds: float) -> TrackLibrary:
+    """Write tracks WAV files, cycling through STYLES, and a library listing them."""
+    rng = np.random.default_rng(1)
+    library = TrackLibrary()
+    names = list(STYLES)
+    for i in range(tracks):
+        style = names[i % len(names)]
+        path = directory / f"{style}-{i:04d}.wav"
+        samples = synthetic_track(seconds, 122.0, rng=rng, **STYLES[style])
+        with wave.open(str(path), 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(SAMPLE_RATE)
+            wav.writeframes((samples * 32767).astype('<i2').tobytes())
+        library.add_track(TrackMetadata(file_path=path, title=path.stem, artist=style,
+                                        bpm=122.0, duration=seconds))
+    return library
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch audio classification")
+    parser.add_argument("--tracks", type=int, default=40, help="Synthetic tracks (default: 40)")
+    parser.add_argument("--seconds", type=float, default=120, help="Length of each track (default: 120)")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, CLASSIFY_WORKERS_DEFAULT}),
+                        help=f"Worker counts to test (default: 1 and {CLASSIFY_WORKERS_DEFAULT})")
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        library = write_library(directory, args.tracks, args.seconds)
+        audio_minutes = args.tracks * args.seconds / 60
+        print(f"{args.tracks} tracks × {args.seconds:g}s ({audio_minutes:.0f} min of audio)\n")
+        print(f"{'run':>12}  {'time':>7}  {'files/s':>8}  {'audio ×':>8}")
+
+        for workers in args.workers:
+            cache = directory / f"features-{workers}.jsonl"
+            for run in ('cold', 'warm'):
+                started = time.perf_counter()
+                result = classify_library(library, cache_path=cache, workers=workers, progress=False)
+                elapsed = time.perf_counter() - started
+                if result.failures:
+                    print(f"  {len(result.failures)} failures, e.g. {result.failures[0]}")
+                speed = f"{audio_minutes * 60 / elapsed:>7.0f}×" if run == 'cold' else f"{'-':>8}"
+                print(f"{run + f' ×{workers}':>12}  {elapsed:>6.2f}s  {args.tracks / elapsed:>8.0f}  {speed}")
+
+        print(f"\n{'style':>8}  energy  textures")
+        for style in STYLES:
+            track = next(t for t in library.tracks if t.artist == style)
+            print(f"{style:>8}  {track.energy_level:>6}  {', '.join(t.value for t in track.textures)}")
+
+
+if __name__ == "__main__":
+    main()
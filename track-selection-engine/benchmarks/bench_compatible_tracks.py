@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark playlist generation with the indexed get_compatible_tracks().
+
+Builds synthetic libraries (11k and 100k tracks by default), then times
+JourneyPlanner.generate_playlist() with the indexed lookup against the old
+full-scan implementation. Both runs use the same random seed, so the
+generated playlists must be identical.
+
+Usage:
+    python3 benchmarks/bench_compatible_tracks.py
+    python3 benchmarks/bench_compatible_tracks.py --sizes 11000 100000 250000 --runs 5
+    python3 benchmarks/bench_compatible_tracks.py --storage columnar
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from track_selector.models import (
+    TrackMetadata, MusicalKey, TextureType, JourneyPosition
+)
+from track_selector.library import TrackLibrary, STORAGE_MODES
+from track_selector.journey_planner import JourneyPlanner
+
+
+LABELS = ["Lucidflow", "Echocord", "Styrax Leaves", "Mojuba", "Dial", None]
+
+
+def synthetic_library(num_tracks: int, seed: int = 42, storage: str = 'objects') -> TrackLibrary:
+    """Build a library with a deep-house-shaped BPM/key/energy distribution."""
+    rng = random.Random(seed)
+    keys = list(MusicalKey)
+    textures = list(TextureType)
+    positions = list(JourneyPosition)
+    library = TrackLibrary(storage=storage)
+
+    for i in range(num_tracks):
+        roll = rng.random()
+        if roll < 0.85:
+            bpm = rng.uniform(115, 128)
+        elif roll < 0.95:
+            bpm = rng.uniform(90, 140)
+        else:
+            bpm = rng.uniform(58, 64)  # Half-time material
+
+        library.add_track(TrackMetadata(
+            file_path=Path(f"/Music/synthetic/{i:06d}.m4a"),
+            title=f"Track {i}",
+            artist=f"Artist {rng.randrange(max(1, num_tracks // 8))}",
+            bpm=round(bpm, 2),
+            key=rng.choice(keys) if rng.random() < 0.95 else None,
+            duration=rng.uniform(300, 540),
+            energy_level=rng.randint(1, 10),
+            textures=rng.sample(textures, rng.randint(0, 3)),
+            journey_position=rng.choice(positions) if rng.random() < 0.3 else None,
+            label=rng.choice(LABELS),
+            year=rng.randint(1995, 2025),
+        ))
+
+    return library
+
+
+def linear_compatible_tracks(library, reference_track, bpm_tolerance=6.0,
+                             key_compatible_only=False):
+    """The original full-scan implementation, kept as the baseline."""
+    compatible = []
+    for track in library.tracks:
+        if track == reference_track:
+            continue
+
+        bpm_ratio = track.bpm / reference_track.bpm
+        bpm_match = (
+            abs(bpm_ratio - 1.0) <= bpm_tolerance / 100 or
+            abs(bpm_ratio - 2.0) <= bpm_tolerance / 100 or
+            abs(bpm_ratio - 0.5) <= bpm_tolerance / 100
+        )
+        if not bpm_match:
+            continue
+
+        if key_compatible_only and reference_track.key and track.key:
+            if not library.are_keys_compatible(reference_track.key, track.key):
+                continue
+
+        compatible.append(track)
+
+    return compatible
+
+
+def time_generation(library, arc, strict_key, runs, seed):
+    """Generate `runs` playlists, returning (best seconds, playlists)."""
+    planner = JourneyPlanner(library)
+    timings = []
+    playlists = []
+    for run in range(runs):
+        random.seed(seed + run)
+        start = time.perf_counter()
+        playlist = planner.generate_playlist(arc, strict_key=strict_key)
+        timings.append(time.perf_counter() - start)
+        playlists.append([str(t.file_path) for t in playlist.tracks])
+    return min(timings), playlists
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark indexed compatible-track lookup")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[11000, 100000],
+                        help="Library sizes to test (default: 11000 100000)")
+    parser.add_argument("--runs", type=int, default=3, help="Playlists per measurement (best is reported)")
+    parser.add_argument("--duration", type=int, default=120, help="Journey duration in minutes")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    parser.add_argument("--strict-key", action="store_true", help="Only use key-compatible tracks")
+    parser.add_argument("--storage", choices=STORAGE_MODES, default="objects", help="Library storage engine")
+
+    args = parser.parse_args()
+
+    print(f"{'tracks':>8}  {'scan':>10}  {'indexed':>10}  {'speed-up':>8}  same")
+    for size in args.sizes:
+        library = synthetic_library(size, storage=args.storage)
+        arc = JourneyPlanner(library).create_journey_arc(duration_minutes=args.duration)
+
+        indexed_s, indexed_playlists = time_generation(
+            library, arc, args.strict_key, args.runs, args.seed)
+
+        original = library.get_compatible_tracks
+        library.get_compatible_tracks = (
+            lambda ref, **kw: linear_compatible_tracks(library, ref, **kw))
+        try:
+            scan_s, scan_playlists = time_generation(
+                library, arc, args.strict_key, args.runs, args.seed)
+        finally:
+            library.get_compatible_tracks = original
+
+        same = "yes" if indexed_playlists == scan_playlists else "NO"
+        print(f"{size:>8}  {scan_s * 1000:>8.1f}ms  {indexed_s * 1000:>8.1f}ms  "
+              f"{scan_s / indexed_s:>7.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark duration-exact planning against the greedy planner.
+
+Greedy generation sizes a set from a 6-minute average track length, so
+its real running time drifts from the booked slot. For each synthetic
+library and set length, this reports the mean absolute difference from
+the target, the share of sets within tolerance, the mean transition
+score (timed energy targets) and generation time, for greedy and for
+generate_timed_playlist().
+
+Usage:
+    python3 benchmarks/bench_duration_planner.py
+    python3 benchmarks/bench_duration_planner.py --sizes 11000 100000 --durations 60 240
+    python3 benchmarks/bench_duration_planner.py --strict-key --min-preferred 10 --max-per-label 6
+"""
+
+import sys
+import time
+import argparse
+import contextlib
+import io
+from pathlib import Path
+from statistics import mean
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from track_selector.models import MusicalKey
+from track_selector.journey_planner import JourneyPlanner
+from track_selector.duration_planner import DURATION_TOLERANCE_DEFAULT, TIME_BUDGET_DEFAULT
+
+from bench_compatible_tracks import synthetic_library
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark duration-exact set planning")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 11000],
+                        help="Library sizes to test (default: 1000 11000)")
+    parser.add_argument("--durations", type=int, nargs="+", default=[90, 180],
+                        help="Set lengths in minutes (default: 90 180)")
+    parser.add_argument("--runs", type=int, default=5, help="Seeds per measurement")
+    parser.add_argument("--tolerance", type=float, default=DURATION_TOLERANCE_DEFAULT,
+                        help=f"Seconds either side of the target (default: {DURATION_TOLERANCE_DEFAULT:g})")
+    parser.add_argument("--time-budget", type=float, default=TIME_BUDGET_DEFAULT,
+                        help=f"Search budget per set in seconds (default: {TIME_BUDGET_DEFAULT:g})")
+    parser.add_argument("--max-per-label", type=int, help="Most tracks from one label")
+    parser.add_argument("--min-preferred", type=int, default=0,
+                        help="Fewest tracks from the preferred labels")
+    parser.add_argument("--strict-key", action="store_true", help="Only use key-compatible tracks")
+
+    args = parser.parse_args()
+    seeds = range(1, args.runs + 1)
+
+    print(f"{'tracks':>8}  {'minutes':>7}  {'method':>7}  {'|error|':>8}  {'in tol':>6}  "
+          f"{'per step':>8}  {'time':>9}")
+    for size in args.sizes:
+        library = synthetic_library(size)
+        planner = JourneyPlanner(library)
+        for minutes in args.durations:
+            arc = planner.create_journey_arc(duration_minutes=minutes,
+                                             key_center=MusicalKey.A_MINOR, blend_duration=75)
+            target = minutes * 60.0
+
+            for method in ("greedy", "timed"):
+                errors, steps, timings, found = [], [], [], 0
+                for seed in seeds:
+                    start = time.perf_counter()
+                    try:
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            if method == "greedy":
+                                playlist = JourneyPlanner(library, seed=seed).generate_playlist(
+                                    arc, strict_key=args.strict_key)
+                            else:
+                                playlist = planner.generate_timed_playlist(
+                                    arc, tolerance=args.tolerance,
+                                    max_per_label=args.max_per_label,
+                                    min_preferred=args.min_preferred,
+                                    strict_key=args.strict_key,
+                                    time_budget=args.time_budget, seed=seed)
+                    except ValueError:
+                        continue
+                    timings.append(time.perf_counter() - start)
+                    found += 1
+                    errors.append(abs(playlist.total_duration - target))
+                    score = planner.score_sequence(playlist.tracks, arc, timed=True)
+                    steps.append(score / max(1, len(playlist.tracks) - 1))
+
+                if not found:
+                    print(f"{size:>8}  {minutes:>7}  {method:>7}  {'no set found':>8}")
+                    continue
+                within = sum(1 for e in errors if e <= args.tolerance) / len(seeds)
+                print(f"{size:>8}  {minutes:>7}  {method:>7}  {mean(errors):>7.0f}s  {within:>6.0%}  "
+                      f"{mean(steps):>8.1f}  {mean(timings) * 1000:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark whole-playlist scoring: Python loop vs PlaylistEvaluator.
+
+Scores --orders random orderings of a --tracks crate from a synthetic
+library three ways and reports orders per second:
+
+- loop: JourneyPlanner._score_track_compatibility per transition
+- evaluate: PlaylistEvaluator.evaluate() per order (all metrics)
+- batch: PlaylistEvaluator.evaluate_many() over all orders at once
+
+The summed transition scores must match.
+
+Usage:
+    python3 benchmarks/bench_evaluation.py
+    python3 benchmarks/bench_evaluation.py --tracks 100 --orders 20000
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from track_selector.journey_planner import JourneyPlanner
+from track_selector.evaluation import PlaylistEvaluator
+
+from bench_compatible_tracks import synthetic_library
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark whole-playlist evaluation")
+    parser.add_argument("--tracks", type=int, default=40, help="Tracks per playlist (default: 40)")
+    parser.add_argument("--orders", type=int, default=5000, help="Random orders to score (default: 5000)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the crate and orders")
+
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    library = synthetic_library(11000)
+    planner = JourneyPlanner(library)
+    arc = planner.create_journey_arc(duration_minutes=int(args.tracks * 5))
+
+    tracks = rng.sample(list(library.tracks), args.tracks)
+    orders = np.array([rng.sample(range(args.tracks), args.tracks) for _ in range(args.orders)])
+    targets = [planner.target_energy(arc, i) for i in range(args.tracks)]
+
+    start = time.perf_counter()
+    loop = [
+        sum(planner._score_track_compatibility(tracks[a], tracks[b], targets[i])
+            for i, (a, b) in enumerate(zip(order, order[1:]), 1))
+        for order in orders.tolist()
+    ]
+    loop_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    evaluator = PlaylistEvaluator(tracks)
+    single = [evaluator.evaluate(arc, order).score.sum() for order in orders]
+    single_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = PlaylistEvaluator(tracks).evaluate_many(arc, orders)['score_total']
+    batch_s = time.perf_counter() - start
+
+    same = "yes" if np.array_equal(loop, single) and np.array_equal(loop, batch) else "NO"
+    print(f"{args.orders} orders of {args.tracks} tracks (scores match: {same})")
+    for name, seconds in (("loop", loop_s), ("evaluate", single_s), ("batch", batch_s)):
+        print(f"  {name:<9} {seconds:>7.3f}s  {args.orders / seconds:>10,.0f} orders/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Benchmark title/artist matching with track_selector.matching.
+
+Two workloads, each against a synthetic N-track library:
+
+- BPM import: match N filenames (with case/punctuation differences) against
+  an N-line BPM list, as import_with_file_paths.py does
+- Playlist lookup: find title/artist pairs with TrackMatcher.find() versus
+  the original full-library loops of create_custom_playlist.py
+
+The linear baselines are quadratic, so they are timed on a sample of
+queries and extrapolated to N. The BPM lookups must give identical
+results; for playlist lookups the share of queries that found the intended
+track is reported for both methods.
+
+Usage:
+    python3 benchmarks/bench_matching.py
+    python3 benchmarks/bench_matching.py --sizes 11000 50000 --sample 200
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from track_selector.models import TrackMetadata
+from track_selector.matching import NameIndex, TrackMatcher
+
+
+WORDS = (
+    "deep dub space echo night drift dream berlin tribe solid focus voyage "
+    "reflection magnetic swift lullaby terminal glory flamingo park smooth "
+    "bass phunk crossing witness helping behind started moment lucid session "
+    "shadow river horizon pulse current static warm cold spiral orbit signal"
+).split()
+MIXES = ["", " (Dub Mix)", " (Original Mix)", " (Klartraum Remix)", " (Remastered)"]
+
+
+def synthetic_names(num_tracks: int, seed: int = 42):
+    """Unique (artist, title) pairs built from a small vocabulary."""
+    rng = random.Random(seed)
+    artists = [f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}"
+               for _ in range(max(1, num_tracks // 8))]
+    names, seen = [], set()
+    while len(names) < num_tracks:
+        title = " ".join(w.title() for w in rng.sample(WORDS, rng.randint(1, 4)))
+        title += rng.choice(MIXES)
+        pair = (rng.choice(artists), title)
+        if pair not in seen:
+            seen.add(pair)
+            names.append(pair)
+    return names
+
+
+def mangle(name: str, rng: random.Random) -> str:
+    """Change case and punctuation the way filenames differ from a text list."""
+    name = name.lower() if rng.random() < 0.5 else name
+    return name.replace("(", "").replace(")", "").replace("-", "_") if rng.random() < 0.5 else name
+
+
+def linear_bpm_lookup(bpm_map, clean_name):
+    """The original per-file loop from import_with_file_paths.py."""
+    if clean_name in bpm_map:
+        return bpm_map[clean_name]
+    clean_normalized = re.sub(r'[^\w\s]', '', clean_name.lower())
+    for bpm_name, bpm_value in bpm_map.items():
+        if re.sub(r'[^\w\s]', '', bpm_name.lower()) == clean_normalized:
+            return bpm_value
+    return None
+
+
+def fuzzy_match(title1, title2):
+    t1 = re.sub(r'[^\w\s]', '', title1.lower())
+    t2 = re.sub(r'[^\w\s]', '', title2.lower())
+    if t1 in t2 or t2 in t1:
+        return True
+    words1, words2 = set(t1.split()), set(t2.split())
+    return len(words1 & words2) / max(len(words1), len(words2)) > 0.5
+
+
+def linear_find_track(tracks, title, artist):
+    """The original create_custom_playlist.find_track() loops."""
+    for track in tracks:
+        if track.title.lower() == title.lower() and track.artist.lower() == artist.lower():
+            return track
+    for track in tracks:
+        if fuzzy_match(title, track.title) and artist.lower() in track.artist.lower():
+            return track
+    return None
+
+
+def bench_bpm_import(size, sample, rng):
+    names = synthetic_names(size)
+    bpm_map = {f"{artist} - {title}": round(rng.uniform(115, 128), 2) for artist, title in names}
+    files = [mangle(name, rng) for name in bpm_map]
+    sampled = rng.sample(files, min(sample, len(files)))
+
+    start = time.perf_counter()
+    linear = [linear_bpm_lookup(bpm_map, f) for f in sampled]
+    linear_s = (time.perf_counter() - start) * len(files) / len(sampled)
+
+    start = time.perf_counter()
+    index = NameIndex(bpm_map.items())
+    indexed_all = [bpm_map.get(f) or index.exact(f) for f in files]
+    indexed_s = time.perf_counter() - start
+
+    indexed = [bpm_map.get(f) or index.exact(f) for f in sampled]
+    matched = sum(1 for bpm in indexed_all if bpm)
+    return linear_s, indexed_s, linear == indexed, matched / len(files)
+
+
+def bench_playlist_lookup(size, sample, rng):
+    names = synthetic_names(size)
+    tracks = [TrackMetadata(file_path=Path(f"/Music/{i:06d}.m4a"), title=title,
+                            artist=artist, bpm=122.0)
+              for i, (artist, title) in enumerate(names)]
+    sampled = rng.sample(range(size), min(sample, size))
+    queries = [(mangle(names[i][1], rng), names[i][0]) for i in sampled]
+
+    start = time.perf_counter()
+    linear = [linear_find_track(tracks, title, artist) for title, artist in queries]
+    linear_s = (time.perf_counter() - start) / len(queries)
+
+    start = time.perf_counter()
+    matcher = TrackMatcher(tracks)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [matcher.find(title, artist) for title, artist in queries]
+    indexed_s = (time.perf_counter() - start) / len(queries)
+
+    linear_correct = sum(1 for i, t in zip(sampled, linear) if t is tracks[i]) / len(queries)
+    indexed_correct = sum(1 for i, t in zip(sampled, indexed) if t is tracks[i]) / len(queries)
+    return linear_s, build_s, indexed_s, linear_correct, indexed_correct
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the title/artist matching index")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[11000],
+                        help="Library / BPM list sizes (default: 11000)")
+    parser.add_argument("--sample", type=int, default=100,
+                        help="Queries timed with the linear baselines (default: 100)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print("BPM import (N files against an N-line BPM list)")
+    print(f"{'tracks':>8}  {'linear (est.)':>14}  {'indexed':>10}  {'matched':>8}  same")
+    for size in args.sizes:
+        linear_s, indexed_s, same, matched = bench_bpm_import(size, args.sample, rng)
+        print(f"{size:>8}  {linear_s:>13.1f}s  {indexed_s:>9.2f}s  {matched:>7.0%}  "
+              f"{'yes' if same else 'NO'}")
+
+    print("\nPlaylist lookup (title, artist) → track")
+    print(f"{'tracks':>8}  {'linear/query':>12}  {'build':>8}  {'indexed/query':>13}  "
+          f"{'correct (linear / indexed)':>26}")
+    for size in args.sizes:
+        linear_s, build_s, indexed_s, linear_ok, indexed_ok = bench_playlist_lookup(
+            size, args.sample, rng)
+        print(f"{size:>8}  {linear_s * 1000:>10.2f}ms  {build_s:>7.2f}s  "
+              f"{indexed_s * 1000:>11.3f}ms  {linear_ok:>17.0%} / {indexed_ok:.0%}")
+
+
+if __name__ == "__main__":
+    main()
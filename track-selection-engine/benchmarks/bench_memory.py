@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark memory use of TrackMetadata vs CompactTrackMetadata.
+
+Builds synthetic libraries (11k and 100k tracks by default) and loads each
+one from the same JSON text with each track class, the way
+TrackLibrary.load() does. Reports the memory still held once the parsed
+rows are freed (tracemalloc), the load time and the time of a full
+gc.collect() while the tracks are alive.
+
+Usage:
+    python3 benchmarks/bench_memory.py
+    python3 benchmarks/bench_memory.py --sizes 11000 100000 --downbeats 256
+"""
+
+import gc
+import json
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from track_selector.models import TrackMetadata, CompactTrackMetadata
+
+from bench_compatible_tracks import synthetic_library
+
+
+GENRES = ["Deep House", "Dub Techno", "Minimal", "Tech House"]
+
+
+def synthetic_rows(num_tracks: int, downbeats: int, seed: int = 42):
+    """to_dict() rows with genres, tags and downbeats filled in."""
+    rng = random.Random(seed)
+    rows = [track.to_dict() for track in synthetic_library(num_tracks, seed=seed).tracks]
+    for row in rows:
+        row['genre'] = rng.sample(GENRES, 2)
+        row['tags'] = ["traktor", "best-of"]
+        beat = 60.0 / row['bpm']
+        start = rng.uniform(0, beat)
+        row['downbeats'] = [round(start + i * 4 * beat, 3) for i in range(downbeats)]
+    return rows
+
+
+def measure(track_class, library_json):
+    """Returns (bytes held, load seconds, gc.collect seconds)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    start = time.perf_counter()
+    rows = json.loads(library_json)['tracks']
+    tracks = [track_class.from_dict(row) for row in rows]
+    build_s = time.perf_counter() - start
+
+    # Only what the tracks keep alive counts (TrackMetadata reuses the row lists)
+    del rows
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    gc.collect()
+    gc_s = time.perf_counter() - start
+
+    del tracks
+    return held, build_s, gc_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compact track memory use")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[11000, 100000],
+                        help="Library sizes to test (default: 11000 100000)")
+    parser.add_argument("--downbeats", type=int, default=128,
+                        help="Downbeats per track (default: 128)")
+
+    args = parser.parse_args()
+
+    print(f"{'tracks':>8}  {'class':<22} {'memory':>10} {'per track':>10} {'load':>8} {'gc':>8}")
+    for size in args.sizes:
+        library_json = json.dumps({'tracks': synthetic_rows(size, args.downbeats)})
+        results = {}
+        for track_class in (TrackMetadata, CompactTrackMetadata):
+            held, build_s, gc_s = measure(track_class, library_json)
+            results[track_class] = held
+            print(f"{size:>8}  {track_class.__name__:<22} {held / 1024 / 1024:>8.1f}MB "
+                  f"{held / size / 1024:>8.2f}KB {build_s:>7.2f}s {gc_s * 1000:>6.0f}ms")
+        saved = 1 - results[CompactTrackMetadata] / results[TrackMetadata]
+        print(f"{'':>8}  → compact saves {saved:.0%}\n")
+
+
+if __name__ == "__main__":
+    main()
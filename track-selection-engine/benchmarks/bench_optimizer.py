@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark the beam-search optimiser against the greedy planner.
+
+For each synthetic library, generates playlists with the greedy
+generate_playlist() (one per seed) and with generate_optimized_playlist()
+at each beam width, and reports:
+
+- tracks: mean playlist length (greedy stops early when it dead-ends)
+- score: mean summed transition score (JourneyPlanner.score_sequence)
+- per step: score per transition, comparable across lengths
+- labels: share of tracks on the arc's preferred labels
+- time: mean generation time
+
+Usage:
+    python3 benchmarks/bench_optimizer.py
+    python3 benchmarks/bench_optimizer.py --sizes 300 1000 --beam-widths 1 8 32
+    python3 benchmarks/bench_optimizer.py --strict-key --key 1A --duration 240
+
+Small libraries are where the methods differ: at 11k tracks most slots
+have a top-scoring candidate, so greedy is already close to the maximum.
+"""
+
+import sys
+import time
+import argparse
+import contextlib
+import io
+from pathlib import Path
+from statistics import mean
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from track_selector.models import MusicalKey
+from track_selector.library import STORAGE_MODES
+from track_selector.journey_planner import JourneyPlanner
+from track_selector.optimizer import TIME_BUDGET_DEFAULT
+
+from bench_compatible_tracks import synthetic_library
+
+
+def measure(planner, arc, generate, seeds):
+    """Run generate(seed) per seed; mean (tracks, score, per step, labels, seconds)."""
+    lengths, scores, steps, labels, timings = [], [], [], [], []
+    for seed in seeds:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):    # dead-end warnings
+            playlist = generate(seed)
+        timings.append(time.perf_counter() - start)
+
+        tracks = playlist.tracks
+        score = planner.score_sequence(tracks, arc)
+        lengths.append(len(tracks))
+        scores.append(score)
+        steps.append(score / max(1, len(tracks) - 1))
+        labels.append(sum(
+            1 for t in tracks
+            if t.label and any(lbl in t.label for lbl in arc.preferred_labels)
+        ) / len(tracks))
+    return mean(lengths), mean(scores), mean(steps), mean(labels), mean(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the beam-search playlist optimiser")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 11000],
+                        help="Library sizes to test (default: 1000 11000)")
+    parser.add_argument("--beam-widths", type=int, nargs="+", default=[1, 4, 16],
+                        help="Beam widths to test (default: 1 4 16)")
+    parser.add_argument("--time-budget", type=float, default=TIME_BUDGET_DEFAULT,
+                        help=f"Optimiser time budget in seconds (default: {TIME_BUDGET_DEFAULT:g})")
+    parser.add_argument("--runs", type=int, default=5, help="Seeds per measurement")
+    parser.add_argument("--duration", type=int, default=180, help="Journey duration in minutes")
+    parser.add_argument("--key", help="Key center (e.g. 1A)")
+    parser.add_argument("--strict-key", action="store_true", help="Only use key-compatible tracks")
+    parser.add_argument("--storage", choices=STORAGE_MODES, default="objects", help="Library storage engine")
+
+    args = parser.parse_args()
+    seeds = range(1, args.runs + 1)
+
+    for size in args.sizes:
+        library = synthetic_library(size, storage=args.storage)
+        arc = JourneyPlanner(library).create_journey_arc(
+            duration_minutes=args.duration,
+            key_center=MusicalKey(args.key) if args.key else None
+        )
+
+        print(f"\n{size} tracks, {arc.num_tracks}-track arc, {args.runs} seeds")
+        print(f"{'method':>10}  {'tracks':>6}  {'score':>7}  {'per step':>8}  {'labels':>6}  {'time':>9}")
+
+        def report(name, generate, planner):
+            n, score, step, labels, seconds = measure(planner, arc, generate, seeds)
+            print(f"{name:>10}  {n:>6.1f}  {score:>7.0f}  {step:>8.1f}  {labels:>6.0%}  "
+                  f"{seconds * 1000:>7.1f}ms")
+
+        planner = JourneyPlanner(library)
+        report("greedy", lambda seed: JourneyPlanner(library, seed=seed).generate_playlist(
+            arc, strict_key=args.strict_key), planner)
+        for width in args.beam_widths:
+            report(f"beam {width}", lambda seed: planner.generate_optimized_playlist(
+                arc, strict_key=args.strict_key, beam_width=width,
+                time_budget=args.time_budget, seed=seed), planner)
+
+
+if __name__ == "__main__":
+    main()
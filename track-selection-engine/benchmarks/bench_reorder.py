@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark simulated-annealing reordering against simpler orders.
+
+For crates of random tracks drawn from a synthetic library, this reports
+the weighted cost (see track_selector.reorder) of:
+
+- input: the crate in the order it was drawn
+- greedy: nearest neighbour, each next track the cheapest remaining one
+  for the next slot, from the input's first track
+- anneal: PlaylistReorderer for --time-budget seconds
+
+and the annealer's moves per second.
+
+Usage:
+    python3 benchmarks/bench_reorder.py
+    python3 benchmarks/bench_reorder.py --crates 30 100 500 1000 --time-budget 5
+    python3 benchmarks/bench_reorder.py --objective bpm=1,key=2
+"""
+
+import sys
+import random
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from track_selector.journey_planner import JourneyPlanner
+from track_selector.reorder import (
+    PlaylistReorderer, OBJECTIVES_DEFAULT, TIME_BUDGET_DEFAULT, parse_objectives, resample_curve
+)
+
+from bench_compatible_tracks import synthetic_library
+
+
+def greedy_order(reorderer: PlaylistReorderer, tracks, curve):
+    """Nearest-neighbour order under the reorderer's weighted costs."""
+    _, pair, position = reorderer._matrices(tracks, curve)
+    order = [0]
+    remaining = set(range(1, len(tracks)))
+    while remaining:
+        slot = len(order)
+        nxt = min(remaining, key=lambda i: (pair[order[-1], i] + position[i, slot], i))
+        order.append(nxt)
+        remaining.discard(nxt)
+    return [tracks[i] for i in order]
+
+
+def weighted(reorderer: PlaylistReorderer, tracks, curve) -> float:
+    breakdown = reorderer.cost(tracks, curve)
+    return sum(reorderer.weights[name] * cost for name, cost in breakdown.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark playlist reordering")
+    parser.add_argument("--crates", type=int, nargs="+", default=[30, 100, 500],
+                        help="Crate sizes to reorder (default: 30 100 500)")
+    parser.add_argument("--library-size", type=int, default=11000, help="Synthetic library size")
+    parser.add_argument("--objective", default=OBJECTIVES_DEFAULT,
+                        help=f"Weighted objectives (default: {OBJECTIVES_DEFAULT})")
+    parser.add_argument("--time-budget", type=float, default=TIME_BUDGET_DEFAULT,
+                        help=f"Annealing seconds per crate (default: {TIME_BUDGET_DEFAULT:g})")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for crates and annealing")
+
+    args = parser.parse_args()
+    library = synthetic_library(args.library_size)
+    planner = JourneyPlanner(library)
+    reorderer = PlaylistReorderer(parse_objectives(args.objective),
+                                  time_budget=args.time_budget, seed=args.seed)
+    rng = random.Random(args.seed)
+
+    print(f"{'crate':>6}  {'input':>9}  {'greedy':>9}  {'anneal':>9}  {'vs greedy':>9}  {'moves/s':>9}")
+    for size in args.crates:
+        tracks = rng.sample(list(library.tracks), size)
+        curve = resample_curve(planner._generate_energy_curve(size, 'gradual_build'), size)
+
+        input_cost = weighted(reorderer, tracks, curve)
+        greedy_cost = weighted(reorderer, greedy_order(reorderer, tracks, curve), curve)
+        result = reorderer.reorder(tracks, curve)
+
+        print(f"{size:>6}  {input_cost:>9.1f}  {greedy_cost:>9.1f}  {result.cost:>9.1f}  "
+              f"{result.cost / greedy_cost - 1:>+9.0%}  {result.moves / result.elapsed:>9,.0f}")
+
+
+if __name__ == "__main__":
+    main()
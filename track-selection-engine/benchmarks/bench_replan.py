@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark live replanning (JourneyPlanner.replan) against replanning from scratch.
+
+For each synthetic library, plans a set with generate_optimized_playlist(),
+then simulates the DJ leaving the plan: at a random point in the set, the
+current track is swapped for a random library track (in or out of the
+arc's BPM range) and the rest of the set is replanned. Reports, over the
+deviations:
+
+- replan: JourneyPlanner.replan() latency on the planner that made the set
+  (warm score-matrix cache), as p50 / p95 / max
+- scratch: a new planner's generate_playlist() for the same arc, which is
+  the only option without replanning (re-filters the library, cold cache)
+- fill: running time of the replanned set as a share of the arc's duration
+
+Usage:
+    python3 benchmarks/bench_replan.py
+    python3 benchmarks/bench_replan.py --sizes 11000 --runs 50 --strict-key
+"""
+
+import sys
+import time
+import random
+import argparse
+import contextlib
+import io
+from pathlib import Path
+from statistics import mean, median, quantiles
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from track_selector.library import STORAGE_MODES
+from track_selector.journey_planner import JourneyPlanner, REPLAN_TIME_BUDGET
+
+from bench_compatible_tracks import synthetic_library
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark live replanning")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 11000],
+                        help="Library sizes to test (default: 1000 11000)")
+    parser.add_argument("--runs", type=int, default=20, help="Deviations per library")
+    parser.add_argument("--duration", type=int, default=180, help="Journey duration in minutes")
+    parser.add_argument("--time-budget", type=float, default=REPLAN_TIME_BUDGET,
+                        help=f"Replan time budget in seconds (default: {REPLAN_TIME_BUDGET:g})")
+    parser.add_argument("--strict-key", action="store_true", help="Only use key-compatible tracks")
+    parser.add_argument("--storage", choices=STORAGE_MODES, default="objects", help="Library storage engine")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the deviations")
+
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"{'tracks':>7}  {'replan p50':>10}  {'p95':>8}  {'max':>8}  {'scratch':>9}  {'fill':>5}")
+    for size in args.sizes:
+        library = synthetic_library(size, storage=args.storage)
+        planner = JourneyPlanner(library, seed=args.seed)
+        arc = planner.create_journey_arc(duration_minutes=args.duration)
+        with contextlib.redirect_stdout(io.StringIO()):    # dead-end warnings
+            plan = planner.generate_optimized_playlist(arc, strict_key=args.strict_key, seed=args.seed)
+        everything = library.tracks
+
+        latencies, scratch, fill = [], [], []
+        for _ in range(args.runs):
+            played = plan.tracks[:rng.randrange(1, len(plan.tracks))]
+            played = played[:-1] + [rng.choice(everything)]
+            if played[-1] in played[:-1]:
+                continue
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                replanned = planner.replan(arc, played, strict_key=args.strict_key,
+                                           time_budget=args.time_budget, seed=args.seed)
+            latencies.append(time.perf_counter() - start)
+            fill.append(replanned.total_duration / (arc.duration_minutes * 60))
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                JourneyPlanner(library, seed=args.seed).generate_playlist(arc, strict_key=args.strict_key)
+            scratch.append(time.perf_counter() - start)
+
+        if not latencies:
+            print(f"{size:>7}  no replans measured")
+            continue
+        # Inclusive: the exclusive default extrapolates past the slowest run
+        # on small samples
+        if len(latencies) > 1:
+            p95 = quantiles(latencies, n=20, method='inclusive')[-1]
+        else:
+            p95 = latencies[0]
+        print(f"{size:>7}  {median(latencies) * 1000:>8.1f}ms  {p95 * 1000:>6.1f}ms  "
+              f"{max(latencies) * 1000:>6.1f}ms  {mean(scratch) * 1000:>7.1f}ms  {mean(fill):>5.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorised ScoreMatrix against per-pair Python scoring.
+
+For each synthetic library, takes the arc's BPM-range pool and compares:
+
+- loop: JourneyPlanner._score_track_compatibility for every pair, timed on
+  a sample of rows and extrapolated to the full pool
+- matrix: building ScoreMatrix (all pairs, plus the allowed-move mask)
+- row: one successor row from the matrix (what the optimiser reads)
+
+The sampled rows must score identically both ways.
+
+Usage:
+    python3 benchmarks/bench_score_matrix.py
+    python3 benchmarks/bench_score_matrix.py --sizes 11000 100000 --sample 20
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from track_selector.journey_planner import JourneyPlanner
+from track_selector.scoring import ScoreMatrix
+
+from bench_compatible_tracks import synthetic_library
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pairwise score matrix")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[11000, 50000],
+                        help="Library sizes to test (default: 11000 50000)")
+    parser.add_argument("--sample", type=int, default=10, help="Rows scored with the Python loop")
+    parser.add_argument("--energy", type=int, default=5, help="Target energy for the comparison")
+    parser.add_argument("--strict-key", action="store_true", help="Only allow key-compatible moves")
+
+    args = parser.parse_args()
+
+    print(f"{'tracks':>8}  {'pool':>6}  {'loop (est.)':>11}  {'matrix':>8}  {'row':>8}  same")
+    for size in args.sizes:
+        library = synthetic_library(size)
+        planner = JourneyPlanner(library)
+        arc = planner.create_journey_arc(duration_minutes=180)
+
+        start = time.perf_counter()
+        matrix = ScoreMatrix(library.find_tracks_by_bpm_range(*arc.bpm_range),
+                             strict_key=args.strict_key)
+        matrix_s = time.perf_counter() - start
+        pool = matrix.tracks
+        rows = range(0, len(pool), max(1, len(pool) // args.sample))
+
+        start = time.perf_counter()
+        loop_rows = [
+            [planner._score_track_compatibility(pool[a], b, args.energy) for b in pool]
+            for a in rows
+        ]
+        loop_s = (time.perf_counter() - start) * len(pool) / len(rows)
+
+        start = time.perf_counter()
+        matrix_rows = [matrix.scores_from(a, args.energy).tolist() for a in rows]
+        row_s = (time.perf_counter() - start) / len(rows)
+
+        same = "yes" if loop_rows == matrix_rows else "NO"
+        print(f"{size:>8}  {len(pool):>6}  {loop_s:>10.1f}s  {matrix_s:>7.2f}s  "
+              f"{row_s * 1000:>6.2f}ms  {same}")
+
+
+if __name__ == "__main__":
+    main()
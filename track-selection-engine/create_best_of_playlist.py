@@ -10,6 +10,7 @@ from datetime import datetime
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from track_selector.models import TrackMetadata, Playlist, JourneyArc, Transition
+from track_selector.matching import TrackMatcher
 
 
 # Your custom playlist in order
@@ -47,16 +48,12 @@ PLAYLIST_ORDER = [
 ]
 
 
-def parse_filename_to_metadata(file_path: Path, library) -> TrackMetadata:
+def parse_filename_to_metadata(file_path: Path, matcher) -> TrackMetadata:
     """Parse filename and match with library data for BPM/duration."""
     filename = file_path.stem
 
     # Try to find in library for BPM data
-    matched_track = None
-    for track in library.tracks:
-        if filename.lower() in track.title.lower() or track.title.lower() in filename.lower():
-            matched_track = track
-            break
+    matched_track = matcher.find_by_filename(filename) if matcher else None
 
     # Parse artist and title from filename
     if ' - ' in filename:
@@ -108,6 +105,7 @@ def main():
     print("Loading library for BPM data...")
     from track_selector.library import TrackLibrary
     library = TrackLibrary(library_file) if library_file.exists() else None
+    matcher = TrackMatcher(library.tracks) if library else None
 
     print(f"\n{'='*80}")
     print("CREATING PLAYLIST: Best of Deep Dub Tech House")
@@ -121,7 +119,7 @@ def main():
         file_path = music_dir / filename
 
         if file_path.exists():
-            track = parse_filename_to_metadata(file_path, library)
+            track = parse_filename_to_metadata(file_path, matcher)
             tracks.append(track)
             found_count += 1
 
@@ -11,20 +11,16 @@ sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from track_selector.models import TrackMetadata, Playlist, JourneyArc, Transition
 from track_selector.library import TrackLibrary
+from track_selector.matching import TrackMatcher
 from track_selector.journey_planner import JourneyPlanner
 
 
-def parse_filename_to_metadata(file_path: Path, library) -> TrackMetadata:
+def parse_filename_to_metadata(file_path: Path, matcher) -> TrackMetadata:
     """Parse filename and match with library data for BPM/duration."""
     filename = file_path.stem
 
     # Try to find in library for BPM data
-    matched_track = None
-    for track in library.tracks:
-        # Fuzzy match on title
-        if filename.lower() in track.title.lower() or track.title.lower() in filename.lower():
-            matched_track = track
-            break
+    matched_track = matcher.find_by_filename(filename) if matcher else None
 
     # Parse artist and title from filename
     # Common patterns in the filenames
@@ -166,6 +162,7 @@ def main():
     # Load library for BPM/duration data
     print("Loading library for BPM data...")
     library = TrackLibrary(library_file) if library_file.exists() else None
+    matcher = TrackMatcher(library.tracks) if library else None
 
     print(f"\n{'='*80}")
     print("ANALYZING TRACKS: Best of Deep Dub Tech House")
@@ -174,7 +171,7 @@ def main():
     # Scan directory for all M4A files
     tracks = []
     for file_path in sorted(music_dir.glob("*.m4a")):
-        track = parse_filename_to_metadata(file_path, library)
+        track = parse_filename_to_metadata(file_path, matcher)
         tracks.append(track)
         print(f"✓ {track.artist} - {track.title}")
         print(f"  {track.bpm:.1f} BPM | E{track.energy_level} | {track.duration/60:.1f}min")
@@ -9,6 +9,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from track_selector.library import TrackLibrary
+from track_selector.matching import TrackMatcher
 from track_selector.models import Playlist, JourneyArc, Transition
 
 
@@ -47,45 +48,6 @@ CUSTOM_TRACKS = [
 ]
 
 
-def fuzzy_match(title1, title2):
-    """Simple fuzzy matching for track titles."""
-    # Normalize: lowercase, remove special chars
-    import re
-    t1 = re.sub(r'[^\w\s]', '', title1.lower())
-    t2 = re.sub(r'[^\w\s]', '', title2.lower())
-
-    # Check if one contains the other
-    if t1 in t2 or t2 in t1:
-        return True
-
-    # Check word overlap
-    words1 = set(t1.split())
-    words2 = set(t2.split())
-    overlap = len(words1 & words2) / max(len(words1), len(words2))
-
-    return overlap > 0.5
-
-
-def find_track(library, title, artist):
-    """Find track in library by title and artist."""
-    # Try exact match first
-    for track in library.tracks:
-        if track.title.lower() == title.lower() and track.artist.lower() == artist.lower():
-            return track
-
-    # Try fuzzy title match with artist match
-    for track in library.tracks:
-        if fuzzy_match(title, track.title) and artist.lower() in track.artist.lower():
-            return track
-
-    # Try artist match only
-    for track in library.tracks:
-        if artist.lower() in track.artist.lower() and fuzzy_match(title, track.title):
-            return track
-
-    return None
-
-
 def main():
     """Main function."""
     library_file = Path("traktor-library-detailed.json")
@@ -97,6 +59,7 @@ def main():
     print("Loading library...")
     library = TrackLibrary(library_file)
     print(f"✓ Loaded {len(library.tracks)} tracks\n")
+    matcher = TrackMatcher(library.tracks)
 
     print("="*80)
     print("CUSTOM PLAYLIST: Lucidflow/Klartraum Journey (30 tracks)")
@@ -107,7 +70,7 @@ def main():
     not_found = []
 
     for i, (title, artist) in enumerate(CUSTOM_TRACKS, 1):
-        track = find_track(library, title, artist)
+        track = matcher.find(title, artist)
 
         if track:
             matched.append(track)
@@ -2,7 +2,6 @@
 """Import BPM list from Music_BPM_List.md into track library."""
 
 import sys
-import re
 from pathlib import Path
 
 # Add src to path
@@ -10,6 +9,7 @@ sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from track_selector.library import TrackLibrary
 from track_selector.models import TrackMetadata
+from track_selector.matching import split_artist_title
 
 
 def parse_bpm_list(file_path: Path, music_root: Path) -> list[TrackMetadata]:
@@ -40,18 +40,8 @@ def parse_bpm_list(file_path: Path, music_root: Path) -> list[TrackMetadata]:
         if bpm < 60 or bpm > 200:
             continue
 
-        # Try to parse artist and title
-        artist = "Unknown"
-        title = track_name
-
         # Common patterns: "Artist - Title" or "01-Artist - Title"
-        if ' - ' in track_name:
-            # Remove leading numbers like "01-"
-            cleaned = re.sub(r'^\d+-', '', track_name)
-            if ' - ' in cleaned:
-                parts = cleaned.split(' - ', 1)
-                artist = parts[0].strip()
-                title = parts[1].strip()
+        artist, title = split_artist_title(track_name)
 
         # Estimate energy level from BPM (rough heuristic)
         # Lower BPM = lower energy, higher BPM = higher energy
@@ -2,7 +2,6 @@
 """Import BPM list and match with actual audio files on disk."""
 
 import sys
-import re
 from pathlib import Path
 
 # Add src to path
@@ -10,6 +9,7 @@ sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from track_selector.library import TrackLibrary
 from track_selector.models import TrackMetadata
+from track_selector.matching import NameIndex, split_artist_title
 
 
 def parse_bpm_list(file_path: Path) -> dict[str, float]:
@@ -46,6 +46,9 @@ def scan_music_directory(music_dir: Path, bpm_map: dict[str, float]) -> list[Tra
     tracks = []
     extensions = {'.mp3', '.m4a', '.wav', '.aiff', '.flac'}
 
+    # Normalise the BPM list once rather than once per file
+    bpm_index = NameIndex(bpm_map.items())
+
     print(f"Scanning {music_dir}...")
 
     file_count = 0
@@ -66,17 +69,11 @@ def scan_music_directory(music_dir: Path, bpm_map: dict[str, float]) -> list[Tra
         # Try to find BPM
         bpm = None
 
-        # Exact match
+        # Exact match, then match ignoring case and punctuation
         if clean_name in bpm_map:
             bpm = bpm_map[clean_name]
         else:
-            # Try fuzzy match (remove special characters, compare)
-            clean_normalized = re.sub(r'[^\w\s]', '', clean_name.lower())
-            for bpm_name, bpm_value in bpm_map.items():
-                bpm_normalized = re.sub(r'[^\w\s]', '', bpm_name.lower())
-                if clean_normalized == bpm_normalized:
-                    bpm = bpm_value
-                    break
+            bpm = bpm_index.exact(clean_name)
 
         if not bpm:
             # Default to 123 BPM if not found
@@ -85,15 +82,7 @@ def scan_music_directory(music_dir: Path, bpm_map: dict[str, float]) -> list[Tra
             matched_count += 1
 
         # Parse artist and title
-        artist = "Unknown"
-        title = clean_name
-
-        if ' - ' in clean_name:
-            cleaned = re.sub(r'^\d+-', '', clean_name)
-            if ' - ' in cleaned:
-                parts = cleaned.split(' - ', 1)
-                artist = parts[0].strip()
-                title = parts[1].strip()
+        artist, title = split_artist_title(clean_name)
 
         # Estimate energy from BPM
         if bpm < 115:
@@ -14,9 +14,12 @@ setup(
         "musicbrainzngs>=0.7.1",
         "mutagen>=1.47.0",
     ],
+    extras_require={
+        "audio": ["librosa>=0.10.0"],
+    },
     entry_points={
         "console_scripts": [
-            "track-selector=track_selector.cli:main",
+            "track-selector=track_selector.client:main",
         ],
     },
     python_requires=">=3.10",
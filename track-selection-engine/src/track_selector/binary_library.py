@@ -0,0 +1,151 @@
+"""Compact binary library format (.tlib).
+
+A .tlib file is an uncompressed NumPy .npz archive holding:
+
+- the ColumnarTrackStore columns (bpm, energy_level, key_code, ...)
+- file paths, titles and the label/artist category tables, as UTF-8
+  byte blobs with offset tables (string i is data[offsets[i]:offsets[i+1]])
+- per track, the compact JSON of the to_dict() fields the columns and the
+  row template (default to_dict() values, stored once) don't already
+  give, in the same blob-and-offsets layout; most tracks only carry their
+  cues, downbeats and notes, and an empty slice means nothing differs
+
+Loading reads the columns and strings eagerly; a row is only rebuilt from
+the template, its columns and its JSON when that track is first accessed.
+Rows come back as to_dict() gives them, with any fields missing from the
+saved row filled in with their defaults.
+
+Version 1 files (strings as fixed-width arrays, full row JSON) still load.
+"""
+
+import json
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from .columnar import ColumnarTrackStore, COLUMN_DTYPES
+from .models import TrackMetadata
+
+BINARY_SUFFIX = '.tlib'
+BINARY_FORMAT = 'track-selector-library'
+BINARY_VERSION = 2
+
+# String tables stored as UTF-8 blobs (<name>_offsets, <name>_data)
+STRING_FIELDS = ('file_path', 'title', 'label_categories', 'artist_categories')
+
+
+def is_binary_library(path: Path) -> bool:
+    """True if path uses the binary library format (by extension)."""
+    return Path(path).suffix.lower() == BINARY_SUFFIX
+
+
+def _pack(encoded: List[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+    """Offsets and concatenated bytes for a list of byte strings."""
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+def _unpack_strings(offsets: np.ndarray, data: np.ndarray) -> List[str]:
+    """Strings packed by _pack()."""
+    blob = data.tobytes()
+    bounds = offsets.tolist()
+    return [blob[start:end].decode('utf-8') for start, end in zip(bounds, bounds[1:])]
+
+
+def _same(a, b) -> bool:
+    """Equal and of the same type (120 and 120.0 must both survive a round trip)."""
+    return type(a) is type(b) and a == b
+
+
+def _row_template() -> dict:
+    """A to_dict() row of default values, in to_dict() order."""
+    return TrackMetadata(file_path=Path(), title='', artist='', bpm=0.0).to_dict()
+
+
+def write_binary_library(path: Path, rows: List[dict]) -> None:
+    """
+    Write tracks to a .tlib file.
+
+    Args:
+        path: Output path
+        rows: Tracks in TrackMetadata.to_dict() form
+    """
+    store = ColumnarTrackStore()
+    store.append_rows(rows)
+
+    template = _row_template()
+    encoded = []
+    for position, row in enumerate(rows):
+        known = {**template, **store.column_fields(position)}
+        rest = {k: v for k, v in row.items() if k not in known or not _same(v, known[k])}
+        encoded.append(json.dumps(rest, separators=(',', ':')).encode('utf-8') if rest else b'')
+    row_offsets, row_data = _pack(encoded)
+
+    strings = {
+        'file_path': store.file_paths,
+        'title': store.titles,
+        'label_categories': store.labels.categories,
+        'artist_categories': store.artists.categories,
+    }
+
+    arrays = {name: store.column(name) for name in COLUMN_DTYPES}
+    arrays.update({
+        'format': np.array([BINARY_FORMAT]),
+        'version': np.array([BINARY_VERSION]),
+        'row_template': np.frombuffer(json.dumps(template).encode('utf-8'), dtype=np.uint8),
+        'row_offsets': row_offsets,
+        'row_data': row_data,
+    })
+    for name, values in strings.items():
+        offsets, data = _pack([v.encode('utf-8') for v in values])
+        arrays[f'{name}_offsets'] = offsets
+        arrays[f'{name}_data'] = data
+
+    # Pass a file object so numpy doesn't append .npz to the name
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+def read_binary_library(path: Path) -> ColumnarTrackStore:
+    """
+    Read a .tlib file into a ColumnarTrackStore (rows decoded lazily).
+
+    Raises:
+        ValueError: If the file is not a track library in a supported version
+    """
+    try:
+        data = np.load(path, allow_pickle=False)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Not a track library file: {path}") from e
+    if not isinstance(data, np.lib.npyio.NpzFile):
+        raise ValueError(f"Not a track library file: {path}")
+
+    with data:
+        if 'format' not in data or str(data['format'][0]) != BINARY_FORMAT:
+            raise ValueError(f"Not a track library file: {path}")
+        version = int(data['version'][0])
+        if version > BINARY_VERSION:
+            raise ValueError(f"Unsupported library format version {version} in {path}")
+
+        if version == 1:
+            strings = {name: data[name].tolist() for name in STRING_FIELDS}
+            template = None
+        else:
+            strings = {
+                name: _unpack_strings(data[f'{name}_offsets'], data[f'{name}_data'])
+                for name in STRING_FIELDS
+            }
+            template = json.loads(data['row_template'].tobytes())
+
+        return ColumnarTrackStore.from_arrays(
+            columns={name: data[name] for name in COLUMN_DTYPES},
+            file_paths=strings['file_path'],
+            titles=strings['title'],
+            label_categories=strings['label_categories'],
+            artist_categories=strings['artist_categories'],
+            row_offsets=data['row_offsets'],
+            row_data=data['row_data'].tobytes(),
+            row_template=template,
+        )
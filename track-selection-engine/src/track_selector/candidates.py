@@ -0,0 +1,170 @@
+"""Multi-seed playlist generation across a process pool."""
+
+import contextlib
+import io
+import os
+import random
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .models import JourneyArc, Playlist
+from .library import TrackLibrary
+from .journey_planner import JourneyPlanner
+from .optimizer import BEAM_WIDTH_DEFAULT
+
+# Generation is CPU bound, so processes rather than threads
+CANDIDATE_WORKERS_DEFAULT = os.cpu_count() or 4
+
+
+@dataclass
+class Candidate:
+    """One generated playlist: its seed, score and track files in order."""
+    seed: int
+    score: float
+    file_paths: List[str]
+
+
+# Per-worker state, set by _init_worker(): the planner over the worker's
+# library snapshot, the arc and the generation options
+_worker: Dict = {}
+
+
+def _init_worker(rows: Optional[List[dict]], storage: str, journey_arc: JourneyArc,
+                 options: dict, library: Optional[TrackLibrary] = None) -> None:
+    """Load the library snapshot (once per worker) and keep the generation settings."""
+    if library is None:
+        library = TrackLibrary(storage=storage)
+        library._load_rows(rows)
+    _worker['planner'] = JourneyPlanner(library)
+    _worker['arc'] = journey_arc
+    _worker['options'] = options
+
+
+def _generate(seed: int) -> Candidate:
+    """Generate and score one playlist with the given seed."""
+    planner = _worker['planner']
+    journey_arc = _worker['arc']
+    options = _worker['options']
+
+    # Dead-end warnings would interleave across workers; short playlists
+    # show up in their (lower) score instead
+    with contextlib.redirect_stdout(io.StringIO()):
+        if options['optimize']:
+            playlist = planner.generate_optimized_playlist(
+                journey_arc,
+                strict_key=options['strict_key'],
+                prefer_labels=options['prefer_labels'],
+                beam_width=options['beam_width'],
+                time_budget=None,
+                seed=seed
+            )
+        else:
+            planner.rng = random.Random(seed)
+            playlist = planner.generate_playlist(
+                journey_arc,
+                strict_key=options['strict_key'],
+                prefer_labels=options['prefer_labels']
+            )
+
+    return Candidate(
+        seed=seed,
+        score=planner.score_sequence(playlist.tracks, journey_arc),
+        file_paths=[str(t.file_path) for t in playlist.tracks]
+    )
+
+
+def generate_candidates(
+    library: TrackLibrary,
+    journey_arc: JourneyArc,
+    num_candidates: int,
+    workers: int = CANDIDATE_WORKERS_DEFAULT,
+    seed: int = 0,
+    strict_key: bool = False,
+    prefer_labels: bool = True,
+    optimize: bool = False,
+    beam_width: int = BEAM_WIDTH_DEFAULT
+) -> List[Candidate]:
+    """
+    Generate playlists with seeds seed, seed+1, ... and score each one.
+
+    Each worker process loads one read-only snapshot of the library, passed
+    as to_dict() rows when it starts, and generates its share of the seeds.
+    A seed gives the same playlist on every run and with any number of
+    workers (SQLite libraries are snapshotted in columnar mode). With
+    optimize the full beam is searched, without a time budget: where a
+    budget narrows the beam depends on machine load. Playlists are scored
+    with JourneyPlanner.score_sequence(), so ones that stopped early score
+    lower.
+
+    Args:
+        library: Library to generate from
+        journey_arc: Journey arc template to follow
+        num_candidates: Playlists to generate
+        workers: Worker processes (1 = generate in this process)
+        seed: First seed
+        strict_key: Only use tracks in compatible keys
+        prefer_labels: Prefer tracks from preferred labels
+        optimize: Use the beam-search optimiser instead of greedy selection
+        beam_width: Beam width with optimize
+
+    Returns:
+        Candidates, best score first (lower seed first on ties)
+    """
+    options = {
+        'strict_key': strict_key,
+        'prefer_labels': prefer_labels,
+        'optimize': optimize,
+        'beam_width': beam_width,
+    }
+    seeds = range(seed, seed + num_candidates)
+    workers = max(1, min(workers, num_candidates))
+
+    if workers == 1:
+        _init_worker(None, library.storage, journey_arc, options, library=library)
+        candidates = [_generate(s) for s in seeds]
+    else:
+        # Workers read the snapshot in object or columnar mode; an open
+        # SQLite connection can't be shared across processes
+        storage = 'objects' if library.storage == 'objects' else 'columnar'
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(library._rows(), storage, journey_arc, options)
+        ) as pool:
+            chunksize = max(1, num_candidates // (workers * 4))
+            candidates = list(pool.map(_generate, seeds, chunksize=chunksize))
+
+    candidates.sort(key=lambda c: (-c.score, c.seed))
+    return candidates
+
+
+def score_summary(candidates: List[Candidate]) -> Dict[str, float]:
+    """Min, quartiles, max and mean of the candidates' scores."""
+    scores = sorted(c.score for c in candidates)
+    if len(scores) > 1:
+        q1, median, q3 = statistics.quantiles(scores, n=4)
+    else:
+        q1 = median = q3 = scores[0]
+    return {
+        'min': scores[0],
+        'q1': q1,
+        'median': median,
+        'q3': q3,
+        'max': scores[-1],
+        'mean': statistics.fmean(scores),
+    }
+
+
+def candidate_playlist(
+    planner: JourneyPlanner,
+    journey_arc: JourneyArc,
+    candidate: Candidate
+) -> Playlist:
+    """Rebuild a candidate's playlist from the planner's library."""
+    by_path = {
+        str(t.file_path): t
+        for t in planner.library.find_tracks_by_bpm_range(*journey_arc.bpm_range)
+    }
+    return planner.playlist_from_tracks(journey_arc, [by_path[p] for p in candidate.file_paths])
@@ -0,0 +1,459 @@
+"""Batch energy and texture classification from audio features.
+
+Each file is decoded to mono and analysed in short frames (FRAME_LENGTH
+samples, HOP_LENGTH apart) with NumPy:
+
+  - loudness: RMS level of the non-silent frames, in dBFS
+  - dynamics: spread of the level over ~2 s windows (breakdowns vs a
+    steady groove), and sparsity (how far the median frame sits below
+    the loud ones: space between hits)
+  - spectral balance: share of power below LOW_HZ, between LOW_HZ and
+    HIGH_HZ, and above HIGH_HZ; spectral centroid and flatness
+  - onset density: peaks in the spectral flux, per second
+
+classify_features() maps those to an energy level (1-10) and the textures
+the features can tell apart (DERIVED_TEXTURES). Vocal, melodic, tribal
+and organic tags can't be heard in these features, so classification
+leaves them as tagged.
+
+classify_library() runs the analysis over a whole library in a process
+pool. Features are appended to an on-disk cache (FeatureCache) as each
+file finishes, keyed by path and (size, mtime), so an interrupted run
+resumes where it stopped and re-runs only analyse new or changed files.
+"""
+
+import json
+import os
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .models import TextureType
+
+# Decoding and FFTs are CPU bound, so processes rather than threads
+CLASSIFY_WORKERS_DEFAULT = os.cpu_count() or 4
+
+# Bump when audio_features() changes, so cached features are recomputed
+FEATURES_VERSION = 1
+
+SAMPLE_RATE = 22050       # librosa decodes to this rate (WAV is read at its own)
+FRAME_LENGTH = 2048       # samples per analysis frame
+HOP_LENGTH = 1024         # samples between frames (~46 ms at 22.05 kHz)
+BLOCK_FRAMES = 512        # frames per FFT batch, to bound memory on long tracks
+SILENCE_DB = 50.0         # frames this far below the loudest are silence
+DYNAMICS_WINDOW = 2.0     # seconds per level window for dynamics_db
+
+LOW_HZ = 150.0            # kick and bass below
+HIGH_HZ = 2500.0          # hats, air and noise above
+
+# Onsets are read from the level of ONSET_BANDS log-spaced bands; a frame
+# is an onset if the bands rise by ONSET_RISE_DB on average and it peaks
+# its ±2 frame neighbourhood
+ONSET_BANDS = 16
+ONSET_MIN_HZ = 40.0
+ONSET_RISE_DB = 1.5
+
+# Energy: weighted blend of loudness, onset density and brightness, each
+# scaled from the (low, high) range to 0..1, then spread over levels 1-10
+ENERGY_WEIGHTS = {'loudness_db': 0.45, 'onset_rate': 0.35, 'high_ratio': 0.20}
+ENERGY_RANGES = {'loudness_db': (-22.0, -8.0), 'onset_rate': (1.0, 7.0), 'high_ratio': (0.01, 0.12)}
+
+# Textures classify_features() sets or clears
+DERIVED_TEXTURES = (
+    TextureType.PERCUSSIVE, TextureType.ATMOSPHERIC, TextureType.DUB,
+    TextureType.HYPNOTIC, TextureType.LAYERED, TextureType.MINIMAL,
+)
+
+
+def features_path_for(library_path: Path) -> Path:
+    """Feature cache file kept next to a library."""
+    return library_path.with_name(library_path.name + '.features.jsonl')
+
+
+def decode_audio(file_path: Path) -> Tuple[np.ndarray, int]:
+    """
+    Decode an audio file to mono float32 samples in -1..1.
+
+    With librosa installed, any format it reads is decoded at SAMPLE_RATE.
+    Without it, only PCM WAV files can be read (by the wave module, at
+    their own rate).
+
+    Returns:
+        (samples, sample rate)
+    """
+    try:
+        import librosa
+    except ImportError:
+        librosa = None
+
+    if librosa is not None:
+        samples, sample_rate = librosa.load(str(file_path), sr=SAMPLE_RATE, mono=True)
+        return samples.astype(np.float32, copy=False), sample_rate
+
+    if Path(file_path).suffix.lower() != '.wav':
+        raise ValueError(f"librosa is required to decode {Path(file_path).suffix} files "
+                         f"(pip install librosa)")
+
+    with wave.open(str(file_path), 'rb') as wav:
+        width = wav.getsampwidth()
+        channels = wav.getnchannels()
+        sample_rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+
+    if width == 1:
+        data = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        data = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 2 ** 15
+    elif width == 3:
+        # Little-endian 24-bit: shift into the top of an int32 to keep the sign
+        bytes3 = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        data = ((bytes3[:, 0] << 8) | (bytes3[:, 1] << 16) | (bytes3[:, 2] << 24)).astype(np.float32) / 2 ** 31
+    elif width == 4:
+        data = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2 ** 31
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width} bytes")
+
+    return data.reshape(-1, channels).mean(axis=1), sample_rate
+
+
+def audio_features(samples: np.ndarray, sample_rate: int) -> Dict[str, float]:
+    """
+    Loudness, dynamics, spectral balance and onset features of mono samples.
+
+    Returns:
+        Dict of loudness_db, dynamics_db, sparsity_db, low_ratio,
+        mid_ratio, high_ratio, centroid_hz, flatness, onset_rate and
+        duration (seconds)
+    """
+    if len(samples) < FRAME_LENGTH * 4:
+        raise ValueError("Too short to analyse")
+
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_LENGTH)[::HOP_LENGTH]
+    n = len(frames)
+    window = np.hanning(FRAME_LENGTH).astype(np.float32)
+    freqs = np.fft.rfftfreq(FRAME_LENGTH, 1.0 / sample_rate)
+    low = freqs < LOW_HZ
+    high = freqs >= HIGH_HZ
+    mid = ~low & ~high
+    # Frequency bin → onset band (bins below ONSET_MIN_HZ are left out)
+    edges = np.geomspace(ONSET_MIN_HZ, sample_rate / 2, ONSET_BANDS + 1)
+    onset_band = np.clip(np.searchsorted(edges, freqs, 'right') - 1, -1, ONSET_BANDS - 1)
+    onset_bins = onset_band >= 0
+    onset_matrix = np.zeros((len(freqs), ONSET_BANDS))
+    onset_matrix[np.flatnonzero(onset_bins), onset_band[onset_bins]] = 1.0
+
+    rms = np.empty(n)
+    bands = np.empty((n, 3))
+    centroid = np.empty(n)
+    flatness = np.empty(n)
+    band_db = np.empty((n, ONSET_BANDS))
+    for start in range(0, n, BLOCK_FRAMES):
+        block = frames[start:start + BLOCK_FRAMES]
+        rows = slice(start, start + len(block))
+        rms[rows] = np.sqrt(np.mean(np.square(block, dtype=np.float64), axis=1))
+
+        magnitude = np.abs(np.fft.rfft(block * window, axis=1))
+        power = np.square(magnitude)
+        total = power.sum(axis=1)
+        bands[rows, 0] = power[:, low].sum(axis=1)
+        bands[rows, 1] = power[:, mid].sum(axis=1)
+        bands[rows, 2] = power[:, high].sum(axis=1)
+        centroid[rows] = power @ freqs / np.maximum(total, 1e-12)
+        flatness[rows] = (np.exp(np.mean(np.log(power + 1e-12), axis=1))
+                          / np.maximum(np.mean(power, axis=1), 1e-12))
+
+        band_db[rows] = 10 * np.log10(power @ onset_matrix + 1e-20)
+
+    level_db = 20 * np.log10(rms + 1e-10)
+    active = level_db > level_db.max() - SILENCE_DB
+    seconds_per_frame = HOP_LENGTH / sample_rate
+
+    # Level per DYNAMICS_WINDOW, from the mean power of its frames
+    per_window = max(1, round(DYNAMICS_WINDOW / seconds_per_frame))
+    usable = n - n % per_window or n
+    window_power = np.square(rms[:usable]).reshape(-1, min(per_window, usable)).mean(axis=1)
+    window_db = 10 * np.log10(window_power + 1e-20)
+    window_db = window_db[window_db > window_db.max() - SILENCE_DB]
+
+    # Spectral flux: mean rise in band level since the previous frame, in dB,
+    # with levels floored so near-silent bands can't make onsets out of noise
+    band_db = np.maximum(band_db, band_db.max() - SILENCE_DB)
+    flux = np.concatenate([[0.0], np.maximum(np.diff(band_db, axis=0), 0).mean(axis=1)])
+
+    # Onsets: local flux maxima (±2 frames) with a clear rise in level
+    padded = np.pad(flux, 2, constant_values=-np.inf)
+    neighbourhood = np.lib.stride_tricks.sliding_window_view(padded, 5).max(axis=1)
+    onsets = np.count_nonzero((flux >= neighbourhood) & (flux > ONSET_RISE_DB) & active)
+
+    band_power = bands[active].sum(axis=0)
+    band_share = band_power / max(band_power.sum(), 1e-12)
+    active_db = level_db[active]
+    return {
+        'loudness_db': float(10 * np.log10(np.mean(np.square(rms[active])) + 1e-20)),
+        'dynamics_db': float(np.percentile(window_db, 90) - np.percentile(window_db, 10)),
+        'sparsity_db': float(np.percentile(active_db, 95) - np.percentile(active_db, 50)),
+        'low_ratio': float(band_share[0]),
+        'mid_ratio': float(band_share[1]),
+        'high_ratio': float(band_share[2]),
+        'centroid_hz': float(np.median(centroid[active])),
+        'flatness': float(np.median(flatness[active])),
+        'onset_rate': float(onsets / (np.count_nonzero(active) * seconds_per_frame)),
+        'duration': float(len(samples) / sample_rate),
+    }
+
+
+def analyse_file(file_path: Path) -> Dict[str, float]:
+    """audio_features() of a file (decoded with decode_audio())."""
+    samples, sample_rate = decode_audio(file_path)
+    return audio_features(samples, sample_rate)
+
+
+def _scale(value: float, low: float, high: float) -> float:
+    return min(1.0, max(0.0, (value - low) / (high - low)))
+
+
+def classify_features(features: Dict[str, float]) -> Tuple[int, List[TextureType]]:
+    """
+    Energy level (1-10) and derived textures for audio_features() output.
+
+    Energy blends loudness, onset density and brightness (ENERGY_WEIGHTS
+    over ENERGY_RANGES). Textures:
+
+      - percussive: 4+ onsets per second
+      - atmospheric: under 2 onsets per second, not bass-dominated
+      - dub: dark and bass-heavy (70%+ of power below LOW_HZ, under 4%
+        above HIGH_HZ), not busy
+      - hypnotic: level within 4 dB across the track (no breakdowns)
+      - layered: every band carries 15%+ of the power and the spectrum
+        is noise-like (flatness 0.1+)
+      - minimal: sparse (loud frames 10+ dB above the median) and dark,
+        not layered
+    """
+    score = sum(
+        weight * _scale(features[name], *ENERGY_RANGES[name])
+        for name, weight in ENERGY_WEIGHTS.items()
+    )
+    energy = 1 + int(round(9 * score))
+
+    textures = []
+    onset_rate = features['onset_rate']
+    if onset_rate >= 4.0:
+        textures.append(TextureType.PERCUSSIVE)
+    if onset_rate < 2.0 and features['low_ratio'] < 0.6:
+        textures.append(TextureType.ATMOSPHERIC)
+    if features['low_ratio'] >= 0.7 and features['high_ratio'] < 0.04 and onset_rate < 4.0:
+        textures.append(TextureType.DUB)
+    if features['dynamics_db'] < 4.0:
+        textures.append(TextureType.HYPNOTIC)
+    layered = (min(features['low_ratio'], features['mid_ratio'], features['high_ratio']) >= 0.15
+               and features['flatness'] >= 0.1)
+    if layered:
+        textures.append(TextureType.LAYERED)
+    if not layered and features['sparsity_db'] >= 10.0 and features['high_ratio'] < 0.1:
+        textures.append(TextureType.MINIMAL)
+    return energy, textures
+
+
+def _file_stamp(file_path: str) -> Optional[Tuple[int, int]]:
+    """(size, mtime_ns) of a file, or None if it can't be read."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class FeatureCache:
+    """
+    On-disk audio features by file path, as JSON lines.
+
+    Each line is {"path", "stamp": [size, mtime_ns], "version", "features"}.
+    Lines are appended (and flushed) as files finish, so a run that is
+    interrupted keeps everything analysed so far; later lines for a path
+    replace earlier ones. compact() rewrites the file with one line per
+    path.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: Dict[str, dict] = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue    # A line cut short by an interrupted run
+                    self.entries[entry['path']] = entry
+        self._file = None
+
+    def get(self, file_path: str, stamp: Tuple[int, int]) -> Optional[Dict[str, float]]:
+        """Cached features for a file, if they match its stamp and FEATURES_VERSION."""
+        entry = self.entries.get(file_path)
+        if entry and tuple(entry['stamp']) == tuple(stamp) and entry.get('version') == FEATURES_VERSION:
+            return entry['features']
+        return None
+
+    def put(self, file_path: str, stamp: Tuple[int, int], features: Dict[str, float]) -> None:
+        """Record a file's features, appending them to the cache file."""
+        entry = {'path': file_path, 'stamp': list(stamp), 'version': FEATURES_VERSION,
+                 'features': features}
+        self.entries[file_path] = entry
+        if self._file is None:
+            self._file = open(self.path, 'a')
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+
+    def compact(self) -> None:
+        """Rewrite the cache with the latest entry per path."""
+        self.close()
+        temporary = self.path.with_name(self.path.name + '.tmp')
+        with open(temporary, 'w') as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry) + '\n')
+        os.replace(temporary, self.path)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+@dataclass
+class ClassifyResult:
+    """Outcome of classify_library()."""
+    analysed: int = 0                 # Files decoded and analysed this run
+    cached: int = 0                   # Files whose features came from the cache
+    updated: int = 0                  # Tracks whose energy or textures changed
+    failures: List[Tuple[str, str]] = field(default_factory=list)
+    elapsed: float = 0.0
+
+
+def _analyse(file_path: str) -> Tuple[str, Optional[Dict[str, float]], Optional[str]]:
+    """Worker: (path, features or None, error or None)."""
+    try:
+        return file_path, analyse_file(Path(file_path)), None
+    except Exception as e:
+        return file_path, None, f"{type(e).__name__}: {e}"
+
+
+def classify_library(
+    library,
+    cache_path: Optional[Path] = None,
+    workers: int = CLASSIFY_WORKERS_DEFAULT,
+    force: bool = False,
+    limit: Optional[int] = None,
+    progress: bool = True
+) -> ClassifyResult:
+    """
+    Classify every track's energy and textures from its audio.
+
+    Files are analysed in a process pool (workers=1 analyses in this
+    process) and their features cached in cache_path as they finish.
+    Then each track with features gets classify_features()'s energy, and
+    its DERIVED_TEXTURES replaced by the derived ones (other textures are
+    kept). Results are written into the library (TrackLibrary.update_tracks);
+    save() the library to keep them.
+
+    Args:
+        library: TrackLibrary to classify
+        cache_path: Feature cache (default: features_path_for(library.library_path),
+            or no on-disk cache for an unsaved library)
+        workers: Worker processes
+        force: Re-analyse files even if their features are cached
+        limit: Analyse at most this many uncached files (the rest are
+            left for a later run)
+        progress: Print progress and files/s
+
+    Returns:
+        ClassifyResult with counts and the files that could not be analysed
+    """
+    started = time.perf_counter()
+    result = ClassifyResult()
+    if cache_path is None and library.library_path:
+        cache_path = features_path_for(Path(library.library_path))
+    cache = FeatureCache(cache_path) if cache_path else None
+
+    features_by_path: Dict[str, Dict[str, float]] = {}
+    to_analyse: List[Tuple[str, Tuple[int, int]]] = []
+    seen = set()
+    for track in library.tracks:
+        path = str(track.file_path)
+        if path in seen:
+            continue
+        seen.add(path)
+        stamp = _file_stamp(path)
+        if stamp is None:
+            result.failures.append((path, "file not found"))
+            continue
+        cached = cache.get(path, stamp) if cache and not force else None
+        if cached is not None:
+            features_by_path[path] = cached
+            result.cached += 1
+        else:
+            to_analyse.append((path, stamp))
+    if limit is not None:
+        to_analyse = to_analyse[:limit]
+    stamps = dict(to_analyse)
+
+    def record(path: str, features: Optional[Dict[str, float]], error: Optional[str]) -> None:
+        if features is None:
+            result.failures.append((path, error))
+            return
+        features_by_path[path] = features
+        result.analysed += 1
+        if cache:
+            cache.put(path, stamps[path], features)
+
+    last_report = started
+
+    def report(done: int) -> None:
+        nonlocal last_report
+        now = time.perf_counter()
+        if progress and (now - last_report >= 0.5 or done == len(to_analyse)):
+            rate = done / max(now - started, 1e-9)
+            print(f"  Analysing: {done}/{len(to_analyse)} ({rate:.1f} files/s)",
+                  end='\r' if done < len(to_analyse) else '\n', flush=True)
+            last_report = now
+
+    try:
+        if workers <= 1 or len(to_analyse) <= 1:
+            for done, (path, _) in enumerate(to_analyse, 1):
+                record(*_analyse(path))
+                report(done)
+        elif to_analyse:
+            pool = ProcessPoolExecutor(max_workers=min(workers, len(to_analyse)))
+            try:
+                futures = [pool.submit(_analyse, path) for path, _ in to_analyse]
+                for done, future in enumerate(as_completed(futures), 1):
+                    record(*future.result())
+                    report(done)
+            finally:
+                # On Ctrl-C, drop the queued files; finished ones are cached
+                pool.shutdown(wait=True, cancel_futures=True)
+    finally:
+        if cache:
+            cache.close()
+
+    if cache and result.analysed:
+        cache.compact()
+
+    fields_by_path = {}
+    for track in library.tracks:
+        features = features_by_path.get(str(track.file_path))
+        if features is None:
+            continue
+        energy, derived = classify_features(features)
+        kept = [t for t in track.textures if t not in DERIVED_TEXTURES]
+        textures = kept + [t for t in derived if t not in kept]
+        if energy != track.energy_level or set(textures) != set(track.textures):
+            fields_by_path[str(track.file_path)] = {'energy_level': energy, 'textures': textures}
+    result.updated = library.update_tracks(fields_by_path)
+
+    result.elapsed = time.perf_counter() - started
+    return result
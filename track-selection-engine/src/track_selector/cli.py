@@ -1,17 +1,50 @@
 """Command-line interface for Track Selection Engine."""
 
 import argparse
+import dataclasses
+import json
+import math
 import sys
+import time
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 
-from .library import TrackLibrary
+from .library import TrackLibrary, STORAGE_MODES, SCAN_WORKERS_DEFAULT
 from .journey_planner import JourneyPlanner
-from .models import MusicalKey, TrackMetadata, TextureType, JourneyPosition
+from .models import MusicalKey, TrackMetadata, TextureType, JourneyPosition, JourneyArc
+from .nml import NML_DEFAULT
+from .optimizer import BEAM_WIDTH_DEFAULT, TIME_BUDGET_DEFAULT
+from .duration_planner import DURATION_TOLERANCE_DEFAULT, ARTIST_WINDOW_DEFAULT
+from .candidates import (
+    CANDIDATE_WORKERS_DEFAULT, generate_candidates, score_summary, candidate_playlist
+)
+from .playlist_io import load_playlist, playlist_arc
+from .evaluation import PlaylistEvaluator, BPM_CLASH_PERCENT
+from .harmonic import parse_key, camelot_distance, MAX_BRIDGES_DEFAULT
+from .client import SERVER_HOST, SERVER_PORT_DEFAULT, WATCH_INTERVAL_DEFAULT
+from .classify import CLASSIFY_WORKERS_DEFAULT, classify_library, features_path_for
+from .profiling import StageProfiler, stage
+from .reorder import (
+    PlaylistReorderer, OBJECTIVES, OBJECTIVES_DEFAULT, TIME_BUDGET_DEFAULT as REORDER_BUDGET_DEFAULT,
+    parse_objectives, resample_curve
+)
+
+
+# Set by the server while it runs a client's command: its resident
+# libraries (server.LibraryCache), so the command skips the load
+_resident_libraries = None
+
+
+def load_library(library_path: Path, storage: Optional[str] = None) -> TrackLibrary:
+    """A library to read from: the server's resident copy, or loaded from disk."""
+    with stage("load library"):
+        if _resident_libraries is not None:
+            return _resident_libraries.get(library_path, storage)
+        return TrackLibrary(library_path, storage=storage)
 
 
 def create_library(args):
-    """Create a new track library from a directory."""
+    """Create a track library from a directory, or update it incrementally."""
     library_path = Path(args.library)
     music_dir = Path(args.directory)
 
@@ -19,13 +52,17 @@ def create_library(args):
         print(f"Error: Directory not found: {music_dir}")
         sys.exit(1)
 
-    print(f"Scanning directory: {music_dir}")
-    library = TrackLibrary()
+    if library_path.exists() and not args.full:
+        library = TrackLibrary(library_path)
+        print(f"Updating library ({len(library.tracks)} tracks): {library_path}")
+    else:
+        library = TrackLibrary()
+        library.library_path = library_path
 
-    count = library.scan_directory(music_dir)
+    print(f"Scanning directory: {music_dir}")
+    count = library.scan_directory(music_dir, workers=args.workers)
     print(f"✓ Added {count} tracks to library")
 
-    library.library_path = library_path
     library.save()
     print(f"✓ Library saved to: {library_path}")
 
@@ -37,6 +74,34 @@ def create_library(args):
     print(f"  Average BPM: {stats['bpm_average']:.1f}")
 
 
+def import_nml(args):
+    """Create a track library from Traktor's collection.nml, or refresh it."""
+    library_path = Path(args.library)
+    nml_path = Path(args.nml)
+
+    if not nml_path.exists():
+        print(f"Error: collection.nml not found: {nml_path}")
+        sys.exit(1)
+
+    print(f"Importing Traktor collection: {nml_path}")
+    if library_path.exists() and not args.full:
+        print(f"Updating library: {library_path}")
+        library = TrackLibrary.from_nml(nml_path, library_path)
+    else:
+        library = TrackLibrary.from_nml(nml_path)
+        library.library_path = library_path
+
+    library.save()
+    print(f"✓ Library saved to: {library_path}")
+
+    stats = library.stats()
+    if stats['total_tracks']:
+        print(f"\nLibrary Statistics:")
+        print(f"  Total tracks: {stats['total_tracks']}")
+        print(f"  BPM range: {stats['bpm_range'][0]:.1f} - {stats['bpm_range'][1]:.1f}")
+        print(f"  Average BPM: {stats['bpm_average']:.1f}")
+
+
 def show_stats(args):
     """Show library statistics."""
     library_path = Path(args.library)
@@ -45,7 +110,7 @@ def show_stats(args):
         print(f"Error: Library not found: {library_path}")
         sys.exit(1)
 
-    library = TrackLibrary(library_path)
+    library = load_library(library_path, args.storage)
     stats = library.stats()
 
     print(f"\nLibrary: {library_path}")
@@ -58,6 +123,32 @@ def show_stats(args):
     print(f"Keys represented: {stats['keys_represented']}")
     print(f"Labels: {stats['labels']}")
 
+    if args.distributions and stats['total_tracks']:
+        show_distributions(library)
+
+
+def show_distributions(library: TrackLibrary):
+    """Print the BPM histogram and key × energy matrix."""
+    statistics = library.statistics
+
+    histogram = statistics.bpm_histogram()
+    widest = max(histogram.values())
+    print(f"\nBPM distribution (1-BPM bins)")
+    print(f"{'-'*60}")
+    for bpm, count in histogram.items():
+        bar = '█' * max(1, round(count / widest * 40))
+        print(f"{bpm:>4} {bar} {count}")
+
+    print(f"\nKey × energy")
+    print(f"{'-'*60}")
+    print("Key  " + "".join(f"{energy:>6}" for energy in range(1, 11)))
+    for key, counts in statistics.key_energy_matrix().items():
+        if any(counts):
+            print(f"{key.value:<5}" + "".join(f"{count or '.':>6}" for count in counts))
+    unkeyed = sum(n for (key, _), n in statistics.key_energy.items() if key is None)
+    if unkeyed:
+        print(f"(+ {unkeyed} tracks with no key)")
+
 
 def generate_playlist(args):
     """Generate a journey arc playlist."""
@@ -68,31 +159,31 @@ def generate_playlist(args):
         sys.exit(1)
 
     print(f"Loading library: {library_path}")
-    library = TrackLibrary(library_path)
+    library = load_library(library_path, args.storage)
     print(f"✓ Loaded {len(library.tracks)} tracks")
 
     # Parse key center
     key_center = None
     if args.key:
-        try:
-            key_center = MusicalKey(args.key)
-        except ValueError:
+        key_center = parse_key(args.key)
+        if key_center is None:
             print(f"Error: Invalid key: {args.key}")
-            print(f"Valid keys: {', '.join([k.value for k in MusicalKey])}")
+            print(f"Valid keys: {', '.join([k.value for k in MusicalKey])} (or Traktor's 1m-12m, 1d-12d)")
             sys.exit(1)
 
     # Create journey planner
-    planner = JourneyPlanner(library)
+    planner = JourneyPlanner(library, seed=args.seed)
 
     # Create journey arc
     print(f"\nCreating journey arc...")
-    journey_arc = planner.create_journey_arc(
-        duration_minutes=args.duration,
-        key_center=key_center,
-        bpm_range=(args.min_bpm, args.max_bpm),
-        energy_progression=args.progression,
-        blend_duration=args.blend
-    )
+    with stage("create arc"):
+        journey_arc = planner.create_journey_arc(
+            duration_minutes=args.duration,
+            key_center=key_center,
+            bpm_range=(args.min_bpm, args.max_bpm),
+            energy_progression=args.progression,
+            blend_duration=args.blend
+        )
 
     print(f"✓ Journey arc: {journey_arc.name}")
     print(f"  Duration: {journey_arc.duration_minutes} minutes")
@@ -100,18 +191,54 @@ def generate_playlist(args):
     print(f"  Energy curve: {journey_arc.energy_curve}")
 
     # Generate playlist
-    print(f"\nGenerating playlist...")
+    runners_up = []
     try:
-        playlist = planner.generate_playlist(
-            journey_arc,
-            strict_key=args.strict_key,
-            prefer_labels=True
-        )
+        with stage("generate"):
+            if args.exact_duration:
+                print(f"\nPlanning a {args.duration}-minute set (± {args.tolerance:g}s, "
+                      f"budget {args.time_budget:g}s)...")
+                started = time.perf_counter()
+                playlist = planner.generate_timed_playlist(
+                    journey_arc,
+                    tolerance=args.tolerance,
+                    artist_window=args.artist_window,
+                    max_per_label=args.max_per_label,
+                    min_preferred=args.min_preferred,
+                    strict_key=args.strict_key,
+                    time_budget=args.time_budget,
+                    seed=args.seed
+                )
+                print(f"✓ Searched in {time.perf_counter() - started:.2f}s")
+            elif args.candidates > 1:
+                playlist, *runners_up = generate_candidate_playlists(args, planner, journey_arc)
+            elif args.optimize:
+                print(f"\nOptimizing playlist (beam width {args.beam_width}, "
+                      f"budget {args.time_budget:g}s)...")
+                started = time.perf_counter()
+                playlist = planner.generate_optimized_playlist(
+                    journey_arc,
+                    strict_key=args.strict_key,
+                    prefer_labels=True,
+                    beam_width=args.beam_width,
+                    time_budget=args.time_budget,
+                    seed=args.seed
+                )
+                print(f"✓ Searched in {time.perf_counter() - started:.2f}s")
+            else:
+                print(f"\nGenerating playlist...")
+                playlist = planner.generate_playlist(
+                    journey_arc,
+                    strict_key=args.strict_key,
+                    prefer_labels=True
+                )
     except ValueError as e:
         print(f"Error: {e}")
         sys.exit(1)
 
     print(f"✓ Playlist generated: {len(playlist.tracks)} tracks")
+    with stage("score"):
+        score = planner.score_sequence(playlist.tracks, journey_arc, timed=args.exact_duration)
+    print(f"  Transition score: {score:.0f}")
     print(f"  Total duration: {playlist.total_duration / 60:.1f} minutes")
 
     # Show playlist
@@ -137,17 +264,374 @@ def generate_playlist(args):
 
     # Save playlist
     output_path = Path(args.output)
+    with stage("export"):
+        # Save JSON
+        json_path = output_path.with_suffix('.json')
+        playlist.to_json(json_path)
+        print(f"✓ Saved playlist to: {json_path}")
+
+        # Save M3U
+        if args.m3u:
+            m3u_path = output_path.with_suffix('.m3u')
+            playlist.to_m3u(m3u_path)
+            print(f"✓ Saved M3U playlist to: {m3u_path}")
+
+        # Save the runners-up from --top as <output>-2, <output>-3, ...
+        base = json_path.with_suffix('')
+        for rank, runner_up in enumerate(runners_up, 2):
+            ranked_path = base.with_name(f"{base.name}-{rank}")
+            runner_up.to_json(ranked_path.with_suffix('.json'))
+            print(f"✓ Saved #{rank} playlist to: {ranked_path.with_suffix('.json')}")
+            if args.m3u:
+                runner_up.to_m3u(ranked_path.with_suffix('.m3u'))
+
+
+# generate options that only apply with --exact-duration, and with --candidates
+EXACT_DURATION_OPTIONS = ('tolerance', 'artist_window', 'max_per_label', 'min_preferred')
+CANDIDATE_OPTIONS = ('workers', 'top')
+
+
+def check_generate_options(parser: argparse.ArgumentParser, args) -> None:
+    """Reject generate options the chosen method would ignore; fill in defaults for the rest."""
+    def given(dest: str) -> bool:
+        return getattr(args, dest) is not None
+
+    def flag(dest: str) -> str:
+        return '--' + dest.replace('_', '-')
+
+    if args.exact_duration:
+        if args.optimize:
+            parser.error("--optimize can't be combined with --exact-duration (it runs its own search)")
+        if args.candidates > 1:
+            parser.error("--candidates can't be combined with --exact-duration")
+    else:
+        unused = [flag(d) for d in EXACT_DURATION_OPTIONS if given(d)]
+        if unused:
+            parser.error(f"{', '.join(unused)} can only be used with --exact-duration")
+    if args.candidates <= 1:
+        unused = [flag(d) for d in CANDIDATE_OPTIONS if given(d)]
+        if unused:
+            parser.error(f"{', '.join(unused)} can only be used with --candidates N (N > 1)")
+    elif given('time_budget'):
+        # Where a budget narrows the beam depends on machine load, which
+        # would make a seed's playlist vary between runs
+        parser.error("--time-budget can't be combined with --candidates (the full beam is searched)")
+    if given('time_budget') and not (args.optimize or args.exact_duration):
+        parser.error("--time-budget can only be used with --optimize or --exact-duration")
+
+    if args.tolerance is None:
+        args.tolerance = DURATION_TOLERANCE_DEFAULT
+    if args.artist_window is None:
+        args.artist_window = ARTIST_WINDOW_DEFAULT
+    if args.min_preferred is None:
+        args.min_preferred = 0
+    if args.workers is None:
+        args.workers = CANDIDATE_WORKERS_DEFAULT
+    if args.top is None:
+        args.top = 1
+    if args.time_budget is None:
+        args.time_budget = TIME_BUDGET_DEFAULT
+
+
+def generate_candidate_playlists(args, planner: JourneyPlanner, journey_arc) -> list:
+    """Generate --candidates playlists across --workers processes; return the --top best."""
+    method = f"beam width {args.beam_width}" if args.optimize else "greedy"
+    workers = max(1, min(args.workers, args.candidates))
+    print(f"\nGenerating {args.candidates} candidate playlists ({method}, {workers} workers)...")
+
+    started = time.perf_counter()
+    candidates = generate_candidates(
+        planner.library,
+        journey_arc,
+        args.candidates,
+        workers=workers,
+        seed=args.seed if args.seed is not None else 0,
+        strict_key=args.strict_key,
+        prefer_labels=True,
+        optimize=args.optimize,
+        beam_width=args.beam_width
+    )
+    elapsed = time.perf_counter() - started
+
+    summary = score_summary(candidates)
+    print(f"✓ {len(candidates)} candidates in {elapsed:.2f}s ({len(candidates) / elapsed:.1f}/s)")
+    print(f"  Scores: min {summary['min']:.0f} | Q1 {summary['q1']:.0f} | "
+          f"median {summary['median']:.0f} | Q3 {summary['q3']:.0f} | "
+          f"max {summary['max']:.0f} (mean {summary['mean']:.0f})")
+
+    top = candidates[:max(1, args.top)]
+    for rank, candidate in enumerate(top, 1):
+        print(f"  #{rank}: seed {candidate.seed}, score {candidate.score:.0f}, "
+              f"{len(candidate.file_paths)} tracks")
+
+    return [candidate_playlist(planner, journey_arc, c) for c in top]
+
+
+def open_optional_library(args) -> TrackLibrary:
+    """The -l/--library library, or an empty one if none was given."""
+    if not args.library:
+        return TrackLibrary()
+    library_path = Path(args.library)
+    if not library_path.exists():
+        print(f"Error: Library not found: {library_path}")
+        sys.exit(1)
+    library = load_library(library_path, args.storage)
+    print(f"✓ Loaded {len(library.tracks)} tracks from {library_path}")
+    return library
+
+
+def read_playlist(source: Path, library: TrackLibrary, args) -> Tuple[str, List[TrackMetadata], JourneyArc]:
+    """
+    Read a playlist JSON or M3U, with the journey arc to judge it against.
+
+    The arc is the one saved with the playlist; M3U files get one spanning
+    their tracks. --progression replaces its energy curve and --blend its
+    blend duration.
+    """
+    if not source.exists():
+        print(f"Error: Playlist not found: {source}")
+        sys.exit(1)
+    try:
+        with stage("read playlist"):
+            loaded = load_playlist(source, library if args.library else None)
+    except ValueError as e:
+        print(f"Error: {e} (use -l/--library)")
+        sys.exit(1)
+    print(f"✓ Read {len(loaded.tracks)} tracks from {source}")
+    if loaded.missing:
+        print(f"⚠ {len(loaded.missing)} entries not in the library, left out:")
+        for path in loaded.missing[:5]:
+            print(f"    {path}")
+        if len(loaded.missing) > 5:
+            print(f"    ... and {len(loaded.missing) - 5} more")
+
+    return loaded.name, loaded.tracks, playlist_arc(loaded, args.progression, args.blend)
+
+
+def reorder_playlist(args):
+    """Reorder an existing playlist (JSON or M3U) to minimise the chosen objectives."""
+    source = Path(args.playlist)
+    try:
+        weights = parse_objectives(args.objective)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    library = open_optional_library(args)
+    _, tracks, arc = read_playlist(source, library, args)
+    if len(tracks) < 2:
+        print("Error: Nothing to reorder")
+        sys.exit(1)
+    planner = JourneyPlanner(library)
+
+    # The arc's curve stretched over the tracks: one target per slot
+    curve = resample_curve(arc.energy_curve, len(tracks))
+    arc = dataclasses.replace(arc, energy_curve=curve, num_tracks=len(tracks))
+
+    reorderer = PlaylistReorderer(
+        weights,
+        time_budget=args.time_budget,
+        iterations=args.iterations,
+        seed=args.seed
+    )
+    run = f"{args.iterations} moves" if args.iterations else f"{args.time_budget:g}s"
+    objectives = ', '.join(f"{name}×{weight:g}" for name, weight in weights.items())
+    print(f"\nAnnealing {len(tracks)} tracks ({objectives}; {run})...")
+    with stage("anneal"):
+        result = reorderer.reorder(tracks, curve)
+    print(f"✓ {result.moves:,} moves in {result.elapsed:.2f}s "
+          f"({result.moves / result.elapsed:,.0f}/s, {result.accepted:,} accepted)")
+
+    print(f"\n  {'objective':<10} {'before':>9} {'after':>9}  per transition/slot")
+    for name in weights:
+        steps = len(tracks) if OBJECTIVES[name].kind == 'position' else len(tracks) - 1
+        before, after = result.initial_breakdown[name], result.breakdown[name]
+        print(f"  {name:<10} {before:>9.1f} {after:>9.1f}  "
+              f"{before / steps:.2f} → {after / steps:.2f} ({OBJECTIVES[name].description})")
+    print(f"  {'total':<10} {result.initial_cost:>9.1f} {result.cost:>9.1f}  (weighted)")
+
+    playlist = planner.playlist_from_tracks(arc, result.tracks)
+    print(f"\n{'='*80}")
+    print(f"PLAYLIST: {playlist.name}")
+    print(f"{'='*80}\n")
+    for i, track in enumerate(playlist.tracks, 1):
+        key_str = track.key.value if track.key else "Unknown"
+        print(f"{i:2d}. {track.artist} - {track.title}")
+        print(f"    {track.bpm:.1f} BPM | {key_str} | E{track.energy_level} (target E{curve[i - 1]})")
+
+    output_path = Path(args.output) if args.output else source.with_name(f"{source.stem}-reordered")
+    with stage("export"):
+        json_path = output_path.with_suffix('.json')
+        playlist.to_json(json_path)
+        print(f"\n✓ Saved playlist to: {json_path}")
+        if args.m3u:
+            m3u_path = output_path.with_suffix('.m3u')
+            playlist.to_m3u(m3u_path)
+            print(f"✓ Saved M3U playlist to: {m3u_path}")
+
+
+# (summary key, label, format) rows of the `score` table
+SCORE_METRICS = [
+    ('tracks', 'Tracks', '{:.0f}'),
+    ('duration_minutes', 'Duration (min)', '{:.1f}'),
+    ('score_total', 'Transition score', '{:.0f}'),
+    ('score_mean', '  per transition', '{:.1f}'),
+    ('bpm_jump_mean', 'BPM jump mean (%)', '{:.2f}'),
+    ('bpm_jump_max', 'BPM jump max (%)', '{:.2f}'),
+    ('bpm_clashes', f'BPM jumps > {BPM_CLASH_PERCENT:g}%', '{:.0f}'),
+    ('key_distance_mean', 'Key distance mean', '{:.2f}'),
+    ('key_clashes', 'Non-harmonic mixes', '{:.0f}'),
+    ('keys_unknown', 'Unknown-key mixes', '{:.0f}'),
+    ('energy_deviation_mean', 'Energy off curve mean', '{:.2f}'),
+    ('energy_deviation_max', 'Energy off curve max', '{:.0f}'),
+    ('energy_off_curve', 'Tracks > ±1 off curve', '{:.0f}'),
+    ('artist_repeats', 'Artist repeats', '{:.0f}'),
+    ('loudness_delta_mean', 'Loudness step mean (dB)', '{:.2f}'),
+    ('loudness_delta_max', 'Loudness step max (dB)', '{:.2f}'),
+]
+
+
+def score_playlists(args):
+    """Evaluate one or more playlists (JSON or M3U) and compare their metrics."""
+    library = open_optional_library(args)
+
+    results = []
+    for path in args.playlists:
+        _, tracks, arc = read_playlist(Path(path), library, args)
+        with stage("evaluate"):
+            evaluation = PlaylistEvaluator(tracks).evaluate(
+                arc, timed=args.timed, artist_window=args.artist_window)
+        results.append((Path(path), evaluation))
+
+    width = min(24, max(12, *(len(p.stem) for p, _ in results)))
+    print(f"\n{'Metric':<24}" + ''.join(f" {p.stem[-width:]:>{width}}" for p, _ in results))
+    print('-' * (24 + (width + 1) * len(results)))
+    summaries = [evaluation.summary() for _, evaluation in results]
+    for key, label, fmt in SCORE_METRICS:
+        cells = ['—' if math.isnan(s[key]) else fmt.format(s[key]) for s in summaries]
+        print(f"{label:<24}" + ''.join(f" {cell:>{width}}" for cell in cells))
+
+    if args.transitions:
+        for path, evaluation in results:
+            print(f"\n{path.name}")
+            print(f"  {'#':>3}  {'score':>5}  {'BPM %':>6}  {'keys':>4}  {'E step':>6}  {'E off':>5}  {'dB':>5}  to")
+            for i, row in enumerate(evaluation.transition_rows(), 2):
+                cells = [
+                    f"{row['bpm_jump']:.1f}" if row['bpm_jump'] is not None else '—',
+                    f"{row['key_distance']:.0f}" if row['key_distance'] is not None else '—',
+                    f"{row['loudness_delta']:.1f}" if row['loudness_delta'] is not None else '—',
+                ]
+                repeat = ' (artist repeat)' if row['artist_repeat'] else ''
+                print(f"  {i:>3}  {row['score']:>5.0f}  {cells[0]:>6}  {cells[1]:>4}  "
+                      f"{row['energy_step']:>+6d}  {row['energy_deviation']:>5d}  {cells[2]:>5}  "
+                      f"{row['to']}{repeat}")
+
+    if args.json:
+        report = {
+            str(path): {
+                'summary': {k: None if isinstance(v, float) and math.isnan(v) else v
+                            for k, v in evaluation.summary().items()},
+                'transitions': evaluation.transition_rows(),
+            }
+            for path, evaluation in results
+        }
+        with stage("export"), open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Saved scores to: {args.json}")
+
+
+def find_bridge_tracks(args):
+    """Find bridge tracks between two harmonically distant tracks."""
+    library_path = Path(args.library)
+    if not library_path.exists():
+        print(f"Error: Library not found: {library_path}")
+        sys.exit(1)
+    library = load_library(library_path, args.storage)
+    print(f"✓ Loaded {len(library.tracks)} tracks")
+
+    ends = []
+    for text in (args.source, args.target):
+        matches = library.search(text)
+        if not matches:
+            print(f"Error: No track matches: {text}")
+            sys.exit(1)
+        if len(matches) > 1:
+            print(f"⚠ {len(matches)} tracks match {text!r}; using the first")
+        ends.append(matches[0])
+    track_a, track_b = ends
+    if not (track_a.key and track_b.key):
+        print("Error: Both tracks need a key")
+        sys.exit(1)
+
+    steps = camelot_distance(track_a.key, track_b.key)
+    print(f"\n{track_a.key.value} → {track_b.key.value}: {steps} Camelot step(s)")
+    if steps <= 1:
+        print("✓ Already a harmonic mix; no bridge needed")
+        return
+
+    started = time.perf_counter()
+    bridge = JourneyPlanner(library).find_bridge(track_a, track_b, max_bridges=args.max_bridges)
+    elapsed = time.perf_counter() - started
+    if not bridge:
+        print(f"✗ No chain of at most {args.max_bridges} bridge tracks "
+              f"(needs {steps - 1}; try --max-bridges)")
+        sys.exit(1)
+
+    print(f"✓ {len(bridge)} bridge track(s) in {elapsed * 1000:.1f}ms\n")
+    for i, track in enumerate([track_a] + bridge + [track_b], 1):
+        print(f"{i:2d}. {track.artist} - {track.title}")
+        print(f"    {track.bpm:.1f} BPM | {track.key.value} | E{track.energy_level}")
 
-    # Save JSON
-    json_path = output_path.with_suffix('.json')
-    playlist.to_json(json_path)
-    print(f"✓ Saved playlist to: {json_path}")
 
-    # Save M3U
-    if args.m3u:
-        m3u_path = output_path.with_suffix('.m3u')
-        playlist.to_m3u(m3u_path)
-        print(f"✓ Saved M3U playlist to: {m3u_path}")
+def list_compatible_tracks(args):
+    """List tracks that mix with a track (BPM straight, double or half time; optionally key)."""
+    library_path = Path(args.library)
+    if not library_path.exists():
+        print(f"Error: Library not found: {library_path}")
+        sys.exit(1)
+    library = load_library(library_path, args.storage)
+
+    matches = library.search(args.track)
+    if not matches:
+        print(f"Error: No track matches: {args.track}")
+        sys.exit(1)
+    if len(matches) > 1:
+        print(f"⚠ {len(matches)} tracks match {args.track!r}; using the first")
+    track = matches[0]
+    key_str = track.key.value if track.key else "?"
+    print(f"{track.artist} - {track.title} ({track.bpm:.1f} BPM | {key_str} | E{track.energy_level})")
+
+    compatible = library.get_compatible_tracks(track, bpm_tolerance=args.tolerance,
+                                               key_compatible_only=args.strict_key)
+    if args.energy:
+        compatible = [t for t in compatible if abs(t.energy_level - args.energy) <= 1]
+
+    print(f"\nFound {len(compatible)} compatible tracks:\n")
+    for candidate in compatible[:args.limit]:
+        key_str = candidate.key.value if candidate.key else "?"
+        steps = camelot_distance(track.key, candidate.key) if track.key and candidate.key else None
+        steps_str = f" ({steps} step{'' if steps == 1 else 's'})" if steps is not None else ""
+        print(f"{candidate.artist} - {candidate.title}")
+        print(f"  {candidate.bpm:.1f} BPM | {key_str}{steps_str} | E{candidate.energy_level}")
+        print()
+
+
+def serve_libraries(args):
+    """Keep libraries loaded and answer commands and queries over HTTP on localhost."""
+    from .server import serve
+    preload = [Path(p) for p in args.library]
+    for path in preload:
+        if not path.exists():
+            print(f"Error: Library not found: {path}")
+            sys.exit(1)
+    server = serve(preload, host=args.host, port=args.port, storage=args.storage,
+                   watch_interval=args.watch_interval)
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        print("\n✓ Server stopped")
+    finally:
+        server.server_close()
 
 
 def list_tracks(args):
@@ -158,23 +642,20 @@ def list_tracks(args):
         print(f"Error: Library not found: {library_path}")
         sys.exit(1)
 
-    library = TrackLibrary(library_path)
+    library = load_library(library_path, args.storage)
 
     # Apply filters
     tracks = library.tracks
 
     if args.bpm:
-        min_bpm = args.bpm - 2
-        max_bpm = args.bpm + 2
-        tracks = [t for t in tracks if min_bpm <= t.bpm <= max_bpm]
+        tracks = library.find_tracks_by_bpm_range(args.bpm - 2, args.bpm + 2)
 
     if args.key:
-        try:
-            key = MusicalKey(args.key)
-            tracks = [t for t in tracks if t.key == key]
-        except ValueError:
+        key = parse_key(args.key)
+        if key is None:
             print(f"Error: Invalid key: {args.key}")
             sys.exit(1)
+        tracks = [t for t in tracks if t.key == key]
 
     if args.energy:
         tracks = [t for t in tracks if abs(t.energy_level - args.energy) <= 1]
@@ -189,29 +670,173 @@ def list_tracks(args):
         print()
 
 
-def main():
+def classify_tracks(args):
+    """Classify energy and textures from audio and write them into the library."""
+    library_path = Path(args.library)
+
+    if not library_path.exists():
+        print(f"Error: Library not found: {library_path}")
+        sys.exit(1)
+
+    library = TrackLibrary(library_path, storage=args.storage)
+    cache_path = Path(args.cache) if args.cache else features_path_for(library_path)
+    print(f"Classifying {len(library.tracks)} tracks ({args.workers} workers, cache: {cache_path})")
+
+    try:
+        result = classify_library(library, cache_path=cache_path, workers=args.workers,
+                                  force=args.force, limit=args.limit)
+    except KeyboardInterrupt:
+        print(f"\n⚠ Interrupted: features analysed so far are cached in {cache_path}; "
+              f"run again to continue")
+        sys.exit(1)
+
+    print(f"✓ {result.analysed} analysed, {result.cached} from cache in {result.elapsed:.1f}s; "
+          f"{result.updated} tracks updated")
+    if result.failures:
+        print(f"⚠ Could not analyse {len(result.failures)} files:")
+        for path, error in result.failures[:10]:
+            print(f"  {path}: {error}")
+        if len(result.failures) > 10:
+            print(f"  ... and {len(result.failures) - 10} more")
+
+    if result.updated:
+        library.save()
+        print(f"✓ Library saved to: {library_path}")
+
+    energies = [t.energy_level for t in library.tracks]
+    print("\nEnergy: " + "  ".join(f"{level}: {energies.count(level)}" for level in range(1, 11)))
+    textures = {}
+    for track in library.tracks:
+        for texture in track.textures:
+            textures[texture.value] = textures.get(texture.value, 0) + 1
+    if textures:
+        print("Textures: " + ", ".join(f"{name} {count}" for name, count in
+                                      sorted(textures.items(), key=lambda x: -x[1])))
+
+
+def convert_library(args):
+    """Convert a library between JSON, binary (.tlib) and SQLite (.db) formats."""
+    source = Path(args.source)
+    destination = Path(args.destination)
+
+    if not source.exists():
+        print(f"Error: Library not found: {source}")
+        sys.exit(1)
+
+    # Columnar storage carries rows across without building TrackMetadata
+    library = TrackLibrary(source, storage='columnar')
+    library.save(destination)
+
+    size_before = source.stat().st_size / 1024 / 1024
+    size_after = destination.stat().st_size / 1024 / 1024
+    print(f"✓ Converted {len(library.tracks)} tracks: {source} ({size_before:.1f} MB) "
+          f"→ {destination} ({size_after:.1f} MB)")
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """The --profile options, for commands instrumented with profiling.stage()."""
+    parser.add_argument('--profile', action='store_true',
+                        help='Print wall time and memory allocated per stage')
+    parser.add_argument('--profile-no-alloc', action='store_true',
+                        help='Time stages without tracing allocations, which slows '
+                             'Python-heavy stages (implies --profile)')
+    parser.add_argument('--profile-pstats', metavar='FILE',
+                        help='Also write cProfile statistics to FILE (implies --profile)')
+    parser.add_argument('--profile-trace', metavar='FILE',
+                        help='Also write the stages as Chrome trace JSON to FILE (implies --profile)')
+
+
+def profile_command(args):
+    """Run a command under StageProfiler, then print its stages and write the requested files."""
+    with StageProfiler(trace_allocations=not args.profile_no_alloc,
+                       cprofile=bool(args.profile_pstats)) as profiler:
+        run_command(args)
+
+    print(f"\n{'='*80}")
+    print(f"PROFILE: {args.command}")
+    print(f"{'='*80}\n")
+    print(profiler.format_summary())
+    if args.profile_pstats or args.profile_trace:
+        print()
+    if args.profile_pstats:
+        profiler.write_pstats(Path(args.profile_pstats))
+        print(f"✓ Saved cProfile statistics to: {args.profile_pstats} "
+              f"(python3 -m pstats {args.profile_pstats})")
+    if args.profile_trace:
+        profiler.write_trace(Path(args.profile_trace))
+        print(f"✓ Saved Chrome trace to: {args.profile_trace} "
+              f"(open in chrome://tracing or ui.perfetto.dev)")
+
+
+def run_command(args):
+    """Run the parsed command."""
+    if args.command == 'create':
+        create_library(args)
+    elif args.command == 'import-nml':
+        import_nml(args)
+    elif args.command == 'stats':
+        show_stats(args)
+    elif args.command == 'generate':
+        generate_playlist(args)
+    elif args.command == 'reorder':
+        reorder_playlist(args)
+    elif args.command == 'score':
+        score_playlists(args)
+    elif args.command == 'bridge':
+        find_bridge_tracks(args)
+    elif args.command == 'compatible':
+        list_compatible_tracks(args)
+    elif args.command == 'list':
+        list_tracks(args)
+    elif args.command == 'classify':
+        classify_tracks(args)
+    elif args.command == 'serve':
+        serve_libraries(args)
+    elif args.command == 'convert':
+        convert_library(args)
+
+
+def main(argv: Optional[List[str]] = None):
     """Main CLI entry point."""
     parser = argparse.ArgumentParser(
         description="Track Selection Engine - Intelligent DJ playlist generation"
     )
+    parser.add_argument('--no-server', action='store_true',
+                        help='Run here even if a `track-selector serve` server is running')
 
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
 
     # Create library command
-    create_parser = subparsers.add_parser('create', help='Create a new track library')
+    create_parser = subparsers.add_parser('create', help='Create or update a track library from a directory')
     create_parser.add_argument('directory', help='Directory to scan for audio files')
     create_parser.add_argument('-l', '--library', default='library.json', help='Library file path')
+    create_parser.add_argument('--full', action='store_true',
+                          help='Rebuild from scratch instead of updating an existing library')
+    create_parser.add_argument('--workers', type=int, default=SCAN_WORKERS_DEFAULT,
+                          help=f'Threads reading tags (default: {SCAN_WORKERS_DEFAULT})')
+
+    # Import NML command
+    nml_parser = subparsers.add_parser('import-nml', help="Create or update a track library from Traktor's collection.nml")
+    nml_parser.add_argument('nml', nargs='?', default=str(NML_DEFAULT),
+                          help=f'Path to collection.nml (default: {NML_DEFAULT})')
+    nml_parser.add_argument('-l', '--library', default='library.json', help='Library file path')
+    nml_parser.add_argument('--full', action='store_true',
+                          help='Rebuild from scratch instead of refreshing an existing library')
 
     # Stats command
     stats_parser = subparsers.add_parser('stats', help='Show library statistics')
     stats_parser.add_argument('-l', '--library', default='library.json', help='Library file path')
+    stats_parser.add_argument('--storage', choices=STORAGE_MODES,
+                          help='Library storage engine (default: sqlite for .db, columnar for .tlib, objects for JSON)')
+    stats_parser.add_argument('--distributions', action='store_true',
+                          help='Also show the BPM histogram and key × energy matrix')
 
     # Generate command
     gen_parser = subparsers.add_parser('generate', help='Generate a journey arc playlist')
     gen_parser.add_argument('duration', type=int, help='Duration in minutes')
     gen_parser.add_argument('-l', '--library', default='library.json', help='Library file path')
     gen_parser.add_argument('-o', '--output', default='playlist', help='Output file path')
-    gen_parser.add_argument('-k', '--key', help='Key center (e.g., 1A for A Minor)')
+    gen_parser.add_argument('-k', '--key', help='Key center (e.g., 1A or 1m for A Minor)')
     gen_parser.add_argument('--min-bpm', type=float, default=118, help='Minimum BPM')
     gen_parser.add_argument('--max-bpm', type=float, default=124, help='Maximum BPM')
     gen_parser.add_argument('-p', '--progression', default='gradual_build',
@@ -220,30 +845,151 @@ def main():
     gen_parser.add_argument('-b', '--blend', type=int, default=60, help='Blend duration in seconds')
     gen_parser.add_argument('--strict-key', action='store_true', help='Only use key-compatible tracks')
     gen_parser.add_argument('--m3u', action='store_true', help='Also save as M3U playlist')
+    gen_parser.add_argument('--optimize', action='store_true',
+                            help='Beam search for the best summed transition score instead of greedy selection')
+    gen_parser.add_argument('--beam-width', type=int, default=BEAM_WIDTH_DEFAULT,
+                            help=f'Partial playlists kept per step with --optimize (default: {BEAM_WIDTH_DEFAULT})')
+    gen_parser.add_argument('--time-budget', type=float,
+                            help=f'Seconds of search with --optimize or --exact-duration (default: {TIME_BUDGET_DEFAULT:g})')
+    gen_parser.add_argument('--seed', type=int, help='Random seed, for repeatable playlists')
+    gen_parser.add_argument('--exact-duration', action='store_true',
+                            help='Plan to the duration using real track lengths and blends (branch and bound)')
+    gen_parser.add_argument('--tolerance', type=float,
+                            help=f'Seconds either side of the duration with --exact-duration (default: {DURATION_TOLERANCE_DEFAULT:g})')
+    gen_parser.add_argument('--artist-window', type=int,
+                            help=f'No artist twice within this many tracks with --exact-duration (default: {ARTIST_WINDOW_DEFAULT})')
+    gen_parser.add_argument('--max-per-label', type=int,
+                            help='Most tracks from one label with --exact-duration')
+    gen_parser.add_argument('--min-preferred', type=int,
+                            help='Fewest tracks from the preferred labels with --exact-duration (default: 0)')
+    gen_parser.add_argument('--candidates', type=int, default=1,
+                            help='Generate this many playlists (seeds --seed, --seed+1, ...) and keep the best-scoring')
+    gen_parser.add_argument('--workers', type=int,
+                            help=f'Processes generating --candidates (default: {CANDIDATE_WORKERS_DEFAULT})')
+    gen_parser.add_argument('--top', type=int,
+                            help='With --candidates, also save the next best as <output>-2, <output>-3, ... (default: 1)')
+    gen_parser.add_argument('--storage', choices=STORAGE_MODES,
+                          help='Library storage engine (default: sqlite for .db, columnar for .tlib, objects for JSON)')
+    add_profile_arguments(gen_parser)
+
+    # Reorder command
+    reorder_parser = subparsers.add_parser('reorder', help='Reorder an existing playlist (JSON or M3U) by simulated annealing')
+    reorder_parser.add_argument('playlist', help='Playlist JSON (from generate) or .m3u/.m3u8 file')
+    reorder_parser.add_argument('-l', '--library', help='Library to read tracks from (required for M3U)')
+    reorder_parser.add_argument('-o', '--output', help='Output file path (default: <playlist>-reordered)')
+    reorder_parser.add_argument('--objective', default=OBJECTIVES_DEFAULT,
+                                help=f'Weighted objectives to minimise, from {", ".join(OBJECTIVES)} '
+                                     f'(default: {OBJECTIVES_DEFAULT})')
+    reorder_parser.add_argument('-p', '--progression',
+                                choices=['gradual_build', 'peak_and_descent', 'steady'],
+                                help="Energy curve to fit (default: the playlist's own, else gradual_build)")
+    reorder_parser.add_argument('-b', '--blend', type=int, help='Blend duration in seconds for the saved transitions')
+    reorder_parser.add_argument('--time-budget', type=float, default=REORDER_BUDGET_DEFAULT,
+                                help=f'Seconds of annealing (default: {REORDER_BUDGET_DEFAULT:g})')
+    reorder_parser.add_argument('--iterations', type=int,
+                                help='Moves to try instead of a time budget (repeatable with --seed)')
+    reorder_parser.add_argument('--seed', type=int, help='Random seed')
+    reorder_parser.add_argument('--m3u', action='store_true', help='Also save as M3U playlist')
+    reorder_parser.add_argument('--storage', choices=STORAGE_MODES,
+                          help='Library storage engine (default: sqlite for .db, columnar for .tlib, objects for JSON)')
+    add_profile_arguments(reorder_parser)
+
+    # Score command
+    score_parser = subparsers.add_parser('score', help='Evaluate playlists (JSON or M3U): BPM, key, energy, artist and loudness metrics')
+    score_parser.add_argument('playlists', nargs='+', help='Playlist JSON or .m3u/.m3u8 files; several are compared side by side')
+    score_parser.add_argument('-l', '--library', help='Library to read tracks from (required for M3U)')
+    score_parser.add_argument('-p', '--progression',
+                              choices=['gradual_build', 'peak_and_descent', 'steady'],
+                              help="Energy curve to judge against (default: the playlist's own, else gradual_build)")
+    score_parser.add_argument('-b', '--blend', type=int, help='Blend duration in seconds (default: the playlist\'s, else 60)')
+    score_parser.add_argument('--timed', action='store_true',
+                              help='Target energy by start time in the set instead of by slot')
+    score_parser.add_argument('--artist-window', type=int, default=ARTIST_WINDOW_DEFAULT,
+                              help=f'Count an artist repeat within this many tracks (default: {ARTIST_WINDOW_DEFAULT})')
+    score_parser.add_argument('--transitions', action='store_true', help='Also show every transition')
+    score_parser.add_argument('--json', help='Write the metrics to this JSON file')
+    score_parser.add_argument('--storage', choices=STORAGE_MODES,
+                          help='Library storage engine (default: sqlite for .db, columnar for .tlib, objects for JSON)')
+    add_profile_arguments(score_parser)
+
+    # Bridge command
+    bridge_parser = subparsers.add_parser('bridge', help='Find bridge tracks between two harmonically distant tracks')
+    bridge_parser.add_argument('source', help='Outgoing track (words from its title, artist or label)')
+    bridge_parser.add_argument('target', help='Track to arrive at (words from its title, artist or label)')
+    bridge_parser.add_argument('-l', '--library', default='library.json', help='Library file path')
+    bridge_parser.add_argument('--max-bridges', type=int, default=MAX_BRIDGES_DEFAULT,
+                               help=f'Most tracks to insert (default: {MAX_BRIDGES_DEFAULT})')
+    bridge_parser.add_argument('--storage', choices=STORAGE_MODES,
+                          help='Library storage engine (default: sqlite for .db, columnar for .tlib, objects for JSON)')
+
+    # Compatible command
+    compatible_parser = subparsers.add_parser('compatible', help='List tracks that mix with a track (BPM and, optionally, key)')
+    compatible_parser.add_argument('track', help='Track (words from its title, artist or label)')
+    compatible_parser.add_argument('-l', '--library', default='library.json', help='Library file path')
+    compatible_parser.add_argument('--strict-key', action='store_true', help='Only tracks in compatible keys')
+    compatible_parser.add_argument('--tolerance', type=float, default=6.0,
+                                   help='BPM tolerance in %% (default: 6)')
+    compatible_parser.add_argument('--energy', type=int, help='Filter by energy level (±1)')
+    compatible_parser.add_argument('--limit', type=int, default=20, help='Max tracks to show')
+    compatible_parser.add_argument('--storage', choices=STORAGE_MODES,
+                          help='Library storage engine (default: sqlite for .db, columnar for .tlib, objects for JSON)')
 
     # List command
     list_parser = subparsers.add_parser('list', help='List tracks in library')
     list_parser.add_argument('-l', '--library', default='library.json', help='Library file path')
     list_parser.add_argument('--bpm', type=float, help='Filter by BPM (±2)')
-    list_parser.add_argument('--key', help='Filter by key (e.g., 1A)')
+    list_parser.add_argument('--key', help='Filter by key (e.g., 1A or 1m)')
     list_parser.add_argument('--energy', type=int, help='Filter by energy level (±1)')
     list_parser.add_argument('--limit', type=int, default=20, help='Max tracks to show')
-
-    args = parser.parse_args()
+    list_parser.add_argument('--storage', choices=STORAGE_MODES,
+                          help='Library storage engine (default: sqlite for .db, columnar for .tlib, objects for JSON)')
+
+    # Classify command
+    classify_parser = subparsers.add_parser('classify', help='Classify energy and textures from audio (RMS, spectral balance, onsets)')
+    classify_parser.add_argument('-l', '--library', default='library.json', help='Library file path')
+    classify_parser.add_argument('--workers', type=int, default=CLASSIFY_WORKERS_DEFAULT,
+                                 help=f'Worker processes (default: {CLASSIFY_WORKERS_DEFAULT})')
+    classify_parser.add_argument('--cache',
+                                 help='Feature cache file (default: <library>.features.jsonl)')
+    classify_parser.add_argument('--force', action='store_true',
+                                 help='Re-analyse files even if their features are cached')
+    classify_parser.add_argument('--limit', type=int,
+                                 help='Analyse at most this many uncached files this run')
+    classify_parser.add_argument('--storage', choices=STORAGE_MODES,
+                          help='Library storage engine (default: sqlite for .db, columnar for .tlib, objects for JSON)')
+
+    # Serve command
+    serve_parser = subparsers.add_parser('serve', help='Keep libraries loaded and answer commands over HTTP on localhost')
+    serve_parser.add_argument('-l', '--library', action='append', default=[],
+                              help='Library to load at startup (repeatable; others load on first use)')
+    serve_parser.add_argument('--host', default=SERVER_HOST, help=f'Address to bind (default: {SERVER_HOST})')
+    serve_parser.add_argument('--port', type=int, default=SERVER_PORT_DEFAULT,
+                              help=f'Port (default: {SERVER_PORT_DEFAULT})')
+    serve_parser.add_argument('--watch-interval', type=float, default=WATCH_INTERVAL_DEFAULT,
+                              help=f'Seconds between library file checks (default: {WATCH_INTERVAL_DEFAULT:g})')
+    serve_parser.add_argument('--storage', choices=STORAGE_MODES,
+                          help='Library storage engine (default: sqlite for .db, columnar for .tlib, objects for JSON)')
+
+    # Convert command
+    convert_parser = subparsers.add_parser('convert', help='Convert a library between JSON, binary (.tlib) and SQLite (.db)')
+    convert_parser.add_argument('source', help='Library to read (.json, .tlib or .db)')
+    convert_parser.add_argument('destination', help='Library to write (.tlib for binary, .db for SQLite, otherwise JSON)')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        check_generate_options(gen_parser, args)
 
     if not args.command:
         parser.print_help()
         sys.exit(1)
 
     # Execute command
-    if args.command == 'create':
-        create_library(args)
-    elif args.command == 'stats':
-        show_stats(args)
-    elif args.command == 'generate':
-        generate_playlist(args)
-    elif args.command == 'list':
-        list_tracks(args)
+    if any(getattr(args, option, None) for option in
+           ('profile', 'profile_no_alloc', 'profile_pstats', 'profile_trace')):
+        profile_command(args)
+    else:
+        run_command(args)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,106 @@
+"""`track-selector` entry point: hands commands to a running server if there is one.
+
+Loading the full CLI (pandas, NumPy, every planner module) and then the
+library takes most of a command's run time. This module only uses the
+standard library, so it can check for a `track-selector serve` server and
+forward the command to it first: the server runs it against its resident
+library, in this command's working directory, and sends back the output
+and exit code. With no server, the command runs here as before.
+"""
+
+import http.client
+import json
+import os
+import sys
+from typing import List, Optional, Tuple
+
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT_DEFAULT = 7390
+WATCH_INTERVAL_DEFAULT = 1.0    # seconds between library file checks
+
+# "host:port" of the server to use, or "off" to always run locally
+SERVER_ENV = 'TRACK_SELECTOR_SERVER'
+
+# Commands that only read a library, so a server can answer them
+SERVED_COMMANDS = ('stats', 'list', 'compatible', 'generate', 'score', 'reorder', 'bridge')
+
+CONNECT_TIMEOUT = 0.2   # seconds; a closed port refuses at once
+
+
+def server_address() -> Optional[Tuple[str, int]]:
+    """(host, port) from TRACK_SELECTOR_SERVER, or the default; None if it is "off"."""
+    setting = os.environ.get(SERVER_ENV, '').strip()
+    if setting.lower() in ('off', 'no', '0'):
+        return None
+    if not setting:
+        return SERVER_HOST, SERVER_PORT_DEFAULT
+    host, _, port = setting.rpartition(':')
+    return host or SERVER_HOST, int(port)
+
+
+def request(address: Tuple[str, int], method: str, path: str,
+            body: Optional[dict] = None) -> Optional[dict]:
+    """
+    JSON request to the server.
+
+    Returns:
+        The decoded response, or None if no server is listening (or
+        what's listening isn't one)
+    """
+    connection = http.client.HTTPConnection(*address, timeout=CONNECT_TIMEOUT)
+    try:
+        connection.connect()
+    except OSError:
+        return None
+    # Connected: generation can take a while, so no timeout from here on
+    connection.sock.settimeout(None)
+    try:
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        connection.request(method, path, body=payload, headers=headers)
+        response = connection.getresponse()
+        return json.loads(response.read())
+    except (OSError, http.client.HTTPException, ValueError):
+        return None
+    finally:
+        connection.close()
+
+
+def run_remote(argv: List[str], address: Tuple[str, int]) -> Optional[int]:
+    """
+    Run a command on the server, writing its output here.
+
+    Returns:
+        The command's exit code, or None if no server is listening
+    """
+    result = request(address, 'POST', '/run', {'argv': argv, 'cwd': os.getcwd()})
+    if result is None:
+        return None
+    sys.stdout.write(result.get('stdout', ''))
+    sys.stderr.write(result.get('stderr', ''))
+    if 'error' in result:
+        sys.stderr.write(f"Error: {result['error']}\n")
+        return 1
+    return result.get('exit_code', 0)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Entry point: forward served commands to a running server, else run the CLI."""
+    argv = sys.argv[1:] if argv is None else argv
+    command = next((a for a in argv if not a.startswith('-')), None)
+    if (command in SERVED_COMMANDS and '--no-server' not in argv
+            and not {'-h', '--help'} & set(argv)):
+        address = server_address()
+        if address is not None:
+            exit_code = run_remote(argv, address)
+            if exit_code is not None:
+                sys.exit(exit_code)
+
+    # --no-server may come after the subcommand, where the CLI parser
+    # doesn't accept it; it has done its job here
+    from .cli import main as cli_main
+    cli_main([a for a in argv if a != '--no-server'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,406 @@
+"""Columnar (NumPy) storage engine for large track libraries."""
+
+import json
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .models import (
+    TrackMetadata, MusicalKey, TextureType, JourneyPosition,
+    TEXTURE_BITS, textures_to_mask, mask_to_textures
+)
+from .stats import LibraryStats
+
+
+# Integer codes for enum columns (-1 = missing)
+MISSING = -1
+KEYS: List[MusicalKey] = list(MusicalKey)
+KEY_CODES: Dict[str, int] = {k.value: i for i, k in enumerate(KEYS)}
+POSITIONS: List[JourneyPosition] = list(JourneyPosition)
+POSITION_CODES: Dict[str, int] = {p.value: i for i, p in enumerate(POSITIONS)}
+TEXTURE_VALUE_BITS: Dict[str, int] = {t.value: bit for t, bit in TEXTURE_BITS.items()}
+
+# Numeric columns and their dtypes. year 0 = unknown.
+COLUMN_DTYPES = {
+    'bpm': np.float64,
+    'energy_level': np.int8,
+    'key_code': np.int8,
+    'duration': np.float64,
+    'year': np.int16,
+    'texture_mask': np.uint16,
+    'position_code': np.int8,
+    'label_code': np.int32,
+    'artist_code': np.int32,
+}
+
+
+def _value_counts(values: np.ndarray) -> Dict[int, int]:
+    """Occurrences of each value in an integer array."""
+    unique, counts = np.unique(values, return_counts=True)
+    return dict(zip(unique.tolist(), counts.tolist()))
+
+
+class CategoryCodes:
+    """String ↔ integer code mapping for a categorical column."""
+
+    def __init__(self, categories: Optional[List[str]] = None):
+        self.categories: List[str] = list(categories or [])
+        self._codes: Dict[str, int] = {value: i for i, value in enumerate(self.categories)}
+
+    def code(self, value: Optional[str]) -> int:
+        """Code for a value, adding it as a new category if unseen."""
+        if not value:
+            return MISSING
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.categories)
+            self._codes[value] = code
+            self.categories.append(value)
+        return code
+
+    def codes_containing(self, text: str) -> List[int]:
+        """Codes of categories containing text (case-insensitive)."""
+        text = text.lower()
+        return [i for i, value in enumerate(self.categories) if text in value.lower()]
+
+
+class ColumnarTrackStore:
+    """
+    Track library columns held in NumPy arrays.
+
+    Filters run as vectorised masks over the columns and return row
+    positions. TrackMetadata objects are only built (and then cached) for
+    the rows a caller actually reads via track().
+
+    Columns are filled when a track is added; edits made to a materialised
+    TrackMetadata are saved, but the columns only pick them up on reload.
+    """
+
+    def __init__(self):
+        self._size = 0
+        self._columns = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+        self.file_paths: List[str] = []
+        self.titles: List[str] = []
+        self.labels = CategoryCodes()
+        self.artists = CategoryCodes()
+
+        # Per row: the source dict until the track is materialised, then the track.
+        # Rows read from a binary library stay encoded (None in both) until accessed.
+        self._rows: List[Optional[dict]] = []
+        self._tracks: List[Optional[TrackMetadata]] = []
+        self._row_offsets: Optional[np.ndarray] = None
+        self._row_data: bytes = b''
+        # Set when encoded rows only hold what the columns and this
+        # template (default to_dict() values) don't
+        self._row_template: Optional[dict] = None
+
+        # Stable BPM sort order, rebuilt lazily after appends
+        self._bpm_order: Optional[np.ndarray] = None
+        self._bpm_sorted: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_arrays(
+        cls,
+        columns: Dict[str, np.ndarray],
+        file_paths: List[str],
+        titles: List[str],
+        label_categories: List[str],
+        artist_categories: List[str],
+        row_offsets: np.ndarray,
+        row_data: bytes,
+        row_template: Optional[dict] = None
+    ) -> 'ColumnarTrackStore':
+        """
+        Build a store from saved columns and JSON-encoded rows (see binary_library).
+
+        Row i is the JSON in row_data[row_offsets[i]:row_offsets[i + 1]]; it is
+        only decoded when the track is first accessed. With a row_template,
+        the JSON holds only the fields that differ from column_fields() and
+        the template (an empty slice: none differ).
+        """
+        store = cls()
+        store._columns = {
+            name: np.asarray(columns[name], dtype=dtype) for name, dtype in COLUMN_DTYPES.items()
+        }
+        store._size = len(file_paths)
+        store.file_paths = file_paths
+        store.titles = titles
+        store.labels = CategoryCodes(label_categories)
+        store.artists = CategoryCodes(artist_categories)
+        store._rows = [None] * store._size
+        store._tracks = [None] * store._size
+        store._row_offsets = row_offsets
+        store._row_data = row_data
+        store._row_template = row_template
+        return store
+
+    def __len__(self) -> int:
+        return self._size
+
+    def column(self, name: str) -> np.ndarray:
+        """View of a numeric column (no copy)."""
+        return self._columns[name][:self._size]
+
+    # ── Building ──────────────────────────────────────────────────────────────
+
+    def _reserve(self, extra: int) -> None:
+        """Grow every column to hold `extra` more rows (capacity doubling)."""
+        needed = self._size + extra
+        capacity = len(self._columns['bpm'])
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 64)
+        for name, array in self._columns.items():
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            self._columns[name] = grown
+
+    def _append_values(self, values: Dict[str, list]) -> None:
+        count = len(values['bpm'])
+        self._reserve(count)
+        start, end = self._size, self._size + count
+        for name, column_values in values.items():
+            self._columns[name][start:end] = column_values
+        self._size = end
+        self._bpm_order = None
+        self._bpm_sorted = None
+
+    def append_rows(self, rows: Iterable[dict]) -> None:
+        """
+        Append tracks in TrackMetadata.to_dict() form without materialising them.
+
+        Args:
+            rows: Track dicts, e.g. the 'tracks' list of a library JSON file
+        """
+        rows = list(rows)
+        values = {name: [] for name in COLUMN_DTYPES}
+        for row in rows:
+            values['bpm'].append(row['bpm'])
+            values['energy_level'].append(row.get('energy_level', 5))
+            values['key_code'].append(KEY_CODES.get(row.get('key'), MISSING))
+            values['duration'].append(row.get('duration') or 0.0)
+            values['year'].append(row.get('year') or 0)
+            values['texture_mask'].append(
+                sum(TEXTURE_VALUE_BITS[t] for t in set(row.get('textures', []))))
+            values['position_code'].append(POSITION_CODES.get(row.get('journey_position'), MISSING))
+            values['label_code'].append(self.labels.code(row.get('label')))
+            values['artist_code'].append(self.artists.code(row['artist']))
+            self.file_paths.append(str(row['file_path']))
+            self.titles.append(row['title'])
+
+        self._append_values(values)
+        self._rows.extend(rows)
+        self._tracks.extend([None] * len(rows))
+
+    def append_track(self, track: TrackMetadata) -> None:
+        """Append an already-built track."""
+        self._append_values({
+            'bpm': [track.bpm],
+            'energy_level': [track.energy_level],
+            'key_code': [KEY_CODES[track.key.value] if track.key else MISSING],
+            'duration': [track.duration or 0.0],
+            'year': [track.year or 0],
+            'texture_mask': [textures_to_mask(track.textures)],
+            'position_code': [POSITION_CODES[track.journey_position.value]
+                              if track.journey_position else MISSING],
+            'label_code': [self.labels.code(track.label)],
+            'artist_code': [self.artists.code(track.artist)],
+        })
+        self.file_paths.append(str(track.file_path))
+        self.titles.append(track.title)
+        self._rows.append(None)
+        self._tracks.append(track)
+
+    # ── Row access ────────────────────────────────────────────────────────────
+
+    def column_fields(self, position: int) -> dict:
+        """The to_dict() fields a row's columns hold, as far as they can tell."""
+        key_code = int(self._columns['key_code'][position])
+        position_code = int(self._columns['position_code'][position])
+        label_code = int(self._columns['label_code'][position])
+        artist_code = int(self._columns['artist_code'][position])
+        textures = mask_to_textures(int(self._columns['texture_mask'][position]))
+        return {
+            'file_path': self.file_paths[position],
+            'title': self.titles[position],
+            'artist': self.artists.categories[artist_code] if artist_code != MISSING else '',
+            'bpm': float(self._columns['bpm'][position]),
+            'key': KEYS[key_code].value if key_code != MISSING else None,
+            'duration': float(self._columns['duration'][position]),
+            'energy_level': int(self._columns['energy_level'][position]),
+            'textures': [t.value for t in textures],
+            'journey_position': (POSITIONS[position_code].value
+                                 if position_code != MISSING else None),
+            'label': self.labels.categories[label_code] if label_code != MISSING else None,
+            'year': int(self._columns['year'][position]) or None,
+        }
+
+    def _source_row(self, position: int) -> dict:
+        """The stored dict for a row that hasn't been materialised."""
+        row = self._rows[position]
+        if row is None:
+            start, end = self._row_offsets[position], self._row_offsets[position + 1]
+            if self._row_template is None:
+                return json.loads(self._row_data[start:end])
+            # Template order, with fresh lists: rows are handed out to callers
+            row = {k: list(v) if isinstance(v, list) else v for k, v in self._row_template.items()}
+            row.update(self.column_fields(position))
+            if end > start:
+                row.update(json.loads(self._row_data[start:end]))
+        return row
+
+    def track(self, position: int) -> TrackMetadata:
+        """Materialise (once) and return the track at a row position."""
+        track = self._tracks[position]
+        if track is None:
+            track = TrackMetadata.from_dict(self._source_row(position))
+            self._tracks[position] = track
+            self._rows[position] = None
+        return track
+
+    def row_dict(self, position: int) -> dict:
+        """Track at a row position in to_dict() form (no materialisation needed)."""
+        track = self._tracks[position]
+        return track.to_dict() if track is not None else self._source_row(position)
+
+    def materialised_count(self) -> int:
+        """Number of rows that have been turned into TrackMetadata objects."""
+        return sum(1 for t in self._tracks if t is not None)
+
+    # ── Vectorised filters (return row positions) ─────────────────────────────
+
+    def _sorted_bpm(self):
+        if self._bpm_order is None:
+            self._bpm_order = np.argsort(self.column('bpm'), kind='stable')
+            self._bpm_sorted = self.column('bpm')[self._bpm_order]
+        return self._bpm_order, self._bpm_sorted
+
+    def bpm_range_positions(self, min_bpm: float, max_bpm: float) -> np.ndarray:
+        """Positions with min_bpm <= bpm <= max_bpm, in BPM order."""
+        order, sorted_bpm = self._sorted_bpm()
+        lo = np.searchsorted(sorted_bpm, min_bpm, side='left')
+        hi = np.searchsorted(sorted_bpm, max_bpm, side='right')
+        return order[lo:hi]
+
+    def key_positions(self, key: MusicalKey) -> np.ndarray:
+        return np.flatnonzero(self.column('key_code') == KEY_CODES[key.value])
+
+    def energy_positions(self, energy_level: int, tolerance: int) -> np.ndarray:
+        energy = self.column('energy_level').astype(np.int16)
+        return np.flatnonzero(np.abs(energy - energy_level) <= tolerance)
+
+    def texture_positions(self, texture: TextureType) -> np.ndarray:
+        return np.flatnonzero(self.column('texture_mask') & TEXTURE_BITS[texture])
+
+    def label_positions(self, label: str) -> np.ndarray:
+        codes = self.labels.codes_containing(label)
+        return np.flatnonzero(np.isin(self.column('label_code'), codes))
+
+    def journey_position_positions(self, position: JourneyPosition) -> np.ndarray:
+        return np.flatnonzero(self.column('position_code') == POSITION_CODES[position.value])
+
+    def compatible_positions(
+        self,
+        ref_bpm: float,
+        tolerance: float,
+        allowed_keys: Optional[frozenset] = None
+    ) -> np.ndarray:
+        """
+        Positions mixable with a reference BPM at x1, x2 or x0.5 (in library order).
+
+        Args:
+            ref_bpm: Reference track BPM
+            tolerance: Tolerance as a fraction (0.06 = 6%)
+            allowed_keys: If given, only keep tracks in these keys (or with no key)
+        """
+        ratio = self.column('bpm') / ref_bpm
+        mask = (
+            (np.abs(ratio - 1.0) <= tolerance) |
+            (np.abs(ratio - 2.0) <= tolerance) |
+            (np.abs(ratio - 0.5) <= tolerance)
+        )
+        if allowed_keys is not None:
+            key_allowed = np.zeros(len(KEYS), dtype=bool)
+            key_allowed[[KEY_CODES[k.value] for k in allowed_keys]] = True
+            key_code = self.column('key_code')
+            mask &= (key_code == MISSING) | key_allowed[key_code]
+        return np.flatnonzero(mask)
+
+    # ── Analysis ──────────────────────────────────────────────────────────────
+
+    def library_stats(self) -> LibraryStats:
+        """Library aggregates from the columns (one vectorised count per histogram)."""
+        if not self._size:
+            return LibraryStats()
+        bpms = self.column('bpm')
+        energies = self.column('energy_level').astype(np.int64)
+        key_codes = self.column('key_code').astype(np.int64)
+        label_codes = self.column('label_code')
+        position_codes = self.column('position_code')
+
+        pairs, pair_counts = np.unique(np.stack([key_codes, energies]), axis=1, return_counts=True)
+        key_energy = {
+            (KEYS[k] if k != MISSING else None, e): n
+            for k, e, n in zip(pairs[0].tolist(), pairs[1].tolist(), pair_counts.tolist())
+        }
+        return LibraryStats.from_aggregates(
+            count=self._size,
+            bpm_sum=float(bpms.sum()),
+            bpm_min=float(bpms.min()),
+            bpm_max=float(bpms.max()),
+            bpm_bins=_value_counts(bpms.astype(np.int64)),
+            key_energy=key_energy,
+            label_counts={
+                self.labels.categories[code]: n
+                for code, n in _value_counts(label_codes[label_codes != MISSING]).items()
+            },
+            position_counts={
+                POSITIONS[code] if code != MISSING else None: n
+                for code, n in _value_counts(position_codes).items()
+            },
+        )
+
+    def dataframe(self) -> pd.DataFrame:
+        """
+        Library as a DataFrame built straight from the columns.
+
+        Numeric columns are views of the arrays; key, artist, label and
+        journey_position are categoricals over the stored codes, year is a
+        nullable integer and textures come as the texture_mask bitmask.
+        """
+        year = self.column('year')
+        return pd.DataFrame({
+            'file_path': np.array(self.file_paths, dtype=object),
+            'title': np.array(self.titles, dtype=object),
+            'artist': pd.Categorical.from_codes(self.column('artist_code'), self.artists.categories),
+            'bpm': self.column('bpm'),
+            'key': pd.Categorical.from_codes(self.column('key_code'), [k.value for k in KEYS]),
+            'duration': self.column('duration'),
+            'energy_level': self.column('energy_level'),
+            'texture_mask': self.column('texture_mask'),
+            'journey_position': pd.Categorical.from_codes(
+                self.column('position_code'), [p.value for p in POSITIONS]),
+            'label': pd.Categorical.from_codes(self.column('label_code'), self.labels.categories),
+            'year': pd.arrays.IntegerArray(year, year == 0),
+        }, copy=False)
+
+
+class LazyTrackList(Sequence):
+    """Read-only list of tracks over a ColumnarTrackStore, materialised on access."""
+
+    def __init__(self, store: ColumnarTrackStore):
+        self._store = store
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._store.track(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("track index out of range")
+        return self._store.track(index)
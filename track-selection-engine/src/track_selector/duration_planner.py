@@ -0,0 +1,222 @@
+"""Branch-and-bound set planning to an exact duration."""
+
+import random
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .models import TrackMetadata, JourneyArc
+from .scoring import MAX_SCORE
+from .profiling import stage
+
+if TYPE_CHECKING:
+    from .journey_planner import JourneyPlanner
+
+DURATION_TOLERANCE_DEFAULT = 120.0   # seconds either side of the target
+ARTIST_WINDOW_DEFAULT = 4            # no artist twice within this many tracks
+BRANCHING_DEFAULT = 6                # successors tried per track
+TIME_BUDGET_DEFAULT = 5.0            # seconds
+
+
+class DurationPlanner:
+    """
+    Plans a set whose real running time hits the target duration.
+
+    Running time is counted the way Playlist.calculate_duration() counts
+    it: each track's duration, minus one blend per transition. The number
+    of tracks follows from that rather than from an assumed 6-minute
+    average. Hard constraints:
+
+    - running time within target ± tolerance
+    - energy within ±1 of the arc's curve, which is laid over the set's
+      timeline (a track's target is the curve value where it starts)
+    - BPM/key compatibility between neighbours (the ScoreMatrix moves)
+    - no track twice, and no artist twice within artist_window tracks
+    - at most max_per_label tracks from one label, and at least
+      min_preferred tracks from the arc's preferred labels
+
+    Among feasible sets, the highest mean transition score wins. The mean
+    is used rather than the sum so that sets of short tracks are not
+    favoured. The search is a depth-first branch and bound: successors
+    are tried best first (up to `branching` per track), so the first set
+    found is the greedy one. A branch is pruned when even MAX_SCORE for
+    every track that could still fit cannot beat the best mean so far,
+    when it overruns the window, or when too few tracks remain to meet the
+    preferred-label quota. The search stops at time_budget and returns the
+    best set found.
+    """
+
+    def __init__(
+        self,
+        planner: 'JourneyPlanner',
+        branching: int = BRANCHING_DEFAULT,
+        time_budget: float = TIME_BUDGET_DEFAULT,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize duration planner.
+
+        Args:
+            planner: Journey planner whose library and scoring are used
+            branching: Successors tried per track
+            time_budget: Seconds of search before returning the best set
+            seed: Seed for opener order and tie-breaking
+        """
+        if branching < 1:
+            raise ValueError("branching must be at least 1")
+        self.planner = planner
+        self.branching = branching
+        self.time_budget = time_budget
+        self.seed = seed
+
+        # Search statistics from the last plan()
+        self.nodes = 0
+        self.complete = False
+
+    def plan(
+        self,
+        journey_arc: JourneyArc,
+        tolerance: float = DURATION_TOLERANCE_DEFAULT,
+        artist_window: int = ARTIST_WINDOW_DEFAULT,
+        max_per_label: Optional[int] = None,
+        min_preferred: int = 0,
+        strict_key: bool = False
+    ) -> List[TrackMetadata]:
+        """
+        Search for the best set that fits the duration and constraints.
+
+        Args:
+            journey_arc: Journey arc template (duration, energy curve, BPM
+                range, blend)
+            tolerance: Allowed difference from the target, in seconds
+            artist_window: Tracks within which an artist may not repeat
+                (1 disables the check)
+            max_per_label: Most tracks from any one label (None = no limit)
+            min_preferred: Fewest tracks from the arc's preferred labels
+            strict_key: Only use tracks in compatible keys
+
+        Returns:
+            Tracks in order, or an empty list if no feasible set was found
+            within the time budget
+        """
+        deadline = time.perf_counter() + self.time_budget
+        rng = random.Random(self.seed)
+        planner = self.planner
+
+        target = journey_arc.duration_minutes * 60.0
+        lo, hi = target - tolerance, target + tolerance
+        blend = journey_arc.blend_duration
+
+        matrix = planner.score_matrix(journey_arc, strict_key)
+        pool = matrix.tracks
+        self.nodes = 0
+        self.complete = False
+        if not pool:
+            return []
+
+        order = list(range(len(pool)))
+        rng.shuffle(order)
+        rank = np.empty(len(pool), dtype=np.int64)
+        rank[order] = np.arange(len(pool))
+
+        durations = [t.duration for t in pool]
+        artists = matrix.artist_id.tolist()
+        labels = [t.label for t in pool]
+        preferred = [
+            1 if t.label and any(lbl in t.label for lbl in journey_arc.preferred_labels) else 0
+            for t in pool
+        ]
+        # Tracks no longer than a blend (e.g. unknown duration) can't be placed
+        unusable = {i for i, d in enumerate(durations) if d <= blend}
+        if len(unusable) == len(pool):
+            return []
+        # Shortest time one more track can add; bounds how many still fit
+        min_step = min(d for d in durations if d > blend) - blend
+
+        successors: Dict[Tuple[int, int], List[Tuple[float, int]]] = {}
+
+        def successors_of(current: int, energy: int) -> List[Tuple[float, int]]:
+            cache_key = (current, energy)
+            if cache_key not in successors:
+                successors[cache_key] = matrix.ranked_successors(current, energy, rank)
+            return successors[cache_key]
+
+        best: Dict = {'mean': -1.0, 'error': float('inf'), 'path': []}
+        path: List[int] = []
+        used = set(unusable)
+        label_counts: Dict[str, int] = {}
+
+        def record(score: float, end: float) -> None:
+            mean = score / (len(path) - 1)
+            error = abs(end - target)
+            if mean > best['mean'] or (mean == best['mean'] and error < best['error']):
+                best.update(mean=mean, error=error, path=list(path))
+
+        def add(i: int) -> None:
+            path.append(i)
+            used.add(i)
+            if labels[i]:
+                label_counts[labels[i]] = label_counts.get(labels[i], 0) + 1
+
+        def remove(i: int) -> None:
+            path.pop()
+            used.discard(i)
+            if labels[i]:
+                label_counts[labels[i]] -= 1
+
+        def extend(end: float, score: float, preferred_count: int) -> bool:
+            """Try successors of path[-1]; False once the time budget is spent."""
+            self.nodes += 1
+            if time.perf_counter() > deadline:
+                return False
+
+            transitions = len(path)        # after adding the next track
+            recent = {artists[i] for i in path[-(artist_window - 1):]} if artist_window > 1 else ()
+            tried = 0
+            for edge, nxt in successors_of(path[-1], planner.energy_at(journey_arc, end - blend)):
+                if nxt in used or artists[nxt] in recent:
+                    continue
+                if max_per_label and labels[nxt] and label_counts.get(labels[nxt], 0) >= max_per_label:
+                    continue
+                new_end = end + durations[nxt] - blend
+                if new_end > hi:
+                    continue
+                new_score = score + edge
+                new_preferred = preferred_count + preferred[nxt]
+                room = int((hi - new_end) // min_step)
+                if new_preferred + room < min_preferred:
+                    continue
+                # Best mean any completion could reach
+                if (new_score + room * MAX_SCORE) / (transitions + room) <= best['mean']:
+                    continue
+
+                tried += 1
+                add(nxt)
+                if new_end >= lo and new_preferred >= min_preferred:
+                    record(new_score, new_end)
+                if room and not extend(new_end, new_score, new_preferred):
+                    remove(nxt)
+                    return False
+                remove(nxt)
+                if tried >= self.branching:
+                    break
+            return True
+
+        with stage("select opener"):
+            openers = planner.opener_candidates(journey_arc, strict_key, prefer_labels=True)
+            openers = [matrix.position(t) for t in openers if matrix.position(t) is not None]
+            rng.shuffle(openers)
+        for opener in openers:
+            if opener in used or durations[opener] > hi:
+                continue
+            add(opener)
+            with stage("search from opener", opener=opener):
+                finished = extend(durations[opener], 0.0, preferred[opener])
+            remove(opener)
+            if not finished:
+                break
+        else:
+            self.complete = True
+
+        return [pool[i] for i in best['path']]
@@ -0,0 +1,282 @@
+"""Whole-playlist evaluation: per-transition and aggregate metrics."""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .models import TrackMetadata, JourneyArc, Playlist, textures_to_mask
+from .columnar import KEY_CODES, MISSING
+from .harmonic import KEY_DISTANCE
+from .scoring import (
+    KEY_COMPATIBLE, BASE_SCORE, KEY_POINTS, TEXTURE_POINTS, SAME_ARTIST_PENALTY,
+    BPM_STEPS, BPM_STEP_POINTS, ENERGY_POINTS, ENERGY_STEP_PENALTY
+)
+from .duration_planner import ARTIST_WINDOW_DEFAULT
+
+# A tempo change beyond this (in %, after half/double time) needs pitching
+BPM_CLASH_PERCENT = 6.0
+# Camelot steps beyond this are not a harmonic mix
+KEY_CLASH_STEPS = 1
+# Energy more than this far from the curve is off the arc
+ENERGY_OFF_CURVE = 1
+
+
+def bpm_jump(bpm_a: np.ndarray, bpm_b: np.ndarray) -> np.ndarray:
+    """
+    Tempo change from a to b in percent, taking the nearest of straight,
+    double- and half-time. Broadcasts; NaN where a BPM is unknown (0).
+    """
+    bpm_a = np.asarray(bpm_a, dtype=float)
+    bpm_b = np.asarray(bpm_b, dtype=float)
+    known = (bpm_a > 0) & (bpm_b > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.log(np.where(known, bpm_b / np.where(known, bpm_a, 1.0), 1.0))
+    jump = np.minimum(np.abs(ratio), np.minimum(np.abs(ratio - np.log(2)), np.abs(ratio + np.log(2))))
+    return np.where(known, jump * 100.0, np.nan)
+
+
+@dataclass
+class PlaylistEvaluation:
+    """
+    Metrics for one track order.
+
+    Transition arrays have one entry per transition (len(tracks) - 1);
+    track arrays one per track. NaN marks unknown values (no key, BPM or
+    loudness).
+    """
+    tracks: List[TrackMetadata]
+    score: np.ndarray              # transition score, as _score_track_compatibility
+    bpm_jump: np.ndarray           # % tempo change (half/double time allowed)
+    key_distance: np.ndarray       # Camelot steps
+    energy_step: np.ndarray        # energy change
+    loudness_delta: np.ndarray     # |dB| change
+    energy_target: np.ndarray      # per track: the curve's target for it
+    energy_deviation: np.ndarray   # per track: |energy - target|
+    artist_repeat: np.ndarray      # per track: artist played within the window
+    duration: float                # running time with blends, seconds
+
+    def summary(self) -> Dict[str, float]:
+        """Aggregate metrics (NaN means no known values)."""
+        def mean(values: np.ndarray) -> float:
+            values = values[~np.isnan(values)]
+            return float(values.mean()) if len(values) else float('nan')
+
+        def peak(values: np.ndarray) -> float:
+            values = values[~np.isnan(values)]
+            return float(values.max()) if len(values) else float('nan')
+
+        return {
+            'tracks': len(self.tracks),
+            'duration_minutes': self.duration / 60,
+            'score_total': float(self.score.sum()),
+            'score_mean': mean(self.score),
+            'bpm_jump_mean': mean(self.bpm_jump),
+            'bpm_jump_max': peak(self.bpm_jump),
+            'bpm_clashes': int(np.sum(self.bpm_jump > BPM_CLASH_PERCENT)),
+            'key_distance_mean': mean(self.key_distance),
+            'key_clashes': int(np.sum(self.key_distance > KEY_CLASH_STEPS)),
+            'keys_unknown': int(np.sum(np.isnan(self.key_distance))),
+            'energy_deviation_mean': mean(self.energy_deviation),
+            'energy_deviation_max': peak(self.energy_deviation),
+            'energy_off_curve': int(np.sum(self.energy_deviation > ENERGY_OFF_CURVE)),
+            'artist_repeats': int(self.artist_repeat.sum()),
+            'loudness_delta_mean': mean(self.loudness_delta),
+            'loudness_delta_max': peak(self.loudness_delta),
+        }
+
+    def transition_rows(self) -> List[dict]:
+        """One dict per transition, for tables and JSON export."""
+        def value(x: float) -> Optional[float]:
+            return None if np.isnan(x) else round(float(x), 2)
+
+        return [
+            {
+                'from': f"{a.artist} - {a.title}",
+                'to': f"{b.artist} - {b.title}",
+                'score': float(self.score[i]),
+                'bpm_jump': value(self.bpm_jump[i]),
+                'key_distance': value(self.key_distance[i]),
+                'energy_step': int(self.energy_step[i]),
+                'energy_deviation': int(self.energy_deviation[i + 1]),
+                'loudness_delta': value(self.loudness_delta[i]),
+                'artist_repeat': bool(self.artist_repeat[i + 1]),
+            }
+            for i, (a, b) in enumerate(zip(self.tracks, self.tracks[1:]))
+        ]
+
+
+class PlaylistEvaluator:
+    """
+    Scores orderings of a fixed set of tracks with NumPy.
+
+    The tracks' BPM, key code, energy, texture bitmask, artist ID, loudness
+    and duration are packed into arrays once; each evaluation then gathers
+    them in the requested order and computes every metric as an array
+    operation. evaluate() gives the full per-transition breakdown of one
+    order; evaluate_many() scores a whole batch of orders (one per row) at
+    once, for optimisers and benchmarks.
+
+    Transition scores equal JourneyPlanner._score_track_compatibility with
+    the arc's target energy for the incoming track: by slot, or with
+    timed=True by where the track starts in the set.
+    """
+
+    def __init__(self, tracks: Sequence[TrackMetadata]):
+        """
+        Pack the tracks' attributes.
+
+        Args:
+            tracks: Tracks to evaluate; orders index into this sequence
+        """
+        self.tracks = list(tracks)
+        self.bpm = np.array([t.bpm or 0.0 for t in self.tracks], dtype=float)
+        self.key_code = np.array(
+            [KEY_CODES[t.key.value] if t.key else MISSING for t in self.tracks], dtype=np.int64)
+        self.energy = np.array([t.energy_level for t in self.tracks], dtype=np.int64)
+        self.texture_mask = np.array([textures_to_mask(t.textures) for t in self.tracks], dtype=np.int64)
+        self.loudness = np.array(
+            [t.loudness_db if t.loudness_db is not None else np.nan for t in self.tracks], dtype=float)
+        self.duration = np.array([t.duration or 0.0 for t in self.tracks], dtype=float)
+        if self.tracks:
+            _, self.artist_id = np.unique([t.artist for t in self.tracks], return_inverse=True)
+        else:
+            self.artist_id = np.zeros(0, dtype=np.int64)
+
+    @staticmethod
+    def slot_targets(journey_arc: JourneyArc, length: int) -> np.ndarray:
+        """Target energy per slot (5 beyond the curve), as JourneyPlanner.target_energy."""
+        curve = np.asarray(journey_arc.energy_curve[:length], dtype=np.int64)
+        return np.concatenate([curve, np.full(length - len(curve), 5, dtype=np.int64)])
+
+    @staticmethod
+    def start_times(durations: np.ndarray, blend_duration: float) -> np.ndarray:
+        """Seconds into the set at which each track starts, as JourneyPlanner._start_times."""
+        starts = np.zeros(len(durations))
+        end = 0.0
+        for i, duration in enumerate(durations.tolist()):
+            starts[i] = start = max(0.0, end - blend_duration)
+            end = start + duration
+        return starts
+
+    @staticmethod
+    def timed_targets(journey_arc: JourneyArc, starts: np.ndarray) -> np.ndarray:
+        """Target energy at each start time, as JourneyPlanner.energy_at."""
+        curve = np.asarray(journey_arc.energy_curve or [5], dtype=np.int64)
+        total = journey_arc.duration_minutes * 60.0
+        if total <= 0:
+            return np.full(len(starts), curve[0], dtype=np.int64)
+        index = np.minimum((starts / total * len(curve)).astype(np.int64), len(curve) - 1)
+        return curve[index]
+
+    def _scores(self, a: np.ndarray, b: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """Transition scores for current tracks a and next tracks b (any shape)."""
+        score = np.full(a.shape, float(BASE_SCORE))
+
+        energy_diff = np.abs(self.energy[b] - targets)
+        score += np.where(energy_diff == 0, ENERGY_POINTS, -ENERGY_STEP_PENALTY * energy_diff)
+
+        bpm_diff = np.abs(self.bpm[a] - self.bpm[b])
+        for step in BPM_STEPS:
+            score += BPM_STEP_POINTS * (bpm_diff < step)
+
+        score += KEY_POINTS * KEY_COMPATIBLE[self.key_code[a], self.key_code[b]]
+
+        mask_a, mask_b = self.texture_mask[a], self.texture_mask[b]
+        score += TEXTURE_POINTS * ((mask_b != 0) & ((mask_a & ~mask_b) != 0))
+
+        score -= SAME_ARTIST_PENALTY * (self.artist_id[a] == self.artist_id[b])
+        return np.maximum(0.0, score)
+
+    def _artist_repeats(self, order: np.ndarray, artist_window: int) -> np.ndarray:
+        """Per position (last axis): artist already played within the previous window - 1 tracks."""
+        artists = self.artist_id[order]
+        repeat = np.zeros(order.shape, dtype=bool)
+        for lag in range(1, min(artist_window, order.shape[-1])):
+            repeat[..., lag:] |= artists[..., lag:] == artists[..., :-lag]
+        return repeat
+
+    def evaluate(
+        self,
+        journey_arc: JourneyArc,
+        order: Optional[Sequence[int]] = None,
+        timed: bool = False,
+        artist_window: int = ARTIST_WINDOW_DEFAULT
+    ) -> PlaylistEvaluation:
+        """
+        Evaluate one order of the tracks.
+
+        Args:
+            journey_arc: Arc giving the energy curve, duration and blend
+            order: Indices into the tracks (default: as given)
+            timed: Target energy by start time instead of by slot
+            artist_window: An artist repeats if played within this many
+                tracks (2 = back to back)
+
+        Returns:
+            PlaylistEvaluation for the order
+        """
+        order = np.arange(len(self.tracks)) if order is None else np.asarray(order, dtype=np.int64)
+        a, b = order[:-1], order[1:]
+        blend = journey_arc.blend_duration
+
+        if timed:
+            targets = self.timed_targets(journey_arc, self.start_times(self.duration[order], blend))
+        else:
+            targets = self.slot_targets(journey_arc, len(order))
+
+        duration = float(self.duration[order[0]] + np.sum(self.duration[b] - blend)) if len(order) else 0.0
+        return PlaylistEvaluation(
+            tracks=[self.tracks[i] for i in order.tolist()],
+            score=self._scores(a, b, targets[1:]),
+            bpm_jump=bpm_jump(self.bpm[a], self.bpm[b]),
+            key_distance=KEY_DISTANCE[self.key_code[a], self.key_code[b]],
+            energy_step=self.energy[b] - self.energy[a],
+            loudness_delta=np.abs(self.loudness[b] - self.loudness[a]),
+            energy_target=targets,
+            energy_deviation=np.abs(self.energy[order] - targets),
+            artist_repeat=self._artist_repeats(order, artist_window),
+            duration=duration
+        )
+
+    def evaluate_many(
+        self,
+        journey_arc: JourneyArc,
+        orders: np.ndarray,
+        artist_window: int = ARTIST_WINDOW_DEFAULT
+    ) -> Dict[str, np.ndarray]:
+        """
+        Aggregate metrics for a batch of orders, one per row (slot targets).
+
+        Args:
+            journey_arc: Arc giving the energy curve
+            orders: (m, n) array of indices into the tracks
+            artist_window: An artist repeats if played within this many tracks
+
+        Returns:
+            Metric name → array of m values: score_total, bpm_jump_total,
+            key_distance_total (unknown keys count 0), energy_deviation_total,
+            artist_repeats, loudness_delta_total (unknown loudness counts 0)
+        """
+        orders = np.atleast_2d(np.asarray(orders, dtype=np.int64))
+        a, b = orders[:, :-1], orders[:, 1:]
+        targets = self.slot_targets(journey_arc, orders.shape[1])
+
+        return {
+            'score_total': self._scores(a, b, targets[None, 1:]).sum(axis=1),
+            'bpm_jump_total': np.nansum(bpm_jump(self.bpm[a], self.bpm[b]), axis=1),
+            'key_distance_total': np.nansum(KEY_DISTANCE[self.key_code[a], self.key_code[b]], axis=1),
+            'energy_deviation_total': np.abs(self.energy[orders] - targets[None, :]).sum(axis=1),
+            'artist_repeats': self._artist_repeats(orders, artist_window).sum(axis=1),
+            'loudness_delta_total': np.nansum(np.abs(self.loudness[b] - self.loudness[a]), axis=1),
+        }
+
+
+def evaluate_playlist(
+    playlist: Playlist,
+    timed: bool = False,
+    artist_window: int = ARTIST_WINDOW_DEFAULT
+) -> PlaylistEvaluation:
+    """Evaluate a Playlist in its own order against its own journey arc."""
+    return PlaylistEvaluator(playlist.tracks).evaluate(
+        playlist.journey_arc, timed=timed, artist_window=artist_window)
@@ -0,0 +1,265 @@
+"""Harmonic mixing: Camelot key codes, distance tables and bridge-track search."""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .models import TrackMetadata, MusicalKey
+from .columnar import KEYS, KEY_CODES, MISSING
+
+# "8A"/"8B" (Camelot letters, as MusicalKey) or "8m"/"8d" (Traktor's
+# Open Key notation, as collection.nml INFO KEY); the numbers agree
+_KEY_PATTERN = re.compile(r'^(\d{1,2})([abmd])$', re.IGNORECASE)
+_MODE_LETTERS = {'a': 'A', 'm': 'A', 'b': 'B', 'd': 'B'}
+
+# Most bridge tracks find_bridge() inserts between two tracks
+MAX_BRIDGES_DEFAULT = 3
+# Bridge candidates kept per (slot, key), so repeated keys can use different tracks
+BRIDGE_CANDIDATES = 8
+
+
+def parse_key(text: Union[str, MusicalKey, None]) -> Optional[MusicalKey]:
+    """
+    MusicalKey for a key in either notation ("8A", "8a", "8m" → 8A; "8B", "8d" → 8B).
+
+    Returns None for empty or unrecognised strings.
+    """
+    if isinstance(text, MusicalKey) or text is None:
+        return text
+    match = _KEY_PATTERN.match(text.strip())
+    if not match or not 1 <= int(match.group(1)) <= 12:
+        return None
+    return MusicalKey(f"{int(match.group(1))}{_MODE_LETTERS[match.group(2).lower()]}")
+
+
+def traktor_notation(key: MusicalKey) -> str:
+    """Traktor's INFO KEY string for a key (8A → "8m", 8B → "8d")."""
+    return f"{key.value[:-1]}{'m' if key.value.endswith('A') else 'd'}"
+
+
+def key_code(key: Union[str, MusicalKey, None]) -> int:
+    """Integer code of a key (index into KEYS and the tables), or MISSING."""
+    key = parse_key(key)
+    return KEY_CODES[key.value] if key else MISSING
+
+
+def _wheel_distance(key1: MusicalKey, key2: MusicalKey) -> int:
+    num1, letter1 = int(key1.value[:-1]), key1.value[-1]
+    num2, letter2 = int(key2.value[:-1]), key2.value[-1]
+    steps = abs(num1 - num2) % 12
+    return min(steps, 12 - steps) + (letter1 != letter2)
+
+
+# KEY_DISTANCE[a, b] for key codes a, b: steps around the Camelot wheel,
+# plus one to switch between A (minor) and B (major). This is the fewest
+# compatible mixes from a to b. Index MISSING (-1) is the last row/column
+# and gives NaN, so lookups on arrays of codes need no special case.
+KEY_DISTANCE = np.full((len(KEYS) + 1, len(KEYS) + 1), np.nan)
+for _a in KEYS:
+    for _b in KEYS:
+        KEY_DISTANCE[KEY_CODES[_a.value], KEY_CODES[_b.value]] = _wheel_distance(_a, _b)
+
+# KEY_COMPATIBLE[a, b]: same key, ±1 on the wheel, or relative major/minor
+# (distance ≤ 1). False for a missing key.
+KEY_COMPATIBLE = np.zeros((len(KEYS) + 1, len(KEYS) + 1), dtype=bool)
+KEY_COMPATIBLE[:len(KEYS), :len(KEYS)] = KEY_DISTANCE[:len(KEYS), :len(KEYS)] <= 1
+
+# Strict-key filtering only rules out pairs where both tracks have a key
+KEY_ALLOWED = KEY_COMPATIBLE.copy()
+KEY_ALLOWED[MISSING, :] = True
+KEY_ALLOWED[:, MISSING] = True
+
+# MusicalKey → keys it mixes harmonically with (including itself)
+COMPATIBLE_KEYS: Dict[MusicalKey, frozenset] = {
+    key: frozenset(KEYS[j] for j in np.flatnonzero(KEY_COMPATIBLE[KEY_CODES[key.value], :len(KEYS)]))
+    for key in KEYS
+}
+
+
+def camelot_distance(key1: Union[str, MusicalKey], key2: Union[str, MusicalKey]) -> Optional[int]:
+    """Fewest compatible mixes between two keys (either notation); None if one is unknown."""
+    code1, code2 = key_code(key1), key_code(key2)
+    if code1 == MISSING or code2 == MISSING:
+        return None
+    return int(KEY_DISTANCE[code1, code2])
+
+
+def key_path(key1: Union[str, MusicalKey], key2: Union[str, MusicalKey]) -> List[MusicalKey]:
+    """
+    A shortest chain of compatible keys from key1 to key2, both included.
+
+    Each step moves one place around the wheel or switches A/B; the
+    chain walks the number first, then switches letter.
+    """
+    code1, code2 = key_code(key1), key_code(key2)
+    if code1 == MISSING or code2 == MISSING:
+        raise ValueError(f"Unknown key: {key1 if code1 == MISSING else key2}")
+    path = [code1]
+    while path[-1] != code2:
+        current = path[-1]
+        # Any neighbour one step closer lies on a shortest path
+        step = next(
+            j for j in np.flatnonzero(KEY_COMPATIBLE[current, :len(KEYS)])
+            if KEY_DISTANCE[j, code2] == KEY_DISTANCE[current, code2] - 1
+        )
+        path.append(int(step))
+    return [KEYS[c] for c in path]
+
+
+class HarmonicIndex:
+    """
+    Per-key candidate index over a track collection, for bridge search.
+
+    For each of the 24 keys it keeps that key's tracks sorted by BPM, so
+    the tracks of one key within a BPM window are a binary search away.
+    JourneyPlanner.harmonic_index() builds one per library version.
+    """
+
+    def __init__(self, tracks_by_key: Dict[MusicalKey, Iterable[TrackMetadata]]):
+        """
+        Build the index.
+
+        Args:
+            tracks_by_key: Tracks of each key (e.g. from
+                TrackLibrary.find_tracks_by_key); keys may be missing
+        """
+        self.tracks: List[List[TrackMetadata]] = [[] for _ in KEYS]
+        self.bpm: List[np.ndarray] = [np.zeros(0) for _ in KEYS]
+        for key, tracks in tracks_by_key.items():
+            code = KEY_CODES[key.value]
+            ordered = sorted(tracks, key=lambda t: t.bpm)
+            self.tracks[code] = ordered
+            self.bpm[code] = np.array([t.bpm for t in ordered], dtype=float)
+
+    @classmethod
+    def from_library(cls, library) -> 'HarmonicIndex':
+        """Index a TrackLibrary (any storage) through its key lookups."""
+        return cls({key: library.find_tracks_by_key(key) for key in KEYS})
+
+    def candidates(self, code: int, min_bpm: float, max_bpm: float) -> List[TrackMetadata]:
+        """Tracks in key `code` with min_bpm ≤ BPM ≤ max_bpm, ascending BPM."""
+        bpm = self.bpm[code]
+        lo = np.searchsorted(bpm, min_bpm, 'left')
+        hi = np.searchsorted(bpm, max_bpm, 'right')
+        return self.tracks[code][lo:hi]
+
+    def find_bridge(
+        self,
+        track_a: TrackMetadata,
+        track_b: TrackMetadata,
+        max_bridges: int = MAX_BRIDGES_DEFAULT,
+        bpm_tolerance: float = 0.06,
+        exclude: Iterable[TrackMetadata] = ()
+    ) -> List[TrackMetadata]:
+        """
+        Tracks to play between two harmonically distant tracks.
+
+        Returns the fewest bridge tracks such that every mix in
+        track_a → bridges → track_b is key-compatible. Bridge i of n sits
+        at an even share of the way from a to b: its target BPM and energy
+        are interpolated between the two tracks (BPM geometrically, with
+        track_b's BPM taken at half or double time if that is closer).
+        Each slot's candidates are the tracks of a key within bpm_tolerance
+        of the target. They cost their BPM deviation in percent plus their
+        energy difference. A shortest path through the slots (dynamic
+        programming over key-compatible steps) picks the cheapest chain.
+
+        Args:
+            track_a: Outgoing track
+            track_b: Track to arrive at
+            max_bridges: Most tracks to insert
+            bpm_tolerance: BPM window around each target, as a fraction
+            exclude: Tracks not to use (e.g. already in the set)
+
+        Returns:
+            Bridge tracks in order; empty if the two already mix
+            harmonically, a key is unknown, or no chain of at most
+            max_bridges tracks exists
+        """
+        start, end = key_code(track_a.key), key_code(track_b.key)
+        if start == MISSING or end == MISSING or KEY_COMPATIBLE[start, end]:
+            return []
+
+        excluded = {t.file_path for t in exclude} | {track_a.file_path, track_b.file_path}
+        bpm_a = track_a.bpm
+        bpm_b = min((track_b.bpm * r for r in (1.0, 0.5, 2.0)), key=lambda b: abs(np.log(b / bpm_a)))
+        steps = int(KEY_DISTANCE[start, end])
+
+        for count in range(steps - 1, max_bridges + 1):
+            bridge = self._cheapest_chain(start, end, count, bpm_a, bpm_b,
+                                          track_a.energy_level, track_b.energy_level,
+                                          bpm_tolerance, excluded)
+            if bridge:
+                return bridge
+        return []
+
+    def _cheapest_chain(
+        self,
+        start: int,
+        end: int,
+        count: int,
+        bpm_a: float,
+        bpm_b: float,
+        energy_a: int,
+        energy_b: int,
+        bpm_tolerance: float,
+        excluded: set
+    ) -> List[TrackMetadata]:
+        """Cheapest chain of exactly `count` bridge tracks, or [] if none exists."""
+        # Per slot: key code → up to BRIDGE_CANDIDATES (cost, track), cheapest first
+        slots: List[Dict[int, List[Tuple[float, TrackMetadata]]]] = []
+        for i in range(1, count + 1):
+            share = i / (count + 1)
+            target_bpm = bpm_a * (bpm_b / bpm_a) ** share
+            target_energy = energy_a + (energy_b - energy_a) * share
+            options = {}
+            for code in range(len(KEYS)):
+                # Only keys that can still be on a chain of this length
+                if KEY_DISTANCE[start, code] > i or KEY_DISTANCE[code, end] > count + 1 - i:
+                    continue
+                scored = sorted(
+                    (abs(t.bpm / target_bpm - 1) * 100 + abs(t.energy_level - target_energy), n, t)
+                    for n, t in enumerate(self.candidates(code, target_bpm * (1 - bpm_tolerance),
+                                                          target_bpm * (1 + bpm_tolerance)))
+                    if t.file_path not in excluded
+                )[:BRIDGE_CANDIDATES]
+                if scored:
+                    options[code] = [(cost, t) for cost, _, t in scored]
+            slots.append(options)
+
+        # best[code] = (cost of the cheapest chain ending in that key, previous key)
+        best: Dict[int, Tuple[float, int]] = {start: (0.0, MISSING)}
+        history = []
+        for options in slots:
+            reached = {}
+            for code, candidates in options.items():
+                previous = [
+                    (cost, prev) for prev, (cost, _) in best.items() if KEY_COMPATIBLE[prev, code]
+                ]
+                if previous:
+                    cost, prev = min(previous)
+                    reached[code] = (cost + candidates[0][0], prev)
+            if not reached:
+                return []
+            history.append(reached)
+            best = reached
+
+        finals = [(cost, code) for code, (cost, _) in best.items() if KEY_COMPATIBLE[code, end]]
+        if not finals:
+            return []
+
+        # Walk back through the keys, then pick each slot's cheapest unused track
+        codes = [min(finals)[1]]
+        for reached in reversed(history[1:]):
+            codes.append(reached[codes[-1]][1])
+        codes.reverse()
+
+        chain, used = [], set()
+        for options, code in zip(slots, codes):
+            track = next((t for _, t in options[code] if t.file_path not in used), None)
+            if track is None:
+                return []
+            chain.append(track)
+            used.add(track.file_path)
+        return chain
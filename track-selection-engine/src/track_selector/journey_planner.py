@@ -1,27 +1,50 @@
 """Journey arc planning using deep space house philosophy."""
 
-from typing import List, Optional, Tuple
+from dataclasses import replace
+from typing import Dict, List, Optional, Set, Tuple
 import random
 from datetime import datetime
 
+import numpy as np
+
 from .models import (
     TrackMetadata, JourneyArc, Playlist, Transition,
     MusicalKey, EnergyLevel, TextureType, JourneyPosition
 )
 from .library import TrackLibrary
+from .scoring import ScoreMatrix
+from .evaluation import PlaylistEvaluator
+from .harmonic import HarmonicIndex, MAX_BRIDGES_DEFAULT
+from .optimizer import PlaylistOptimizer, BEAM_WIDTH_DEFAULT, TIME_BUDGET_DEFAULT
+from .duration_planner import DurationPlanner, DURATION_TOLERANCE_DEFAULT, ARTIST_WINDOW_DEFAULT
+from .profiling import stage
+
+# Replanning runs during a live set, so it searches a narrower beam for
+# a fraction of the time generate_optimized_playlist() takes
+REPLAN_BEAM_WIDTH = 8
+REPLAN_TIME_BUDGET = 0.05   # seconds
 
 
 class JourneyPlanner:
     """Plans DJ journey arcs based on deep space house philosophy."""
 
-    def __init__(self, library: TrackLibrary):
+    def __init__(self, library: TrackLibrary, seed: Optional[int] = None):
         """
         Initialize journey planner.
 
         Args:
             library: Track library to select from
+            seed: Seed for the random choices, for repeatable playlists
+                (default: the global random module)
         """
         self.library = library
+        self.rng = random.Random(seed) if seed is not None else random
+
+        # (library version, BPM range, strict_key) → ScoreMatrix
+        self._score_matrices: Dict[Tuple, ScoreMatrix] = {}
+
+        # (library version, HarmonicIndex) for bridge search
+        self._harmonic_index: Optional[Tuple[int, HarmonicIndex]] = None
 
     def create_journey_arc(
         self,
@@ -164,7 +187,8 @@ class JourneyPlanner:
         transitions: List[Transition] = []
 
         # Start with opener
-        first_track = self._select_opener(journey_arc, strict_key, prefer_labels)
+        with stage("select opener"):
+            first_track = self._select_opener(journey_arc, strict_key, prefer_labels)
         if not first_track:
             raise ValueError("No suitable opener found in library")
 
@@ -173,16 +197,17 @@ class JourneyPlanner:
         # Select subsequent tracks following energy curve
         current_track = first_track
         for i in range(1, journey_arc.num_tracks):
-            target_energy = journey_arc.energy_curve[i] if i < len(journey_arc.energy_curve) else 5
-
-            next_track = self._select_next_track(
-                current_track=current_track,
-                target_energy=target_energy,
-                journey_arc=journey_arc,
-                strict_key=strict_key,
-                prefer_labels=prefer_labels,
-                already_used=[t.file_path for t in selected_tracks]
-            )
+            target_energy = self.target_energy(journey_arc, i)
+
+            with stage("select track", slot=i):
+                next_track = self._select_next_track(
+                    current_track=current_track,
+                    target_energy=target_energy,
+                    journey_arc=journey_arc,
+                    strict_key=strict_key,
+                    prefer_labels=prefer_labels,
+                    already_used={t.file_path for t in selected_tracks}
+                )
 
             if not next_track:
                 print(f"Warning: Could not find suitable track {i+1}, stopping at {len(selected_tracks)} tracks")
@@ -195,26 +220,225 @@ class JourneyPlanner:
             selected_tracks.append(next_track)
             current_track = next_track
 
-        # Create playlist
-        playlist = Playlist(
-            name=journey_arc.name,
-            journey_arc=journey_arc,
-            tracks=selected_tracks,
-            transitions=transitions,
-            created_at=datetime.now().isoformat()
-        )
+        return self._build_playlist(journey_arc, selected_tracks, transitions)
 
-        playlist.calculate_duration()
+    def generate_optimized_playlist(
+        self,
+        journey_arc: JourneyArc,
+        strict_key: bool = False,
+        prefer_labels: bool = True,
+        beam_width: int = BEAM_WIDTH_DEFAULT,
+        time_budget: Optional[float] = TIME_BUDGET_DEFAULT,
+        seed: Optional[int] = None
+    ) -> Playlist:
+        """
+        Generate a playlist that maximises the summed transition score.
 
-        return playlist
+        Uses PlaylistOptimizer (beam search) instead of the greedy
+        top-3 choice, under the same constraints: the arc's energy curve
+        (±1), BPM range, BPM/key compatibility between neighbours and no
+        track used twice.
 
-    def _select_opener(
+        Args:
+            journey_arc: Journey arc template to follow
+            strict_key: Only use tracks in compatible keys
+            prefer_labels: Prefer tracks from preferred labels
+            beam_width: Partial playlists kept at each step
+            time_budget: Seconds before the search narrows to one path
+                (None: never narrow)
+            seed: Seed for opener sampling and tie-breaking
+
+        Returns:
+            Complete playlist with transitions
+        """
+        optimizer = PlaylistOptimizer(self, beam_width=beam_width,
+                                      time_budget=time_budget, seed=seed)
+        selected_tracks = optimizer.optimize(journey_arc, strict_key, prefer_labels)
+        if not selected_tracks:
+            raise ValueError("No suitable opener found in library")
+        if len(selected_tracks) < journey_arc.num_tracks:
+            print(f"Warning: Could not find suitable track {len(selected_tracks) + 1}, "
+                  f"stopping at {len(selected_tracks)} tracks")
+
+        return self.playlist_from_tracks(journey_arc, selected_tracks)
+
+    def replan(
+        self,
+        journey_arc: JourneyArc,
+        played: List[TrackMetadata],
+        current_start: Optional[float] = None,
+        strict_key: bool = False,
+        prefer_labels: bool = True,
+        beam_width: int = REPLAN_BEAM_WIDTH,
+        time_budget: float = REPLAN_TIME_BUDGET,
+        seed: Optional[int] = None
+    ) -> Playlist:
+        """
+        Recompute the rest of a set from the track playing now.
+
+        For when the set has left its plan: played ends with the current
+        track, which may be any library track (even outside the arc's BPM
+        range). The rest of the set is planned from it, with
+        PlaylistOptimizer warm-started at the current track, to fill the
+        time left in the arc's duration. Each remaining slot targets the
+        arc's energy at the time it is estimated to start (tracks of the
+        pool's median length), and played tracks are not repeated.
+
+        The arc's candidate pool and ScoreMatrix come from the planner's
+        cache, so after the first call (or a score_matrix() call when the
+        set starts) a replan takes tens of milliseconds.
+
+        Args:
+            journey_arc: Journey arc the set follows
+            played: Tracks played so far, ending with the current track
+            current_start: Seconds into the set the current track started
+                (default: from the played tracks' durations and blends)
+            strict_key: Only use tracks in compatible keys
+            prefer_labels: Prefer tracks from preferred labels
+            beam_width: Partial playlists kept at each step
+            time_budget: Seconds before the search narrows to one path
+            seed: Seed for tie-breaking
+
+        Returns:
+            Playlist of the played tracks followed by the new remainder
+        """
+        if not played:
+            raise ValueError("Nothing played yet; use generate_optimized_playlist() to plan a set")
+        current = played[-1]
+        blend = journey_arc.blend_duration
+        if current_start is None:
+            current_start = self._start_times(played, blend)[-1]
+
+        matrix = self.score_matrix(journey_arc, strict_key)
+        durations = matrix.duration[matrix.duration > 0]
+        slot_length = max(1.0, (float(np.median(durations)) if len(durations) else 360.0) - blend)
+
+        next_start = current_start + current.duration - blend
+        remaining = journey_arc.duration_minutes * 60.0 - next_start
+        num_remaining = max(0, round(remaining / slot_length))
+
+        remainder: List[TrackMetadata] = []
+        if num_remaining:
+            # The optimizer's slots: the current track, then the tracks to plan
+            curve = [self.energy_at(journey_arc, current_start)] + [
+                self.energy_at(journey_arc, next_start + k * slot_length)
+                for k in range(num_remaining)
+            ]
+            rest_arc = replace(journey_arc, num_tracks=num_remaining + 1, energy_curve=curve)
+            optimizer = PlaylistOptimizer(self, beam_width=beam_width,
+                                          time_budget=time_budget, seed=seed)
+            remainder = optimizer.optimize(rest_arc, strict_key, prefer_labels,
+                                           start=current, exclude=played)[1:]
+            if len(remainder) < num_remaining:
+                print(f"Warning: Could not find suitable track {len(played) + len(remainder) + 1}, "
+                      f"stopping at {len(played) + len(remainder)} tracks")
+
+        return self.playlist_from_tracks(journey_arc, list(played) + remainder)
+
+    def generate_timed_playlist(
+        self,
+        journey_arc: JourneyArc,
+        tolerance: float = DURATION_TOLERANCE_DEFAULT,
+        artist_window: int = ARTIST_WINDOW_DEFAULT,
+        max_per_label: Optional[int] = None,
+        min_preferred: int = 0,
+        strict_key: bool = False,
+        time_budget: float = TIME_BUDGET_DEFAULT,
+        seed: Optional[int] = None
+    ) -> Playlist:
+        """
+        Generate a playlist whose running time matches the arc's duration.
+
+        Uses DurationPlanner (branch and bound) over actual track durations
+        and blend overlaps. The number of tracks comes out of the search,
+        not journey_arc.num_tracks.
+
+        Args:
+            journey_arc: Journey arc template to follow
+            tolerance: Allowed difference from the arc's duration, in seconds
+            artist_window: Tracks within which an artist may not repeat
+            max_per_label: Most tracks from any one label (None = no limit)
+            min_preferred: Fewest tracks from the arc's preferred labels
+            strict_key: Only use tracks in compatible keys
+            time_budget: Seconds of search before returning the best set
+            seed: Seed for opener order and tie-breaking
+
+        Returns:
+            Complete playlist with transitions
+        """
+        duration_planner = DurationPlanner(self, time_budget=time_budget, seed=seed)
+        selected_tracks = duration_planner.plan(
+            journey_arc,
+            tolerance=tolerance,
+            artist_window=artist_window,
+            max_per_label=max_per_label,
+            min_preferred=min_preferred,
+            strict_key=strict_key
+        )
+        if not selected_tracks:
+            raise ValueError(
+                f"No set found within {journey_arc.duration_minutes} min ± {tolerance:g}s "
+                f"that meets the constraints (searched {duration_planner.nodes} nodes)")
+
+        return self.playlist_from_tracks(journey_arc, selected_tracks)
+
+    def playlist_from_tracks(self, journey_arc: JourneyArc, tracks: List[TrackMetadata]) -> Playlist:
+        """Build a playlist, with transitions, from tracks already in order."""
+        transitions = [
+            self._create_transition(a, b, journey_arc.blend_duration)
+            for a, b in zip(tracks, tracks[1:])
+        ]
+        return self._build_playlist(journey_arc, list(tracks), transitions)
+
+    def score_sequence(
+        self,
+        tracks: List[TrackMetadata],
+        journey_arc: JourneyArc,
+        timed: bool = False
+    ) -> float:
+        """
+        Summed transition score of a track order.
+
+        Each transition is scored with _score_track_compatibility against
+        the arc's target energy for the incoming track: by slot (the
+        quantity generate_optimized_playlist() maximises), or with timed=True
+        by where it starts in the set, as generate_timed_playlist() plans.
+        Computed in one vectorised pass by PlaylistEvaluator.
+        """
+        evaluation = PlaylistEvaluator(tracks).evaluate(journey_arc, timed=timed)
+        return float(evaluation.score.sum())
+
+    @staticmethod
+    def _start_times(tracks: List[TrackMetadata], blend_duration: float) -> List[float]:
+        """Seconds into the set at which each track starts (blending in)."""
+        starts = []
+        end = 0.0
+        for track in tracks:
+            start = max(0.0, end - blend_duration)
+            starts.append(start)
+            end = start + track.duration
+        return starts
+
+    @staticmethod
+    def energy_at(journey_arc: JourneyArc, start: float) -> int:
+        """Target energy at `start` seconds, with the curve laid over the arc's duration."""
+        curve = journey_arc.energy_curve or [5]
+        total = journey_arc.duration_minutes * 60.0
+        index = int(start / total * len(curve)) if total > 0 else 0
+        return curve[min(index, len(curve) - 1)]
+
+    @staticmethod
+    def target_energy(journey_arc: JourneyArc, slot: int) -> int:
+        """Target energy for a playlist slot (5 beyond the end of the curve)."""
+        return journey_arc.energy_curve[slot] if slot < len(journey_arc.energy_curve) else 5
+
+    def opener_candidates(
         self,
         journey_arc: JourneyArc,
         strict_key: bool,
         prefer_labels: bool
-    ) -> Optional[TrackMetadata]:
-        """Select an opening track for the journey."""
+    ) -> List[TrackMetadata]:
+        """Tracks suitable to open the journey, narrowed by the opener preferences."""
         target_energy = journey_arc.energy_curve[0] if journey_arc.energy_curve else 2
 
         # Find candidates
@@ -252,7 +476,76 @@ class JourneyPlanner:
             if label_matches:
                 candidates = label_matches
 
-        return random.choice(candidates) if candidates else None
+        return candidates
+
+    def score_matrix(self, journey_arc: JourneyArc, strict_key: bool = False) -> ScoreMatrix:
+        """
+        Pairwise transition scores for the arc's BPM range (see ScoreMatrix).
+
+        Cached per library version, BPM range and strict_key, so repeated
+        generations over the same library reuse it. Matrices for older
+        library versions are dropped.
+        """
+        cache_key = (self.library.version, tuple(journey_arc.bpm_range), strict_key)
+        matrix = self._score_matrices.get(cache_key)
+        if matrix is None:
+            self._score_matrices = {
+                k: m for k, m in self._score_matrices.items() if k[0] == self.library.version
+            }
+            with stage("score matrix"):
+                matrix = ScoreMatrix(self.library.find_tracks_by_bpm_range(*journey_arc.bpm_range),
+                                     strict_key=strict_key)
+            self._score_matrices[cache_key] = matrix
+        return matrix
+
+    def harmonic_index(self) -> HarmonicIndex:
+        """Per-key candidate index of the library, rebuilt when the library changes."""
+        if self._harmonic_index is None or self._harmonic_index[0] != self.library.version:
+            self._harmonic_index = (self.library.version, HarmonicIndex.from_library(self.library))
+        return self._harmonic_index[1]
+
+    def find_bridge(
+        self,
+        track_a: TrackMetadata,
+        track_b: TrackMetadata,
+        max_bridges: int = MAX_BRIDGES_DEFAULT,
+        exclude: Optional[List[TrackMetadata]] = None
+    ) -> List[TrackMetadata]:
+        """
+        Tracks to play between two harmonically distant tracks (see
+        HarmonicIndex.find_bridge); empty if they already mix.
+        """
+        return self.harmonic_index().find_bridge(track_a, track_b, max_bridges=max_bridges,
+                                                 exclude=exclude or ())
+
+    def _build_playlist(
+        self,
+        journey_arc: JourneyArc,
+        tracks: List[TrackMetadata],
+        transitions: List[Transition]
+    ) -> Playlist:
+        """Wrap selected tracks and transitions in a Playlist."""
+        playlist = Playlist(
+            name=journey_arc.name,
+            journey_arc=journey_arc,
+            tracks=tracks,
+            transitions=transitions,
+            created_at=datetime.now().isoformat()
+        )
+
+        playlist.calculate_duration()
+
+        return playlist
+
+    def _select_opener(
+        self,
+        journey_arc: JourneyArc,
+        strict_key: bool,
+        prefer_labels: bool
+    ) -> Optional[TrackMetadata]:
+        """Select an opening track for the journey."""
+        candidates = self.opener_candidates(journey_arc, strict_key, prefer_labels)
+        return self.rng.choice(candidates) if candidates else None
 
     def _select_next_track(
         self,
@@ -261,7 +554,7 @@ class JourneyPlanner:
         journey_arc: JourneyArc,
         strict_key: bool,
         prefer_labels: bool,
-        already_used: List
+        already_used: Set
     ) -> Optional[TrackMetadata]:
         """Select the next track in the journey."""
         # Find compatible tracks
@@ -318,7 +611,7 @@ class JourneyPlanner:
             return scored_candidates[0][0]
         else:
             # Pick from top 3 to add variety
-            return random.choice([t for t, s in scored_candidates[:3]])
+            return self.rng.choice([t for t, s in scored_candidates[:3]])
 
     def _score_track_compatibility(
         self,
@@ -1,8 +1,12 @@
 """Track library management and analysis."""
 
+import bisect
 import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import Iterator, List, Optional, Dict, Sequence, Tuple, Union
 import pandas as pd
 from mutagen import File as MutagenFile
 from mutagen.easyid3 import EasyID3
@@ -10,30 +14,161 @@ from mutagen.mp3 import MP3
 from mutagen.wave import WAVE
 from mutagen.aiff import AIFF
 
-from .models import TrackMetadata, MusicalKey, TextureType, JourneyPosition
+from .models import TrackMetadata, CompactTrackMetadata, MusicalKey, TextureType, JourneyPosition
+from .columnar import ColumnarTrackStore, LazyTrackList
+from .binary_library import is_binary_library, read_binary_library, write_binary_library
+from .sqlite_store import SQLiteTrackStore, is_sqlite_library, write_sqlite_library
+from .nml import iter_collection, entry_path, entry_modified, entry_fields
+from .stats import LibraryStats
+from .harmonic import COMPATIBLE_KEYS
+from .profiling import stage
+
+
+# Tag reading is I/O bound (USB drives), so threads rather than processes
+SCAN_WORKERS_DEFAULT = 8
+
+
+def _walk_audio_files(directory: Path, extensions: List[str]) -> Iterator[Tuple[str, int, int]]:
+    """
+    Walk directory once, yielding (path, size, mtime_ns) for audio files.
+
+    Suffixes match case-insensitively. macOS "._" resource-fork files are
+    skipped, and symlinked directories are not followed.
+    """
+    suffixes = tuple(ext.lower() for ext in extensions)
+    stack = [str(directory)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.name.startswith('._'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.lower().endswith(suffixes) and entry.is_file():
+                        stat = entry.stat()
+                        yield entry.path, stat.st_size, stat.st_mtime_ns
+        except OSError as e:
+            print(f"Warning: Cannot read {current}: {e}")
+
+
+def manifest_path_for(library_path: Path) -> Path:
+    """Scan/import manifest file kept next to a library."""
+    return library_path.with_name(library_path.name + '.scan.json')
+
+
+# "objects": a list of TrackMetadata (default)
+# "columnar": NumPy columns, tracks materialised on access (large libraries)
+# "sqlite": SQLite database with indexes and full-text search
+STORAGE_MODES = ('objects', 'columnar', 'sqlite')
+
+
+def default_storage(library_path: Optional[Path]) -> str:
+    """Storage mode implied by a library file's extension."""
+    if library_path and is_sqlite_library(library_path):
+        return 'sqlite'
+    if library_path and is_binary_library(library_path):
+        return 'columnar'
+    return 'objects'
 
 
 class TrackLibrary:
     """Manages a collection of tracks with metadata."""
 
-    def __init__(self, library_path: Optional[Path] = None):
+    def __init__(
+        self,
+        library_path: Optional[Path] = None,
+        storage: Optional[str] = None,
+        compact: bool = False
+    ):
         """
         Initialize track library.
 
         Args:
-            library_path: Path to library database (JSON file)
+            library_path: Path to library database (JSON, binary .tlib or SQLite .db)
+            storage: 'objects', 'columnar' or 'sqlite' (see STORAGE_MODES).
+                Defaults to the mode implied by the file extension.
+            compact: In 'objects' mode, load tracks as CompactTrackMetadata
         """
+        if storage is None:
+            storage = default_storage(library_path)
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode: {storage} (choose from {', '.join(STORAGE_MODES)})")
+
         self.library_path = library_path
-        self.tracks: List[TrackMetadata] = []
+        self.storage = storage
+        self.compact = compact
+        self.tracks: Sequence[TrackMetadata] = []
+
+        # path → (size, mtime_ns) of files read by scan_directory()
+        self.scan_manifest: Dict[str, Tuple[int, int]] = {}
+
+        # path → MODIFIED_DATE/TIME stamp of entries read by import_nml()
+        self.nml_manifest: Dict[str, str] = {}
+
+        # Object-mode indices (columnar mode filters the columns instead)
         self.tracks_by_key: Dict[MusicalKey, List[TrackMetadata]] = {}
         self.tracks_by_bpm: Dict[int, List[TrackMetadata]] = {}
 
+        # Sorted BPM index: _bpm_sorted[i] is the BPM of tracks[_bpm_positions[i]]
+        self._bpm_sorted: List[float] = []
+        self._bpm_positions: List[int] = []
+
+        # Bumped on every change to the track list, so caches built from
+        # the tracks (e.g. ScoreMatrix) know when they are stale
+        self.version = 0
+
+        # Running aggregates behind stats(); stores compute theirs on first use
+        self._statistics: Optional[LibraryStats] = LibraryStats()
+
+        # Columnar or SQLite backend; both answer queries with row positions
+        self._store: Optional[Union[ColumnarTrackStore, SQLiteTrackStore]] = None
+        if storage == 'columnar':
+            self._use_store(ColumnarTrackStore())
+        elif storage == 'sqlite':
+            if library_path and is_sqlite_library(library_path):
+                # The database is the library: open it in place
+                self._use_store(SQLiteTrackStore(library_path))
+                self._load_manifest(library_path)
+                return
+            self._use_store(SQLiteTrackStore())
+
         if library_path and library_path.exists():
             self.load()
 
+    def _use_store(self, store: Union[ColumnarTrackStore, SQLiteTrackStore]) -> None:
+        """Switch to a columnar or SQLite backend."""
+        self._store = store
+        self.tracks = LazyTrackList(store)
+        self._statistics = None
+        self.version += 1
+
+    def _tracks_at(self, positions) -> List[TrackMetadata]:
+        """Tracks at the given row positions (materialising only those rows)."""
+        return [self.tracks[i] for i in positions]
+
     def add_track(self, track: TrackMetadata) -> None:
         """Add a track to the library."""
+        self.version += 1
+        if self._store is not None:
+            self._store.append_track(track)
+            if self._statistics is not None:
+                self._statistics.add_track(track)
+            return
+
+        position = len(self.tracks)
         self.tracks.append(track)
+        self._index_track(track)
+
+        # Sorted BPM index (insert after equal BPMs to keep insertion order)
+        i = bisect.bisect_right(self._bpm_sorted, track.bpm)
+        self._bpm_sorted.insert(i, track.bpm)
+        self._bpm_positions.insert(i, position)
+
+    def _index_track(self, track: TrackMetadata) -> None:
+        """Add a track to the key and integer-BPM bucket indices and the statistics."""
+        self._statistics.add_track(track)
 
         # Index by key
         if track.key:
@@ -47,33 +182,345 @@ class TrackLibrary:
             self.tracks_by_bpm[bpm_int] = []
         self.tracks_by_bpm[bpm_int].append(track)
 
+    def _rebuild_indices(self) -> None:
+        """Rebuild every index from self.tracks."""
+        self.tracks_by_key = {}
+        self.tracks_by_bpm = {}
+        self._statistics = LibraryStats()
+        self.version += 1
+        for track in self.tracks:
+            self._index_track(track)
+
+        self._bpm_positions = sorted(range(len(self.tracks)), key=lambda i: self.tracks[i].bpm)
+        self._bpm_sorted = [self.tracks[i].bpm for i in self._bpm_positions]
+
     def scan_directory(
         self,
         directory: Path,
-        extensions: List[str] = ['.wav', '.aiff', '.mp3', '.flac']
+        extensions: List[str] = ['.wav', '.aiff', '.mp3', '.flac'],
+        workers: int = SCAN_WORKERS_DEFAULT,
+        progress: bool = True
     ) -> int:
         """
         Scan a directory for audio files and extract basic metadata.
 
+        The tree is walked once with os.scandir and tags are read in a thread
+        pool. Each scanned file's (size, mtime) is kept in scan_manifest, so
+        re-scanning the same directory only re-reads new or changed files and
+        drops tracks whose files are gone. Changed files only have their tag
+        fields refreshed; energy, textures, cues etc. are kept.
+
         Args:
             directory: Directory to scan
             extensions: Audio file extensions to include
+            workers: Threads reading tags
+            progress: Print progress, files/s and a summary
+
+        Returns:
+            Number of tracks added
+        """
+        started = time.perf_counter()
+        prefix = os.path.join(str(directory), '')
+
+        found = {path: (size, mtime) for path, size, mtime in _walk_audio_files(directory, extensions)}
+
+        # Tracks already in the library from this directory
+        existing = {}
+        for i, track in enumerate(self.tracks):
+            path = str(track.file_path)
+            if path.startswith(prefix):
+                existing[path] = i
+
+        # New files, skipping ones that failed to read before and haven't changed
+        new_paths = sorted(
+            p for p in found
+            if p not in existing and self.scan_manifest.get(p) != found[p]
+        )
+        changed_paths = sorted(
+            p for p in found
+            if p in existing and self.scan_manifest.get(p) != found[p]
+        )
+        removed_paths = {p for p in existing if p not in found}
+
+        to_read = new_paths + changed_paths
+        tags_by_path, failures = self._read_tags_parallel(to_read, workers, progress)
+
+        # Refresh tag fields on changed tracks
+        updated = 0
+        for path in changed_paths:
+            tags = tags_by_path.get(path)
+            if tags is None:
+                continue
+            self._apply_fields(self.tracks[existing[path]], tags)
+            updated += 1
+
+        if removed_paths or updated:
+            self._replace_tracks(
+                [t for t in self.tracks if str(t.file_path) not in removed_paths])
+
+        added = 0
+        for path in new_paths:
+            tags = tags_by_path.get(path)
+            if tags is not None:
+                self.add_track(self._track_from_tags(Path(path), tags))
+                added += 1
+
+        # Manifest: every file seen under this directory (unreadable ones too,
+        # so they are only retried once they change)
+        for path in list(self.scan_manifest):
+            if path.startswith(prefix) and path not in found:
+                del self.scan_manifest[path]
+        self.scan_manifest.update(found)
+
+        if progress:
+            elapsed = time.perf_counter() - started
+            unchanged = len(found) - len(to_read)
+            print(f"✓ Scanned {len(found)} files in {elapsed:.1f}s: {added} added, "
+                  f"{updated} updated, {len(removed_paths)} removed, {unchanged} unchanged")
+            if failures:
+                print(f"⚠ Could not read {len(failures)} files:")
+                for path, error in failures[:10]:
+                    print(f"  {path}: {error}")
+                if len(failures) > 10:
+                    print(f"  ... and {len(failures) - 10} more")
+
+        return added
+
+    def import_nml(self, nml_path: Path, progress: bool = True) -> int:
+        """
+        Import or refresh tracks from Traktor's collection.nml.
+
+        The NML is streamed in one pass (see nml.iter_collection). Each
+        entry's MODIFIED_DATE/TIME is kept in nml_manifest, so importing the
+        same collection again only re-reads entries Traktor has changed,
+        adds new ones and drops tracks whose entries are gone. Refreshed
+        tracks only have their NML fields replaced (bpm, key, duration,
+        loudness, beatgrid anchor, cues, title/artist/label/genre/year);
+        energy, textures, journey position and notes are kept. Entries
+        Traktor hasn't analysed (no BPM) are skipped.
+
+        Args:
+            nml_path: Path to collection.nml
+            progress: Print a summary
 
         Returns:
             Number of tracks added
         """
-        count = 0
-        for ext in extensions:
-            for file_path in directory.rglob(f'*{ext}'):
+        started = time.perf_counter()
+        existing = {str(t.file_path): i for i, t in enumerate(self.tracks)}
+
+        seen: Dict[str, str] = {}
+        new_tracks = []
+        updated = 0
+        unanalysed = 0
+        for entry in iter_collection(nml_path):
+            path = entry_path(entry)
+            if path is None or str(path) in seen:
+                continue
+            stamp = entry_modified(entry)
+            seen[str(path)] = stamp
+
+            if str(path) in existing:
+                if self.nml_manifest.get(str(path)) != stamp:
+                    self._apply_fields(self.tracks[existing[str(path)]], entry_fields(entry))
+                    updated += 1
+                continue
+
+            fields = entry_fields(entry)
+            if 'bpm' not in fields:
+                unanalysed += 1
+                continue
+            new_tracks.append(TrackMetadata(
+                file_path=path,
+                title=fields.pop('title', path.stem),
+                artist=fields.pop('artist', 'Unknown'),
+                **fields
+            ))
+
+        # Tracks imported from this collection before whose entries are gone
+        removed_paths = {p for p in self.nml_manifest if p not in seen and p in existing}
+        if removed_paths or updated:
+            self._replace_tracks(
+                [t for t in self.tracks if str(t.file_path) not in removed_paths])
+
+        for track in new_tracks:
+            self.add_track(track)
+        self.nml_manifest = seen
+
+        if progress:
+            elapsed = time.perf_counter() - started
+            unchanged = len(seen) - len(new_tracks) - updated - unanalysed
+            print(f"✓ Read {len(seen)} entries in {elapsed:.1f}s: {len(new_tracks)} added, "
+                  f"{updated} updated, {len(removed_paths)} removed, {unchanged} unchanged")
+            if unanalysed:
+                print(f"⚠ Skipped {unanalysed} entries with no BPM (not analysed in Traktor)")
+
+        return len(new_tracks)
+
+    @classmethod
+    def from_nml(
+        cls,
+        nml_path: Path,
+        library_path: Optional[Path] = None,
+        storage: Optional[str] = None,
+        progress: bool = True
+    ) -> 'TrackLibrary':
+        """
+        Build a library from Traktor's collection.nml.
+
+        If library_path exists it is loaded and refreshed incrementally
+        (see import_nml); save() writes it back.
+        """
+        library = cls(library_path, storage=storage)
+        library.import_nml(nml_path, progress=progress)
+        return library
+
+    @staticmethod
+    def _apply_fields(track: TrackMetadata, fields: dict) -> None:
+        """Set fields on a track (as tuples where the track holds tuples)."""
+        for field, value in fields.items():
+            if isinstance(value, list) and isinstance(getattr(track, field), tuple):
+                value = tuple(value)
+            setattr(track, field, value)
+
+    def _read_tags_parallel(
+        self,
+        paths: List[str],
+        workers: int,
+        progress: bool
+    ) -> Tuple[Dict[str, dict], List[Tuple[str, str]]]:
+        """Read tags for paths in a thread pool. Returns (tags by path, failures)."""
+        tags_by_path = {}
+        failures = []
+        if not paths:
+            return tags_by_path, failures
+
+        started = time.perf_counter()
+        last_report = started
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(self._read_tags, Path(p)): p for p in paths}
+            for done, future in enumerate(as_completed(futures), 1):
+                path = futures[future]
                 try:
-                    track = self.extract_metadata(file_path)
-                    if track:
-                        self.add_track(track)
-                        count += 1
+                    tags = future.result()
                 except Exception as e:
-                    print(f"Warning: Failed to process {file_path}: {e}")
+                    failures.append((path, str(e)))
+                else:
+                    if tags is None:
+                        failures.append((path, "not a recognised audio file"))
+                    else:
+                        tags_by_path[path] = tags
+
+                now = time.perf_counter()
+                if progress and (now - last_report >= 0.5 or done == len(paths)):
+                    rate = done / max(now - started, 1e-9)
+                    print(f"  Reading tags: {done}/{len(paths)} ({rate:.0f} files/s)",
+                          end='\r' if done < len(paths) else '\n', flush=True)
+                    last_report = now
+
+        return tags_by_path, failures
+
+    def update_tracks(self, fields_by_path: Dict[str, dict]) -> int:
+        """
+        Set fields on tracks by file path (e.g. classified energy and textures).
+
+        Args:
+            fields_by_path: File path → TrackMetadata fields to set
 
-        return count
+        Returns:
+            Number of tracks updated
+        """
+        if not fields_by_path:
+            return 0
+        tracks = list(self.tracks)
+        updated = 0
+        for track in tracks:
+            fields = fields_by_path.get(str(track.file_path))
+            if fields:
+                self._apply_fields(track, fields)
+                updated += 1
+        if updated:
+            self._replace_tracks(tracks)
+        return updated
+
+    def _replace_tracks(self, tracks: List[TrackMetadata]) -> None:
+        """Replace the library contents (after removals or in-place edits)."""
+        if self._store is None:
+            self.tracks = tracks
+            self._rebuild_indices()
+            return
+
+        rows = [t.to_dict() for t in tracks]
+        if isinstance(self._store, SQLiteTrackStore):
+            self._store.replace_rows(rows)
+            self._statistics = None
+            self.version += 1
+        else:
+            store = ColumnarTrackStore()
+            store.append_rows(rows)
+            self._use_store(store)
+
+    @staticmethod
+    def _read_tags(file_path: Path) -> Optional[dict]:
+        """
+        Read TrackMetadata fields present in a file's tags.
+
+        Returns:
+            Dict of the fields found (title, artist, bpm, duration, genre,
+            year), or None if mutagen doesn't recognise the file
+        """
+        audio = MutagenFile(file_path, easy=True)
+
+        if audio is None:
+            return None
+
+        tags = {'duration': getattr(audio.info, 'length', 0.0)}
+
+        # Extract basic info
+        if audio.get('title'):
+            tags['title'] = audio['title'][0]
+        if audio.get('artist'):
+            tags['artist'] = audio['artist'][0]
+
+        # Try to extract BPM from tags
+        if hasattr(audio, 'tags') and audio.tags:
+            # Try various BPM tag names
+            for bpm_tag in ['BPM', 'bpm', 'TBPM']:
+                if bpm_tag in audio.tags:
+                    try:
+                        tags['bpm'] = float(str(audio.tags[bpm_tag][0]))
+                        break
+                    except (ValueError, IndexError):
+                        pass
+
+        # Extract genre
+        genre = audio.get('genre', [])
+        if isinstance(genre, str):
+            genre = [genre]
+        tags['genre'] = genre
+
+        # Extract year
+        date = audio.get('date', [None])[0]
+        if date:
+            try:
+                tags['year'] = int(str(date)[:4])
+            except (ValueError, TypeError):
+                pass
+
+        return tags
+
+    @staticmethod
+    def _track_from_tags(file_path: Path, tags: dict) -> TrackMetadata:
+        """Build a track from _read_tags() output, filling in defaults."""
+        return TrackMetadata(
+            file_path=file_path,
+            title=tags.get('title', file_path.stem),
+            artist=tags.get('artist', 'Unknown'),
+            bpm=tags.get('bpm', 120.0),  # Default BPM
+            duration=tags.get('duration', 0.0),
+            genre=tags.get('genre', []),
+            year=tags.get('year')
+        )
 
     def extract_metadata(self, file_path: Path) -> Optional[TrackMetadata]:
         """
@@ -86,56 +533,10 @@ class TrackLibrary:
             TrackMetadata or None if extraction fails
         """
         try:
-            audio = MutagenFile(file_path, easy=True)
-
-            if audio is None:
+            tags = self._read_tags(file_path)
+            if tags is None:
                 return None
-
-            # Extract basic info
-            title = audio.get('title', [file_path.stem])[0]
-            artist = audio.get('artist', ['Unknown'])[0]
-
-            # Get duration
-            duration = getattr(audio.info, 'length', 0.0)
-
-            # Try to extract BPM from tags
-            bpm = 120.0  # Default BPM
-            if hasattr(audio, 'tags') and audio.tags:
-                # Try various BPM tag names
-                for bpm_tag in ['BPM', 'bpm', 'TBPM']:
-                    if bpm_tag in audio.tags:
-                        try:
-                            bpm = float(str(audio.tags[bpm_tag][0]))
-                            break
-                        except (ValueError, IndexError):
-                            pass
-
-            # Extract genre
-            genre = audio.get('genre', [])
-            if isinstance(genre, str):
-                genre = [genre]
-
-            # Extract year
-            year = None
-            date = audio.get('date', [None])[0]
-            if date:
-                try:
-                    year = int(str(date)[:4])
-                except (ValueError, TypeError):
-                    pass
-
-            # Create track metadata
-            track = TrackMetadata(
-                file_path=file_path,
-                title=title,
-                artist=artist,
-                bpm=bpm,
-                duration=duration,
-                genre=genre,
-                year=year
-            )
-
-            return track
+            return self._track_from_tags(file_path, tags)
 
         except Exception as e:
             print(f"Error extracting metadata from {file_path}: {e}")
@@ -143,14 +544,47 @@ class TrackLibrary:
 
     def find_tracks_by_key(self, key: MusicalKey) -> List[TrackMetadata]:
         """Find all tracks in a specific key."""
+        if self._store is not None:
+            return self._tracks_at(self._store.key_positions(key))
         return self.tracks_by_key.get(key, [])
 
+    def _bpm_range_positions(self, min_bpm: float, max_bpm: float) -> List[int]:
+        """Positions in self.tracks with min_bpm <= bpm <= max_bpm, in BPM order."""
+        if self._store is not None:
+            return self._store.bpm_range_positions(min_bpm, max_bpm)
+        lo = bisect.bisect_left(self._bpm_sorted, min_bpm)
+        hi = bisect.bisect_right(self._bpm_sorted, max_bpm)
+        return self._bpm_positions[lo:hi]
+
     def find_tracks_by_bpm_range(self, min_bpm: float, max_bpm: float) -> List[TrackMetadata]:
-        """Find tracks within a BPM range."""
-        return [t for t in self.tracks if min_bpm <= t.bpm <= max_bpm]
+        """
+        Find tracks within a BPM range (inclusive).
+
+        Answered from the sorted BPM index in O(log n + k); tracks are
+        returned in ascending BPM order.
+        """
+        return self._tracks_at(self._bpm_range_positions(min_bpm, max_bpm))
+
+    def find_tracks_by_half_time_range(self, min_bpm: float, max_bpm: float) -> List[TrackMetadata]:
+        """
+        Find tracks that mix into a BPM range at half time.
+
+        e.g. a 120-124 range returns tracks between 60 and 62 BPM.
+        """
+        return self.find_tracks_by_bpm_range(min_bpm / 2, max_bpm / 2)
+
+    def find_tracks_by_double_time_range(self, min_bpm: float, max_bpm: float) -> List[TrackMetadata]:
+        """
+        Find tracks that mix into a BPM range at double time.
+
+        e.g. a 120-124 range returns tracks between 240 and 248 BPM.
+        """
+        return self.find_tracks_by_bpm_range(min_bpm * 2, max_bpm * 2)
 
     def find_tracks_by_energy(self, energy_level: int, tolerance: int = 1) -> List[TrackMetadata]:
         """Find tracks with specific energy level (±tolerance)."""
+        if self._store is not None:
+            return self._tracks_at(self._store.energy_positions(energy_level, tolerance))
         return [
             t for t in self.tracks
             if abs(t.energy_level - energy_level) <= tolerance
@@ -158,14 +592,40 @@ class TrackLibrary:
 
     def find_tracks_by_texture(self, texture: TextureType) -> List[TrackMetadata]:
         """Find tracks with specific texture."""
+        if self._store is not None:
+            return self._tracks_at(self._store.texture_positions(texture))
         return [t for t in self.tracks if texture in t.textures]
 
     def find_tracks_by_label(self, label: str) -> List[TrackMetadata]:
         """Find tracks from a specific label."""
+        if self._store is not None:
+            return self._tracks_at(self._store.label_positions(label))
         return [t for t in self.tracks if t.label and label.lower() in t.label.lower()]
 
+    def search(self, text: str) -> List[TrackMetadata]:
+        """
+        Find tracks whose title, artist or label contain every word of text.
+
+        SQLite libraries answer from the FTS5 index, where words match as
+        prefixes ("spher" finds "Spherical"); other modes match substrings.
+        """
+        if isinstance(self._store, SQLiteTrackStore):
+            return self._tracks_at(self._store.search_positions(text))
+
+        words = text.lower().split()
+        if not words:
+            return []
+        matches = []
+        for track in self.tracks:
+            haystack = f"{track.title} {track.artist} {track.label or ''}".lower()
+            if all(w in haystack for w in words):
+                matches.append(track)
+        return matches
+
     def find_tracks_by_journey_position(self, position: JourneyPosition) -> List[TrackMetadata]:
         """Find tracks suitable for a specific journey position."""
+        if self._store is not None:
+            return self._tracks_at(self._store.journey_position_positions(position))
         return [t for t in self.tracks if t.journey_position == position]
 
     def get_compatible_tracks(
@@ -177,36 +637,50 @@ class TrackLibrary:
         """
         Find tracks compatible with a reference track.
 
+        BPM candidates come from the sorted BPM index: one range each for
+        straight (x1), double-time (x2) and half-time (x0.5) mixing. Keys are
+        checked against the precomputed COMPATIBLE_KEYS table, so the cost is
+        O(log n + k) rather than a scan of the whole library. Columnar
+        libraries answer the same query as one vectorised mask, SQLite
+        libraries as one indexed query.
+
         Args:
             reference_track: Track to find compatible matches for
             bpm_tolerance: BPM tolerance percentage (default: 6%)
             key_compatible_only: Only return tracks in compatible keys
 
         Returns:
-            List of compatible tracks
+            List of compatible tracks, in library order
         """
+        ref_bpm = reference_track.bpm
+        tolerance = bpm_tolerance / 100.0
+
+        allowed_keys = None
+        if key_compatible_only and reference_track.key:
+            allowed_keys = COMPATIBLE_KEYS[reference_track.key]
+
+        if self._store is not None:
+            positions = self._store.compatible_positions(ref_bpm, tolerance, allowed_keys)
+        else:
+            positions = []
+            for ratio in (1.0, 2.0, 0.5):
+                positions.extend(self._bpm_range_positions(ref_bpm * (ratio - tolerance),
+                                                           ref_bpm * (ratio + tolerance)))
+            if tolerance >= 0.25:
+                # Windows only overlap at very wide tolerances
+                positions = set(positions)
+            positions = sorted(positions)
+
+        tracks = self.tracks
         compatible = []
-
-        for track in self.tracks:
-            if track == reference_track:
+        for i in positions:
+            track = tracks[i]
+            # Equal tracks share a BPM; checking it first skips most of the
+            # field-by-field dataclass comparison
+            if track.bpm == ref_bpm and track == reference_track:
                 continue
-
-            # Check BPM compatibility
-            bpm_ratio = track.bpm / reference_track.bpm
-            bpm_ok = (
-                abs(bpm_ratio - 1.0) <= bpm_tolerance / 100.0 or
-                abs(bpm_ratio - 2.0) <= bpm_tolerance / 100.0 or
-                abs(bpm_ratio - 0.5) <= bpm_tolerance / 100.0
-            )
-
-            if not bpm_ok:
+            if allowed_keys is not None and track.key and track.key not in allowed_keys:
                 continue
-
-            # Check key compatibility if required
-            if key_compatible_only and reference_track.key and track.key:
-                if not self.are_keys_compatible(reference_track.key, track.key):
-                    continue
-
             compatible.append(track)
 
         return compatible
@@ -220,85 +694,141 @@ class TrackLibrary:
         - Same key
         - Adjacent keys (±1 on the circle)
         - Same number, different letter (relative major/minor)
-        """
-        if key1 == key2:
-            return True
-
-        # Extract Camelot number and letter
-        num1 = int(key1.value[:-1])
-        letter1 = key1.value[-1]
-        num2 = int(key2.value[:-1])
-        letter2 = key2.value[-1]
 
-        # Same number, different letter (relative major/minor)
-        if num1 == num2:
-            return True
-
-        # Adjacent on the circle (same letter)
-        if letter1 == letter2:
-            diff = abs(num1 - num2)
-            return diff == 1 or diff == 11  # Adjacent or wrapping around
-
-        return False
+        Looked up in the table precomputed by track_selector.harmonic.
+        """
+        return key2 in COMPATIBLE_KEYS[key1]
 
     def to_dataframe(self) -> pd.DataFrame:
-        """Convert library to pandas DataFrame for analysis."""
+        """
+        Convert library to pandas DataFrame for analysis.
+
+        Columnar and SQLite libraries return their indexable columns directly
+        (see ColumnarTrackStore.dataframe) instead of one dict per track.
+        """
+        if self._store is not None:
+            return self._store.dataframe()
         data = [track.to_dict() for track in self.tracks]
         return pd.DataFrame(data)
 
+    def _load_manifest(self, library_path: Path) -> None:
+        manifest_path = manifest_path_for(library_path)
+        if manifest_path.exists():
+            with open(manifest_path, 'r') as f:
+                data = json.load(f)
+            if 'files' not in data:
+                # Older manifests held only the scanned files
+                data = {'files': data}
+            self.scan_manifest = {p: tuple(stamp) for p, stamp in data['files'].items()}
+            self.nml_manifest = data.get('nml', {})
+
+    def _save_manifest(self, library_path: Path) -> None:
+        if self.scan_manifest or self.nml_manifest:
+            with open(manifest_path_for(library_path), 'w') as f:
+                json.dump({'files': self.scan_manifest, 'nml': self.nml_manifest}, f)
+
     def save(self, file_path: Optional[Path] = None) -> None:
-        """Save library to JSON file."""
+        """Save library to JSON, or to the binary (.tlib) / SQLite (.db) formats."""
         path = file_path or self.library_path
         if not path:
             raise ValueError("No library path specified")
 
+        self._save_manifest(Path(path))
+
+        if isinstance(self._store, SQLiteTrackStore):
+            if self._store.path != ':memory:' and Path(self._store.path).resolve() == Path(path).resolve():
+                # Saving an open database in place: write back edits and commit
+                self._store.flush()
+                return
+
+        rows = self._rows()
+
+        if is_sqlite_library(path):
+            write_sqlite_library(path, rows)
+            return
+
+        if is_binary_library(path):
+            write_binary_library(path, rows)
+            return
+
         data = {
-            'tracks': [track.to_dict() for track in self.tracks],
+            'tracks': rows,
             'version': '0.1.0'
         }
 
         with open(path, 'w') as f:
             json.dump(data, f, indent=2)
 
+    def _rows(self) -> List[dict]:
+        """Every track as a to_dict() row, in library order."""
+        if isinstance(self._store, SQLiteTrackStore):
+            return list(self._store.iter_rows())
+        if self._store is not None:
+            return [self._store.row_dict(i) for i in range(len(self._store))]
+        return [track.to_dict() for track in self.tracks]
+
     def load(self, file_path: Optional[Path] = None) -> None:
-        """Load library from JSON file."""
+        """Load library from JSON, or from the binary (.tlib) / SQLite (.db) formats."""
         path = file_path or self.library_path
         if not path or not path.exists():
             raise ValueError(f"Library file not found: {path}")
 
-        with open(path, 'r') as f:
-            data = json.load(f)
-
-        self.tracks = [TrackMetadata.from_dict(t) for t in data['tracks']]
+        self._load_manifest(path)
+
+        with stage("read file"):
+            if is_sqlite_library(path):
+                source = SQLiteTrackStore(path)
+                if self.storage == 'sqlite':
+                    self._use_store(source)
+                    return
+                rows = list(source.iter_rows())
+                source.close()
+            elif is_binary_library(path):
+                source = read_binary_library(path)
+                if self.storage == 'columnar':
+                    self._use_store(source)
+                    return
+                rows = [source.row_dict(i) for i in range(len(source))]
+            else:
+                with open(path, 'r') as f:
+                    rows = json.load(f)['tracks']
+
+        self._load_rows(rows)
+
+    def _load_rows(self, rows: List[dict]) -> None:
+        """Replace the tracks with to_dict() rows, in the library's storage mode."""
+        with stage("build tracks"):
+            if self.storage == 'columnar':
+                store = ColumnarTrackStore()
+                store.append_rows(rows)
+                self._use_store(store)
+                return
+            if self.storage == 'sqlite':
+                store = SQLiteTrackStore()
+                store.append_rows(rows)
+                self._use_store(store)
+                return
+
+            track_class = CompactTrackMetadata if self.compact else TrackMetadata
+            self.tracks = [track_class.from_dict(t) for t in rows]
 
         # Rebuild indices
-        self.tracks_by_key = {}
-        self.tracks_by_bpm = {}
-        for track in self.tracks:
-            if track.key:
-                if track.key not in self.tracks_by_key:
-                    self.tracks_by_key[track.key] = []
-                self.tracks_by_key[track.key].append(track)
+        with stage("index build"):
+            self._rebuild_indices()
 
-            bpm_int = int(track.bpm)
-            if bpm_int not in self.tracks_by_bpm:
-                self.tracks_by_bpm[bpm_int] = []
-            self.tracks_by_bpm[bpm_int].append(track)
+    @property
+    def statistics(self) -> LibraryStats:
+        """
+        Running aggregates and distributions (see LibraryStats).
+
+        Object-mode libraries keep them up to date in add_track() and
+        load(); columnar and SQLite libraries compute them from their
+        columns / indexes on first use, then update them on add_track().
+        """
+        if self._statistics is None:
+            self._statistics = self._store.library_stats()
+        return self._statistics
 
     def stats(self) -> Dict:
         """Get library statistics."""
-        if not self.tracks:
-            return {'total_tracks': 0}
-
-        bpms = [t.bpm for t in self.tracks]
-        energies = [t.energy_level for t in self.tracks]
-
-        return {
-            'total_tracks': len(self.tracks),
-            'bpm_range': (min(bpms), max(bpms)),
-            'bpm_average': sum(bpms) / len(bpms),
-            'energy_range': (min(energies), max(energies)),
-            'energy_average': sum(energies) / len(energies),
-            'keys_represented': len(self.tracks_by_key),
-            'labels': len(set(t.label for t in self.tracks if t.label))
-        }
+        return self.statistics.summary()
@@ -0,0 +1,259 @@
+"""Fast title/artist/filename matching against a track library."""
+
+import re
+from collections import defaultdict
+from typing import Dict, FrozenSet, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+from .models import TrackMetadata
+
+T = TypeVar('T')
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+_TRACK_NUMBER_PREFIX = re.compile(r'^\d+-')
+
+# Tokens in more than this share of entries are too common to generate candidates
+# ("remix", "dub", "the"), unless the query has nothing rarer
+COMMON_TOKEN_FRACTION = 0.05
+
+
+def normalize_name(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return ' '.join(_PUNCTUATION.sub('', text.lower()).split())
+
+
+def split_artist_title(name: str) -> Tuple[str, str]:
+    """
+    Split an "Artist - Title" (or "01-Artist - Title") name.
+
+    Returns:
+        (artist, title); ("Unknown", name) if there is no " - " separator
+    """
+    cleaned = _TRACK_NUMBER_PREFIX.sub('', name)
+    if ' - ' not in cleaned:
+        return "Unknown", name
+    artist, title = cleaned.split(' - ', 1)
+    return artist.strip(), title.strip()
+
+
+def _trigrams(norm: str) -> FrozenSet[str]:
+    if len(norm) < 3:
+        return frozenset([norm]) if norm else frozenset()
+    return frozenset(norm[i:i + 3] for i in range(len(norm) - 2))
+
+
+def _similarity(a: str, b: str, a_tokens, b_tokens, a_grams, b_grams) -> float:
+    """
+    Score two normalised names from 0 to 1.
+
+    1.0 for equal names, 0.9 if one contains the other, otherwise the better
+    of word overlap (shared words / longer name's words) and the trigram
+    Dice coefficient (which tolerates typos).
+    """
+    if a == b:
+        return 1.0
+    if a and b and (a in b or b in a):
+        return 0.9
+    token_score = len(a_tokens & b_tokens) / max(len(a_tokens), len(b_tokens), 1)
+    gram_score = 2 * len(a_grams & b_grams) / max(len(a_grams) + len(b_grams), 1)
+    return max(token_score, gram_score)
+
+
+class NameIndex(Generic[T]):
+    """
+    Index of names → values for exact and fuzzy lookups.
+
+    Names are normalised (normalize_name). Exact lookups are a dict hit;
+    substring and fuzzy lookups only score entries found through word and
+    trigram posting lists, so they stay sub-linear in the number of names.
+    When several entries tie, the one added first wins.
+    """
+
+    def __init__(self, items: Iterable[Tuple[str, T]] = ()):
+        self.names: List[str] = []
+        self.values: List[T] = []
+        self._tokens: List[FrozenSet[str]] = []
+        self._grams: List[FrozenSet[str]] = []
+        self._exact: Dict[str, int] = {}
+        self._token_postings: Dict[str, List[int]] = defaultdict(list)
+        self._gram_postings: Dict[str, List[int]] = defaultdict(list)
+
+        for name, value in items:
+            self.add(name, value)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, name: str, value: T) -> None:
+        norm = normalize_name(name)
+        i = len(self.names)
+        tokens = frozenset(norm.split())
+        grams = _trigrams(norm)
+
+        self.names.append(norm)
+        self.values.append(value)
+        self._tokens.append(tokens)
+        self._grams.append(grams)
+        self._exact.setdefault(norm, i)
+        for token in tokens:
+            self._token_postings[token].append(i)
+        for gram in grams:
+            self._gram_postings[gram].append(i)
+
+    def exact(self, name: str) -> Optional[T]:
+        """Value whose normalised name equals name's."""
+        i = self._exact.get(normalize_name(name))
+        return self.values[i] if i is not None else None
+
+    def _containing_ids(self, norm: str) -> List[int]:
+        if not norm:
+            return []
+        grams = _trigrams(norm)
+        postings = sorted((self._gram_postings.get(g, []) for g in grams), key=len)
+        if not postings or not postings[0]:
+            return []
+        # Every trigram of the query must occur in a containing name
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+        return sorted(i for i in candidates if norm in self.names[i])
+
+    def _contained_in_ids(self, norm: str) -> List[int]:
+        if not norm:
+            return []
+        candidates = set()
+        for token in set(norm.split()):
+            candidates.update(self._token_postings.get(token, []))
+        return sorted(i for i in candidates if self.names[i] and self.names[i] in norm)
+
+    def containing(self, text: str) -> List[T]:
+        """Values whose name contains text, in insertion order."""
+        return [self.values[i] for i in self._containing_ids(normalize_name(text))]
+
+    def contained_in(self, text: str) -> List[T]:
+        """Values whose name occurs within text, in insertion order."""
+        return [self.values[i] for i in self._contained_in_ids(normalize_name(text))]
+
+    def _candidate_ids(self, norm: str, tokens: FrozenSet[str], grams: FrozenSet[str]) -> set:
+        limit = max(50, int(len(self.names) * COMMON_TOKEN_FRACTION))
+        postings = [self._token_postings[t] for t in tokens if t in self._token_postings]
+        rare = [p for p in postings if len(p) <= limit]
+
+        candidates = set()
+        for posting in (rare or postings):
+            candidates.update(posting)
+
+        # Words not in the index (typos): use their rarest trigrams instead
+        for token in tokens:
+            if token in self._token_postings:
+                continue
+            gram_postings = sorted(
+                (self._gram_postings[g] for g in _trigrams(token) if g in self._gram_postings),
+                key=len)
+            for posting in gram_postings[:2]:
+                if len(posting) <= limit:
+                    candidates.update(posting)
+
+        candidates.update(self._containing_ids(norm))
+        return candidates
+
+    def search(self, text: str, limit: int = 5, min_score: float = 0.0) -> List[Tuple[float, T]]:
+        """
+        Fuzzy lookup.
+
+        Returns:
+            Up to `limit` (score, value) pairs with score >= min_score, best first
+        """
+        norm = normalize_name(text)
+        tokens = frozenset(norm.split())
+        grams = _trigrams(norm)
+
+        scored = []
+        for i in self._candidate_ids(norm, tokens, grams):
+            score = _similarity(norm, self.names[i], tokens, self._tokens[i], grams, self._grams[i])
+            if score >= min_score:
+                scored.append((score, i))
+
+        scored.sort(key=lambda pair: (-pair[0], pair[1]))
+        return [(score, self.values[i]) for score, i in scored[:limit]]
+
+    def best(self, text: str, min_score: float = 0.5) -> Optional[T]:
+        """Best fuzzy match scoring at least min_score, or None."""
+        exact = self.exact(text)
+        if exact is not None:
+            return exact
+        results = self.search(text, limit=1, min_score=min_score)
+        return results[0][1] if results else None
+
+
+class TrackMatcher:
+    """
+    Find library tracks by title/artist or by filename.
+
+    Build once per library (O(n)); each lookup then goes through NameIndex
+    instead of looping over every track.
+    """
+
+    def __init__(self, tracks: Iterable[TrackMetadata]):
+        self.tracks: List[TrackMetadata] = list(tracks)
+        self.titles: NameIndex[int] = NameIndex()
+        self.artists: NameIndex[int] = NameIndex()
+        self._by_title_artist: Dict[Tuple[str, str], int] = {}
+
+        for i, track in enumerate(self.tracks):
+            self.titles.add(track.title, i)
+            self.artists.add(track.artist, i)
+            key = (normalize_name(track.title), normalize_name(track.artist))
+            self._by_title_artist.setdefault(key, i)
+
+    def _artist_matches(self, artist_norm: str, i: int) -> bool:
+        return artist_norm in self.artists.names[i]
+
+    def find(
+        self,
+        title: str,
+        artist: str,
+        fuzzy: bool = True,
+        min_score: float = 0.5
+    ) -> Optional[TrackMetadata]:
+        """
+        Find a track by title and artist.
+
+        Tries, in order: exact (normalised) title and artist; a track whose
+        title contains the given title and whose artist contains the given
+        artist; then, if fuzzy, the best fuzzy title match (score >= min_score)
+        whose artist contains the given artist.
+        """
+        title_norm = normalize_name(title)
+        artist_norm = normalize_name(artist)
+
+        i = self._by_title_artist.get((title_norm, artist_norm))
+        if i is not None:
+            return self.tracks[i]
+
+        for i in self.titles._containing_ids(title_norm):
+            if self._artist_matches(artist_norm, i):
+                return self.tracks[i]
+
+        if not fuzzy:
+            return None
+
+        for score, i in self.titles.search(title, limit=20, min_score=min_score):
+            if self._artist_matches(artist_norm, i):
+                return self.tracks[i]
+
+        return None
+
+    def find_by_artist(self, artist: str) -> Optional[TrackMetadata]:
+        """First track (in library order) whose artist contains artist."""
+        matches = self.artists.containing(artist)
+        return self.tracks[matches[0]] if matches else None
+
+    def find_by_filename(self, filename: str) -> Optional[TrackMetadata]:
+        """
+        First track (in library order) whose title contains the filename
+        stem or is contained in it.
+        """
+        matches = self.titles.containing(filename) + self.titles.contained_in(filename)
+        return self.tracks[min(matches)] if matches else None
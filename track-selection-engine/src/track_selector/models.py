@@ -1,10 +1,27 @@
 """Data models for track metadata and journey arcs."""
 
+from array import array
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple, Union
 import json
+import sys
+
+# Playlist JSON written by Playlist.to_json(). Version 1 (no "version"
+# key) is Playlist.to_dict(): full track dicts, repeated inside every
+# transition. Version 2 stores each track once, without empty fields,
+# and transitions refer to tracks by their index in "tracks".
+PLAYLIST_FORMAT_VERSION = 2
+
+# Track fields written to version 2 playlists even when empty
+# (TrackMetadata.from_dict requires them)
+PLAYLIST_TRACK_FIELDS_REQUIRED = ('file_path', 'title', 'artist', 'bpm')
+
+
+def without_empty(row: dict, keep: Tuple[str, ...] = ()) -> dict:
+    """row without None, '' and empty list/dict values, except the keys in keep."""
+    return {k: v for k, v in row.items() if k in keep or (v is not None and v != '' and v != [] and v != {})}
 
 
 class EnergyLevel(Enum):
@@ -35,6 +52,23 @@ class TextureType(Enum):
     ORGANIC = "organic"             # Natural, warm sounds
 
 
+# One bit per TextureType, in declaration order (fits a uint16)
+TEXTURE_BITS: Dict[TextureType, int] = {t: 1 << i for i, t in enumerate(TextureType)}
+
+
+def textures_to_mask(textures: List[TextureType]) -> int:
+    """Pack a list of textures into a bitmask."""
+    mask = 0
+    for texture in textures:
+        mask |= TEXTURE_BITS[texture]
+    return mask
+
+
+def mask_to_textures(mask: int) -> List[TextureType]:
+    """Unpack a texture bitmask into a list of textures."""
+    return [t for t, bit in TEXTURE_BITS.items() if mask & bit]
+
+
 class JourneyPosition(Enum):
     """Position in the DJ journey arc."""
     OPENER = "opener"               # Set opening (low energy)
@@ -99,6 +133,7 @@ class TrackMetadata:
     bpm: float
     key: Optional[MusicalKey] = None
     duration: float = 0.0            # Duration in seconds
+    loudness_db: Optional[float] = None   # Perceived loudness (Traktor LOUDNESS)
 
     # Energy and texture
     energy_level: int = 5            # 1-10 scale
@@ -121,6 +156,7 @@ class TrackMetadata:
     # Beat information
     num_beats: Optional[int] = None
     downbeats: List[float] = field(default_factory=list)
+    beatgrid_anchor: Optional[float] = None   # First downbeat of the beatgrid, seconds
 
     # Additional metadata
     year: Optional[int] = None
@@ -136,6 +172,7 @@ class TrackMetadata:
             'bpm': self.bpm,
             'key': self.key.value if self.key else None,
             'duration': self.duration,
+            'loudness_db': self.loudness_db,
             'energy_level': self.energy_level,
             'textures': [t.value for t in self.textures],
             'journey_position': self.journey_position.value if self.journey_position else None,
@@ -151,6 +188,7 @@ class TrackMetadata:
             ],
             'num_beats': self.num_beats,
             'downbeats': self.downbeats,
+            'beatgrid_anchor': self.beatgrid_anchor,
             'year': self.year,
             'tags': self.tags,
             'notes': self.notes
@@ -166,6 +204,7 @@ class TrackMetadata:
             bpm=data['bpm'],
             key=MusicalKey(data['key']) if data.get('key') else None,
             duration=data.get('duration', 0.0),
+            loudness_db=data.get('loudness_db'),
             energy_level=data.get('energy_level', 5),
             textures=[TextureType(t) for t in data.get('textures', [])],
             journey_position=JourneyPosition(data['journey_position']) if data.get('journey_position') else None,
@@ -180,12 +219,138 @@ class TrackMetadata:
             ],
             num_beats=data.get('num_beats'),
             downbeats=data.get('downbeats', []),
+            beatgrid_anchor=data.get('beatgrid_anchor'),
             year=data.get('year'),
             tags=data.get('tags', []),
             notes=data.get('notes', '')
         )
 
 
+@dataclass(slots=True)
+class CompactTrackMetadata:
+    """
+    Memory-compact TrackMetadata for large libraries.
+
+    Same fields and to_dict()/from_dict() format as TrackMetadata, but
+    slotted (no per-instance __dict__), with artist, label, genre and tag
+    strings interned, textures packed into texture_mask (the textures
+    property still returns a list, in TextureType order) and downbeats held
+    as a float32 array.
+    genre, tags and cue_points are tuples, so edit them by reassignment.
+    """
+    # File information
+    file_path: Path
+    title: str
+    artist: str
+
+    # Musical analysis
+    bpm: float
+    key: Optional[MusicalKey] = None
+    duration: float = 0.0
+    loudness_db: Optional[float] = None
+
+    # Energy and texture
+    energy_level: int = 5
+    texture_mask: int = 0            # See TEXTURE_BITS
+
+    # Journey classification
+    journey_position: Optional[JourneyPosition] = None
+
+    # Label and style
+    label: Optional[str] = None
+    genre: Tuple[str, ...] = ()
+
+    # Cue points
+    intro_start: Optional[float] = None
+    intro_end: Optional[float] = None
+    outro_start: Optional[float] = None
+    outro_end: Optional[float] = None
+    cue_points: Tuple[CuePoint, ...] = ()
+
+    # Beat information
+    num_beats: Optional[int] = None
+    downbeats: Union[array, Tuple[float, ...]] = ()   # array('f') when present
+    beatgrid_anchor: Optional[float] = None
+
+    # Additional metadata
+    year: Optional[int] = None
+    tags: Tuple[str, ...] = ()
+    notes: str = ""
+
+    @property
+    def textures(self) -> List[TextureType]:
+        return mask_to_textures(self.texture_mask)
+
+    @textures.setter
+    def textures(self, textures: List[TextureType]) -> None:
+        self.texture_mask = textures_to_mask(textures)
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for serialization (same format as TrackMetadata)."""
+        return {
+            'file_path': str(self.file_path),
+            'title': self.title,
+            'artist': self.artist,
+            'bpm': self.bpm,
+            'key': self.key.value if self.key else None,
+            'duration': self.duration,
+            'loudness_db': self.loudness_db,
+            'energy_level': self.energy_level,
+            'textures': [t.value for t in self.textures],
+            'journey_position': self.journey_position.value if self.journey_position else None,
+            'label': self.label,
+            'genre': list(self.genre),
+            'intro_start': self.intro_start,
+            'intro_end': self.intro_end,
+            'outro_start': self.outro_start,
+            'outro_end': self.outro_end,
+            'cue_points': [
+                {'time': cp.time, 'label': cp.label, 'color': cp.color, 'confidence': cp.confidence}
+                for cp in self.cue_points
+            ],
+            'num_beats': self.num_beats,
+            # float32 keeps ~7 significant digits; round off the float32 noise
+            'downbeats': [round(t, 4) for t in self.downbeats],
+            'beatgrid_anchor': self.beatgrid_anchor,
+            'year': self.year,
+            'tags': list(self.tags),
+            'notes': self.notes
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'CompactTrackMetadata':
+        """Create from dictionary (TrackMetadata.to_dict() format)."""
+        label = data.get('label')
+        downbeats = data.get('downbeats', [])
+        return cls(
+            file_path=Path(data['file_path']),
+            title=data['title'],
+            artist=sys.intern(data['artist']),
+            bpm=data['bpm'],
+            key=MusicalKey(data['key']) if data.get('key') else None,
+            duration=data.get('duration', 0.0),
+            loudness_db=data.get('loudness_db'),
+            energy_level=data.get('energy_level', 5),
+            texture_mask=textures_to_mask([TextureType(t) for t in data.get('textures', [])]),
+            journey_position=JourneyPosition(data['journey_position']) if data.get('journey_position') else None,
+            label=sys.intern(label) if label else label,
+            genre=tuple(sys.intern(g) for g in data.get('genre', [])),
+            intro_start=data.get('intro_start'),
+            intro_end=data.get('intro_end'),
+            outro_start=data.get('outro_start'),
+            outro_end=data.get('outro_end'),
+            cue_points=tuple(
+                CuePoint(**cp) for cp in data.get('cue_points', [])
+            ),
+            num_beats=data.get('num_beats'),
+            downbeats=array('f', downbeats) if downbeats else (),
+            beatgrid_anchor=data.get('beatgrid_anchor'),
+            year=data.get('year'),
+            tags=tuple(sys.intern(t) for t in data.get('tags', [])),
+            notes=data.get('notes', '')
+        )
+
+
 @dataclass
 class JourneyArc:
     """Represents a complete DJ journey arc."""
@@ -221,6 +386,22 @@ class JourneyArc:
             'blend_duration': self.blend_duration
         }
 
+    @classmethod
+    def from_dict(cls, data: dict) -> 'JourneyArc':
+        """Create from dictionary."""
+        return cls(
+            name=data.get('name', ''),
+            description=data.get('description', ''),
+            duration_minutes=data.get('duration_minutes', 0),
+            key_center=MusicalKey(data['key_center']) if data.get('key_center') else None,
+            bpm_range=tuple(data.get('bpm_range', (118, 124))),
+            energy_curve=data.get('energy_curve', []),
+            num_tracks=data.get('num_tracks', 0),
+            required_textures=[TextureType(t) for t in data.get('required_textures', [])],
+            preferred_labels=data.get('preferred_labels', []),
+            blend_duration=data.get('blend_duration', 60)
+        )
+
 
 @dataclass
 class Transition:
@@ -259,6 +440,13 @@ class Transition:
             'notes': self.notes
         }
 
+    def to_ref_dict(self, track_a: int, track_b: int) -> dict:
+        """Version 2 playlist entry: tracks as indices into the playlist's tracks, no empty fields."""
+        row = self.to_dict()
+        row['track_a'] = track_a
+        row['track_b'] = track_b
+        return without_empty(row)
+
 
 @dataclass
 class Playlist:
@@ -296,10 +484,69 @@ class Playlist:
             'created_at': self.created_at
         }
 
-    def to_json(self, file_path: Path) -> None:
-        """Save playlist to JSON file."""
+    def to_json(self, file_path: Path, version: int = PLAYLIST_FORMAT_VERSION) -> None:
+        """
+        Save playlist to JSON file.
+
+        Version 2 (the default) is written a track or transition per line,
+        without building the whole document in memory:
+
+            {
+              "version": 2,
+              "name": ...,
+              "journey_arc": {...},
+              "total_duration": ..., "created_at": ...,
+              "tracks": [{track}, ...],        each track once, empty fields left out
+              "order": [0, 1, 0, ...],         only if a track plays more than once
+              "transitions": [{"track_a": 0, "track_b": 1, ...}, ...]
+            }
+
+        "tracks" is in play order unless "order" is given. Version 1 is
+        to_dict(), for tools that predate version 2.
+        """
+        if version == 1:
+            with open(file_path, 'w') as f:
+                json.dump(self.to_dict(), f, indent=2)
+            return
+        if version != 2:
+            raise ValueError(f"Unknown playlist format version: {version}")
+
+        # Index of each distinct track (by path) in "tracks"
+        ids: Dict[str, int] = {}
+        unique: List[TrackMetadata] = []
+
+        def track_id(track: TrackMetadata) -> int:
+            key = str(track.file_path)
+            if key not in ids:
+                ids[key] = len(unique)
+                unique.append(track)
+            return ids[key]
+
+        order = [track_id(t) for t in self.tracks]
+        transitions = [(tr, track_id(tr.track_a), track_id(tr.track_b)) for tr in self.transitions]
+
+        header = {'version': 2, 'name': self.name}
+        header.update(without_empty({
+            'journey_arc': without_empty(self.journey_arc.to_dict()),
+            'total_duration': self.total_duration,
+            'created_at': self.created_at,
+        }))
+
         with open(file_path, 'w') as f:
-            json.dump(self.to_dict(), f, indent=2)
+            f.write('{\n')
+            for key, value in header.items():
+                f.write(f'  {json.dumps(key)}: {json.dumps(value)},\n')
+            f.write('  "tracks": [')
+            for i, track in enumerate(unique):
+                row = without_empty(track.to_dict(), keep=PLAYLIST_TRACK_FIELDS_REQUIRED)
+                f.write(f'{"," if i else ""}\n    {json.dumps(row)}')
+            f.write('\n  ],\n')
+            if order != list(range(len(unique))):
+                f.write(f'  "order": {json.dumps(order)},\n')
+            f.write('  "transitions": [')
+            for i, (transition, a, b) in enumerate(transitions):
+                f.write(f'{"," if i else ""}\n    {json.dumps(transition.to_ref_dict(a, b))}')
+            f.write('\n  ]\n}\n')
 
     def to_m3u(self, file_path: Path) -> None:
         """Export playlist to M3U format for Mixxx/Traktor."""
@@ -0,0 +1,174 @@
+"""Streaming reader for Traktor's collection.nml.
+
+The collection is read with iterparse, one ENTRY at a time, and each entry
+is dropped once it has been handled, so memory stays flat however large
+the collection is. Parsing stops at the end of COLLECTION (the PLAYLISTS
+section that follows is never read).
+
+Per entry, Traktor stores:
+  - BPM (TEMPO BPM)
+  - Key: MUSICAL_KEY VALUE (0-11 major, 12-23 minor, from C) and the
+    display string INFO KEY ("8m" / "8d")
+  - Duration (INFO PLAYTIME_FLOAT)
+  - Loudness (LOUDNESS PERCEIVED_DB)
+  - Beatgrid anchor (CUE_V2 TYPE=4) and saved cues/loops (other CUE_V2)
+  - Modification stamp (ENTRY MODIFIED_DATE / MODIFIED_TIME)
+"""
+
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .models import CuePoint, MusicalKey
+from .harmonic import parse_key
+
+NML_DEFAULT = Path.home() / "Documents/Native Instruments/Traktor 3.11.1/collection.nml"
+
+# Traktor CUE_V2 TYPE values
+CUE_TYPE_GRID = 4   # AutoGrid beatgrid anchor
+CUE_TYPE_LOOP = 5
+
+# Top-level folders of a macOS startup volume; any other DIR is on /Volumes/<VOLUME>
+_STARTUP_VOLUME_DIRS = {'Users', 'Applications', 'Library', 'System', 'Volumes', 'private', 'opt'}
+
+
+def musical_key_from_value(value: int) -> Optional[MusicalKey]:
+    """
+    MusicalKey for a Traktor MUSICAL_KEY VALUE.
+
+    Values 0-11 are the major keys and 12-23 the minor keys, by pitch class
+    from C. The wheel number steps by fifths (C = 1B, G = 2B; A minor = 1A).
+    """
+    if not 0 <= value <= 23:
+        return None
+    if value < 12:
+        return MusicalKey(f"{value * 7 % 12 + 1}B")
+    # Minor keys sit on the same number as their relative major
+    return MusicalKey(f"{(value - 12 + 3) * 7 % 12 + 1}A")
+
+
+def musical_key_from_info(key: str) -> Optional[MusicalKey]:
+    """MusicalKey for a Traktor INFO KEY string ("8m" → 8A, "8d" → 8B)."""
+    return parse_key(key) if key else None
+
+
+def _float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def entry_path(entry: ET.Element) -> Optional[Path]:
+    """
+    File path of an ENTRY from its LOCATION.
+
+    Traktor stores DIR as "/:Users/:dan/:Music/:". Windows volumes ("C:")
+    are used as drive letters; on macOS, folders under the startup volume
+    map to /, anything else to /Volumes/<VOLUME>.
+    """
+    loc = entry.find('LOCATION')
+    if loc is None or not loc.get('FILE'):
+        return None
+    parts = [p for p in loc.get('DIR', '').split('/:') if p]
+    volume = loc.get('VOLUME', '')
+
+    if volume.endswith(':'):
+        return Path(volume + '/', *parts, loc.get('FILE'))
+    if not volume or (parts and parts[0] in _STARTUP_VOLUME_DIRS):
+        return Path('/', *parts, loc.get('FILE'))
+    return Path('/Volumes', volume, *parts, loc.get('FILE'))
+
+
+def entry_modified(entry: ET.Element) -> str:
+    """An ENTRY's modification stamp ("2024/3/1 41023"), for change detection."""
+    return f"{entry.get('MODIFIED_DATE', '')} {entry.get('MODIFIED_TIME', '')}".strip()
+
+
+def entry_fields(entry: ET.Element) -> dict:
+    """
+    TrackMetadata fields held in an ENTRY.
+
+    Returns:
+        Dict of the fields present: title, artist, bpm, key, duration,
+        label, genre, year, loudness_db, beatgrid_anchor, cue_points
+        (times in seconds)
+    """
+    fields = {}
+    if entry.get('TITLE'):
+        fields['title'] = entry.get('TITLE')
+    if entry.get('ARTIST'):
+        fields['artist'] = entry.get('ARTIST')
+
+    tempo = entry.find('TEMPO')
+    bpm = _float(tempo.get('BPM')) if tempo is not None else None
+    if bpm:
+        fields['bpm'] = bpm
+
+    info = entry.find('INFO')
+    musical_key = entry.find('MUSICAL_KEY')
+    key = None
+    if musical_key is not None and _float(musical_key.get('VALUE')) is not None:
+        key = musical_key_from_value(int(_float(musical_key.get('VALUE'))))
+    if key is None and info is not None:
+        key = musical_key_from_info(info.get('KEY', ''))
+    if key is not None:
+        fields['key'] = key
+
+    if info is not None:
+        duration = _float(info.get('PLAYTIME_FLOAT')) or _float(info.get('PLAYTIME'))
+        if duration:
+            fields['duration'] = duration
+        if info.get('LABEL'):
+            fields['label'] = info.get('LABEL')
+        if info.get('GENRE'):
+            fields['genre'] = [info.get('GENRE')]
+        release = info.get('RELEASE_DATE', '')
+        if release[:4].isdigit() and int(release[:4]) > 0:
+            fields['year'] = int(release[:4])
+
+    loudness = entry.find('LOUDNESS')
+    if loudness is not None:
+        level = _float(loudness.get('PERCEIVED_DB'))
+        if level is None:
+            level = _float(loudness.get('ANALYZED_DB'))
+        if level is not None:
+            fields['loudness_db'] = level
+
+    cue_points = []
+    for cue in entry.findall('CUE_V2'):
+        start = _float(cue.get('START'))
+        if start is None:
+            continue
+        cue_type = cue.get('TYPE', '0')
+        if cue_type == str(CUE_TYPE_GRID):
+            fields.setdefault('beatgrid_anchor', start / 1000.0)
+            continue
+        label = cue.get('NAME', '')
+        if not label or label == 'n.n.':
+            label = 'Loop' if cue_type == str(CUE_TYPE_LOOP) else 'Cue'
+        cue_points.append(CuePoint(time=start / 1000.0, label=label))
+    fields['cue_points'] = sorted(cue_points, key=lambda cp: cp.time)
+
+    return fields
+
+
+def iter_collection(nml_path: Path) -> Iterator[ET.Element]:
+    """
+    Yield each COLLECTION ENTRY of an NML file, streaming.
+
+    An entry is only valid until the next one is requested (it is cleared
+    to keep memory flat); read what you need from it before continuing.
+    """
+    collection = None
+    with open(nml_path, 'rb') as f:
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                if elem.tag == 'COLLECTION':
+                    collection = elem
+                continue
+            if elem.tag == 'COLLECTION':
+                return
+            if elem.tag == 'ENTRY' and collection is not None:
+                yield elem
+                collection.clear()
@@ -0,0 +1,178 @@
+"""Beam-search playlist optimisation over a candidate graph."""
+
+import heapq
+import math
+import random
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .models import TrackMetadata, JourneyArc
+from .profiling import stage
+
+if TYPE_CHECKING:
+    from .journey_planner import JourneyPlanner
+
+BEAM_WIDTH_DEFAULT = 16
+TIME_BUDGET_DEFAULT = 5.0   # seconds
+
+# Added to a transition's score when the incoming track is on a preferred
+# label; the greedy planner filters on labels instead
+LABEL_BONUS = 5.0
+
+
+class PlaylistOptimizer:
+    """
+    Finds a track order that maximises the summed transition score.
+
+    The search runs over the arc's candidate pool (tracks in its BPM range),
+    using the planner's cached ScoreMatrix. Edges are the moves the greedy
+    planner allows: BPM-compatible within 6% (straight, double- or
+    half-time), key-compatible when strict_key is set, and within ±1 of the
+    target energy for the slot. Each edge is scored as
+    JourneyPlanner._score_track_compatibility would score it.
+
+    Beam search keeps the beam_width best partial playlists at each slot,
+    at most one per last track (only the best path into a track is worth
+    extending). Successor lists are taken from a matrix row, sorted once per
+    (track, target energy) and cached, so a state is extended by walking its
+    list past used tracks. Once time_budget has passed, the beam narrows to
+    a single path and the rest of the playlist is completed greedily; with
+    no time_budget the full beam runs to the end.
+
+    Given a start track, the search is warm-started from it instead of
+    sampled openers: JourneyPlanner.replan() uses this to recompute the
+    rest of a set from the track playing now. The start track need not be
+    in the pool; its successors are scored on the fly (ScoreMatrix.track_row).
+
+    Results are deterministic for a given seed (it selects the sampled
+    openers and breaks ties between equal scores) as long as the time
+    budget isn't reached: where the beam narrows depends on machine speed.
+    """
+
+    def __init__(
+        self,
+        planner: 'JourneyPlanner',
+        beam_width: int = BEAM_WIDTH_DEFAULT,
+        time_budget: Optional[float] = TIME_BUDGET_DEFAULT,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize optimizer.
+
+        Args:
+            planner: Journey planner whose library and scoring are used
+            beam_width: Partial playlists kept at each step
+            time_budget: Seconds before the search narrows to one path
+                (None: never narrow)
+            seed: Seed for opener sampling and tie-breaking
+        """
+        if beam_width < 1:
+            raise ValueError("beam_width must be at least 1")
+        self.planner = planner
+        self.beam_width = beam_width
+        self.time_budget = time_budget
+        self.seed = seed
+
+    def optimize(
+        self,
+        journey_arc: JourneyArc,
+        strict_key: bool = False,
+        prefer_labels: bool = True,
+        start: Optional[TrackMetadata] = None,
+        exclude: Iterable[TrackMetadata] = ()
+    ) -> List[TrackMetadata]:
+        """
+        Search for the best-scoring track order for a journey arc.
+
+        Args:
+            journey_arc: Journey arc template to follow
+            strict_key: Only use tracks in compatible keys
+            prefer_labels: Add LABEL_BONUS for tracks on preferred labels
+            start: Track fixed in slot 0 (default: search over openers)
+            exclude: Tracks not to use (e.g. already played)
+
+        Returns:
+            Selected tracks in order, starting with `start` if given;
+            shorter than journey_arc.num_tracks if every path dead-ends,
+            empty if there is no suitable opener
+        """
+        budget = self.time_budget if self.time_budget is not None else math.inf
+        deadline = time.perf_counter() + budget
+        rng = random.Random(self.seed)
+        planner = self.planner
+
+        if start is None:
+            with stage("select opener"):
+                openers = planner.opener_candidates(journey_arc, strict_key, prefer_labels)
+            if not openers:
+                return []
+
+        matrix = planner.score_matrix(journey_arc, strict_key)
+        pool = matrix.tracks
+        excluded = frozenset(
+            i for i in (matrix.position(t) for t in exclude) if i is not None
+        )
+
+        # Seeded rank of each pool track, used to break ties between equal
+        # scores the same way on every run with the same seed
+        rank = np.empty(len(pool), dtype=np.int64)
+        rank[np.random.default_rng(self.seed).permutation(len(pool))] = np.arange(len(pool))
+
+        preferred = journey_arc.preferred_labels if prefer_labels else []
+        bonus = LABEL_BONUS * matrix.on_labels(preferred) if preferred else np.zeros(len(pool))
+
+        successors: Dict[Tuple[int, int], List[Tuple[float, int]]] = {}
+
+        def successors_of(current: int, target_energy: int) -> List[Tuple[float, int]]:
+            """Allowed next tracks after pool[current] (-1: the start track), best score first."""
+            cache_key = (current, target_energy)
+            if cache_key not in successors:
+                successors[cache_key] = matrix.ranked_successors(
+                    start if current < 0 else current, target_energy, rank, bonus)
+            return successors[cache_key]
+
+        # Beam states: (score, path of pool indices, used indices); a start
+        # track outside the pool is path index -1
+        if start is not None:
+            position = matrix.position(start)
+            first = position if position is not None else -1
+            beam = [(0.0, (first,), excluded | {first})]
+        else:
+            starts = [t for t in openers if matrix.position(t) not in excluded]
+            starts = rng.sample(starts, min(self.beam_width, len(starts)))
+            beam = [(0.0, (matrix.position(t),), excluded | {matrix.position(t)}) for t in starts]
+            if not beam:
+                return []
+
+        for slot in range(1, journey_arc.num_tracks):
+            width = self.beam_width if time.perf_counter() < deadline else 1
+            target_energy = planner.target_energy(journey_arc, slot)
+
+            with stage("select track", slot=slot):
+                best_by_track: Dict[int, Tuple[float, int, int]] = {}
+                for n, (score, path, used) in enumerate(beam[:width]):
+                    taken = 0
+                    for edge_score, i in successors_of(path[-1], target_energy):
+                        if i in used:
+                            continue
+                        total = score + edge_score
+                        best = best_by_track.get(i)
+                        if best is None or total > best[0]:
+                            best_by_track[i] = (total, n, i)
+                        taken += 1
+                        if taken >= width:
+                            break
+
+                if best_by_track:
+                    extended = heapq.nlargest(width, best_by_track.values(), key=lambda x: x[0])
+                    beam = [
+                        (total, beam[n][1] + (i,), beam[n][2] | {i})
+                        for total, n, i in extended
+                    ]
+            if not best_by_track:
+                break
+
+        best = max(beam, key=lambda state: (len(state[1]), state[0]))
+        return [start if i < 0 else pool[i] for i in best[1]]
@@ -0,0 +1,218 @@
+"""Reading saved playlists (playlist JSON and M3U) back into tracks."""
+
+import dataclasses
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Tuple
+
+from .models import TrackMetadata, JourneyArc
+from .library import TrackLibrary
+from .journey_planner import JourneyPlanner
+
+
+@dataclass
+class LoadedPlaylist:
+    """Tracks read from a playlist file, in file order."""
+    name: str
+    tracks: List[TrackMetadata]
+    journey_arc: Optional[JourneyArc] = None      # Only saved in playlist JSON
+    missing: List[str] = field(default_factory=list)  # Entries not found in the library
+
+
+def read_m3u(file_path: Path) -> Tuple[str, List[str]]:
+    """
+    Read an M3U/M3U8 playlist.
+
+    Returns:
+        (name from #PLAYLIST, or the file stem; track paths in order)
+    """
+    name = Path(file_path).stem
+    paths = []
+    with open(file_path, encoding='utf-8-sig') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('#PLAYLIST:'):
+                name = line[len('#PLAYLIST:'):].strip() or name
+            elif line and not line.startswith('#'):
+                paths.append(line)
+    return name, paths
+
+
+# Characters read at a time by iter_playlist_json()
+READ_CHUNK = 1 << 16
+
+_decoder = json.JSONDecoder()
+
+
+class _JSONStream:
+    """Incremental reads of JSON values and punctuation from a text file."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the unread part of the buffer; False at end of file."""
+        chunk = self.f.read(READ_CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of file), not consumed."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        """Consume the next character, which must be one of chars."""
+        c = self.peek()
+        if not c or c not in chars:
+            raise ValueError(f"Invalid playlist JSON: expected one of {chars!r}, found {c or 'end of file'!r}")
+        self.pos += 1
+        return c
+
+    def value(self) -> Any:
+        """Decode the next JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number at the end of the buffer may go on in the next chunk
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_playlist_json(
+    file_path: Path,
+    streamed: Tuple[str, ...] = ('tracks', 'transitions')
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Read a playlist JSON (version 1 or 2) incrementally.
+
+    Yields the top-level (key, value) pairs in file order, except that
+    the arrays under the streamed keys yield (key, element) per element.
+    Only one element is decoded at a time, and a caller that stops
+    iterating stops the read.
+    """
+    with open(file_path, encoding='utf-8') as f:
+        stream = _JSONStream(f)
+        stream.expect('{')
+        if stream.peek() == '}':
+            return
+        while True:
+            key = stream.value()
+            stream.expect(':')
+            if key in streamed and stream.peek() == '[':
+                stream.expect('[')
+                if stream.peek() == ']':
+                    stream.expect(']')
+                else:
+                    while True:
+                        yield key, stream.value()
+                        if stream.expect(',]') == ']':
+                            break
+            else:
+                yield key, stream.value()
+            if stream.expect(',}') == '}':
+                return
+
+
+def load_playlist(file_path: Path, library: Optional[TrackLibrary] = None) -> LoadedPlaylist:
+    """
+    Load a playlist saved by `generate` (JSON) or any M3U playlist.
+
+    Playlist JSON (version 1 or 2, see Playlist.to_json) carries full track
+    metadata, so no library is needed; if one is given, its entries replace
+    the saved ones (fresher analysis). The file is read incrementally and
+    the read stops at the transitions, which both versions write after the
+    tracks. M3U only lists paths, so its tracks are looked up in the
+    library; entries it doesn't contain are listed in `missing` and left out.
+
+    Args:
+        file_path: Playlist JSON, .m3u or .m3u8 file
+        library: Library to resolve tracks against (required for M3U)
+
+    Returns:
+        LoadedPlaylist with the tracks in file order
+    """
+    file_path = Path(file_path)
+    by_path = {str(t.file_path): t for t in library.tracks} if library is not None else {}
+
+    if file_path.suffix.lower() in ('.m3u', '.m3u8'):
+        if library is None:
+            raise ValueError("M3U playlists only list file paths; a library is needed to read their tracks")
+        name, paths = read_m3u(file_path)
+        tracks = [by_path[p] for p in paths if p in by_path]
+        missing = [p for p in paths if p not in by_path]
+        return LoadedPlaylist(name=name, tracks=tracks, missing=missing)
+
+    name = file_path.stem
+    arc = None
+    tracks = []
+    order = None
+    for key, value in iter_playlist_json(file_path):
+        if key == 'tracks':
+            tracks.append(by_path.get(value['file_path']) or TrackMetadata.from_dict(value))
+        elif key == 'transitions' and tracks:
+            break
+        elif key == 'order':
+            order = value
+        elif key == 'name':
+            name = value
+        elif key == 'journey_arc' and value:
+            arc = JourneyArc.from_dict(value)
+    if order is not None:
+        tracks = [tracks[i] for i in order]
+    return LoadedPlaylist(name=name, tracks=tracks, journey_arc=arc)
+
+
+def playlist_arc(
+    loaded: LoadedPlaylist,
+    progression: Optional[str] = None,
+    blend: Optional[int] = None
+) -> JourneyArc:
+    """
+    The journey arc to judge a loaded playlist against.
+
+    That is the arc saved with the playlist; M3U files get one spanning
+    their tracks (blend defaults to 60s). progression replaces the energy
+    curve (and fills in a missing one, as gradual_build), blend the blend
+    duration.
+    """
+    tracks = loaded.tracks
+    arc = loaded.journey_arc
+    if arc is None:
+        blend_duration = blend if blend is not None else 60
+        running = sum(t.duration for t in tracks) - blend_duration * max(0, len(tracks) - 1)
+        arc = JourneyArc(
+            name=loaded.name,
+            description=f"Tracks from {loaded.name}",
+            duration_minutes=max(1, round(running / 60)),
+            bpm_range=(min((t.bpm for t in tracks), default=0), max((t.bpm for t in tracks), default=0)),
+            num_tracks=len(tracks),
+            blend_duration=blend_duration
+        )
+    if progression or not arc.energy_curve:
+        curve = JourneyPlanner(TrackLibrary())._generate_energy_curve(
+            len(tracks), progression or 'gradual_build')
+        arc = dataclasses.replace(arc, energy_curve=curve)
+    if blend is not None:
+        arc = dataclasses.replace(arc, blend_duration=blend)
+    return arc
@@ -0,0 +1,222 @@
+"""Per-stage wall time and allocation profiling (`--profile`).
+
+Code marks its stages with `stage()`:
+
+    with stage("select track", slot=i):
+        ...
+
+While a StageProfiler is running, each stage records its wall time and
+the memory allocated in it (tracemalloc: net change and peak above the
+level it started at). Stages nest; a stage's figures include its
+children. With no profiler running, stage() returns a shared no-op
+context, so instrumented code costs a function call per stage.
+
+Only the process running the profiler is traced: stages in worker
+processes (generate --candidates --workers N) show up as the time their
+parent stage waits.
+"""
+
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+# The profiler stage() reports to; set by StageProfiler.start()
+_active: Optional['StageProfiler'] = None
+
+_NO_STAGE = nullcontext()
+
+
+def stage(name: str, **args):
+    """Context manager recording a stage under the running profiler (no-op if none)."""
+    if _active is None:
+        return _NO_STAGE
+    return _active.stage(name, **args)
+
+
+@dataclass
+class StageRecord:
+    """One run of a stage."""
+    name: str
+    depth: int                  # 0 for top-level stages
+    start: float                # seconds since the profiler started
+    duration: float             # seconds
+    allocated: int              # bytes still allocated at the end (net)
+    peak: int                   # bytes: highest level above the start
+    traced: int                 # bytes traced in total at the end
+    args: Dict = field(default_factory=dict)
+
+
+@dataclass
+class StageSummary:
+    """A stage's runs, aggregated for the summary table."""
+    name: str
+    depth: int
+    calls: int
+    total: float
+    slowest: float
+    allocated: int
+    peak: int
+
+
+class StageProfiler:
+    """
+    Records stage() calls while running.
+
+    Usage:
+        with StageProfiler() as profiler:
+            ...
+        print(profiler.format_summary())
+    """
+
+    def __init__(self, trace_allocations: bool = True, cprofile: bool = False):
+        """
+        Args:
+            trace_allocations: Measure allocations with tracemalloc (slows
+                allocation-heavy Python code down)
+            cprofile: Also run cProfile, for write_pstats()
+        """
+        self.trace_allocations = trace_allocations
+        self.records: List[StageRecord] = []
+        self.elapsed = 0.0
+        self._profile = cProfile.Profile() if cprofile else None
+        self._started_tracing = False
+        self._origin = 0.0
+        # Open stages: [peak so far] of each, innermost last
+        self._peaks: List[List[int]] = []
+
+    def start(self) -> None:
+        """Start recording; stage() reports here until stop()."""
+        global _active
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        _active = self
+        self._origin = time.perf_counter()
+        if self._profile is not None:
+            self._profile.enable()
+
+    def stop(self) -> None:
+        """Stop recording."""
+        global _active
+        if self._profile is not None:
+            self._profile.disable()
+        self.elapsed = time.perf_counter() - self._origin
+        _active = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self) -> 'StageProfiler':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _memory(self) -> int:
+        """Traced bytes now, folding the peak since the last reset into the open stages."""
+        if not self.trace_allocations:
+            return 0
+        current, peak = tracemalloc.get_traced_memory()
+        for frame in self._peaks:
+            frame[0] = max(frame[0], peak)
+        tracemalloc.reset_peak()
+        return current
+
+    @contextmanager
+    def stage(self, name: str, **args) -> Iterator[None]:
+        """Record the enclosed code as a stage (see the module stage())."""
+        depth = len(self._peaks)
+        memory = self._memory()
+        frame = [memory]
+        self._peaks.append(frame)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            finished = time.perf_counter()
+            end_memory = self._memory()
+            self._peaks.pop()
+            self.records.append(StageRecord(
+                name=name,
+                depth=depth,
+                start=started - self._origin,
+                duration=finished - started,
+                allocated=end_memory - memory,
+                peak=frame[0] - memory,
+                traced=end_memory,
+                args=args
+            ))
+
+    def summary(self) -> List[StageSummary]:
+        """Stages in the order they first started, runs of the same name and depth combined."""
+        rows: Dict[tuple, StageSummary] = {}
+        for record in sorted(self.records, key=lambda r: r.start):
+            key = (record.name, record.depth)
+            row = rows.get(key)
+            if row is None:
+                rows[key] = StageSummary(record.name, record.depth, 1, record.duration,
+                                         record.duration, record.allocated, record.peak)
+            else:
+                row.calls += 1
+                row.total += record.duration
+                row.slowest = max(row.slowest, record.duration)
+                row.allocated += record.allocated
+                row.peak = max(row.peak, record.peak)
+        return list(rows.values())
+
+    def format_summary(self) -> str:
+        """Summary table: time, share of the run, calls, slowest call and allocations per stage."""
+        lines = [f"{'stage':<28} {'calls':>5} {'total ms':>9} {'%':>5} {'max ms':>8} "
+                 f"{'alloc MiB':>9} {'peak MiB':>9}"]
+        staged = 0.0
+        for row in self.summary():
+            if row.depth == 0:
+                staged += row.total
+            share = 100 * row.total / self.elapsed if self.elapsed else 0.0
+            if self.trace_allocations:
+                memory = f"{row.allocated / 2**20:>9.2f} {row.peak / 2**20:>9.2f}"
+            else:
+                memory = f"{'-':>9} {'-':>9}"
+            name = '  ' * row.depth + row.name
+            lines.append(f"{name:<28} {row.calls:>5} {row.total * 1000:>9.1f} {share:>5.1f} "
+                         f"{row.slowest * 1000:>8.1f} {memory}")
+        other = self.elapsed - staged
+        lines.append(f"{'(outside stages)':<28} {'':>5} {other * 1000:>9.1f} "
+                     f"{100 * other / self.elapsed if self.elapsed else 0.0:>5.1f}")
+        lines.append(f"{'total':<28} {'':>5} {self.elapsed * 1000:>9.1f} {100.0:>5.1f}")
+        return '\n'.join(lines)
+
+    def write_trace(self, path: Path) -> None:
+        """
+        Write the stages as a Chrome trace (JSON), for chrome://tracing or
+        https://ui.perfetto.dev; traced memory is a counter track.
+        """
+        pid, tid = os.getpid(), threading.get_ident()
+        events = []
+        for record in self.records:
+            events.append({
+                'name': record.name, 'cat': 'stage', 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': record.start * 1e6, 'dur': record.duration * 1e6,
+                'args': {**record.args, 'allocated_bytes': record.allocated,
+                         'peak_bytes': record.peak},
+            })
+            if self.trace_allocations:
+                events.append({'name': 'traced memory', 'ph': 'C', 'pid': pid,
+                               'ts': (record.start + record.duration) * 1e6,
+                               'args': {'MiB': record.traced / 2**20}})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def write_pstats(self, path: Path) -> None:
+        """Write cProfile statistics (for pstats, snakeviz, ...); needs cprofile=True."""
+        if self._profile is None:
+            raise ValueError("Profiler was created without cprofile=True")
+        self._profile.dump_stats(str(path))
@@ -0,0 +1,331 @@
+"""Reordering a fixed set of tracks by simulated annealing."""
+
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .models import TrackMetadata
+from .columnar import KEY_CODES, MISSING
+from .evaluation import bpm_jump
+from .harmonic import KEY_DISTANCE
+
+TIME_BUDGET_DEFAULT = 2.0     # seconds
+OBJECTIVES_DEFAULT = "bpm=1,key=1,energy=1"
+MAX_SEGMENT_TIMED = 32        # longest reversal while position costs apply
+FINAL_TEMPERATURE = 1e-3      # fraction of the starting temperature
+CHECK_EVERY = 1024            # moves between clock reads / cooling steps
+
+
+def _bpm_costs(tracks: List[TrackMetadata], curve: List[int]) -> np.ndarray:
+    """Tempo jump in percent, allowing half/double time (0 if a BPM is unknown)."""
+    bpm = np.array([t.bpm or 0.0 for t in tracks], dtype=float)
+    return np.nan_to_num(bpm_jump(bpm[:, None], bpm[None, :]))
+
+
+def _key_costs(tracks: List[TrackMetadata], curve: List[int]) -> np.ndarray:
+    """Camelot wheel distance (0 if a key is unknown)."""
+    codes = np.array([KEY_CODES[t.key.value] if t.key else MISSING for t in tracks], dtype=np.int64)
+    return np.nan_to_num(KEY_DISTANCE[codes[:, None], codes[None, :]])
+
+
+def _energy_costs(tracks: List[TrackMetadata], curve: List[int]) -> np.ndarray:
+    """Distance of each track's energy from the curve at each position."""
+    energy = np.array([t.energy_level for t in tracks], dtype=float)
+    return np.abs(energy[:, None] - np.asarray(curve, dtype=float)[None, :])
+
+
+@dataclass(frozen=True)
+class Objective:
+    """A reordering cost term."""
+    name: str
+    kind: str         # 'pair': cost[a][b] of b following a; 'position': cost[track][slot]
+    build: Callable[[List[TrackMetadata], List[int]], np.ndarray]
+    description: str
+
+
+# Registered objectives, by --objective name. Pair costs must be symmetric,
+# so a reversed segment keeps its internal cost
+OBJECTIVES: Dict[str, Objective] = {
+    'bpm': Objective('bpm', 'pair', _bpm_costs, 'tempo jump in %'),
+    'key': Objective('key', 'pair', _key_costs, 'Camelot steps'),
+    'energy': Objective('energy', 'position', _energy_costs, 'distance from the energy curve'),
+}
+
+
+def parse_objectives(spec: str) -> Dict[str, float]:
+    """
+    Parse an objective spec such as "bpm=1,key=2" or "bpm,energy" (weight 1).
+
+    Raises:
+        ValueError: for unknown objectives or invalid weights
+    """
+    weights = {}
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OBJECTIVES:
+            raise ValueError(f"Unknown objective: {name} (choose from {', '.join(OBJECTIVES)})")
+        try:
+            weights[name] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid weight for {name}: {weight}")
+    if not weights:
+        raise ValueError("No objectives given")
+    return weights
+
+
+def resample_curve(curve: List[int], length: int) -> List[int]:
+    """Stretch or shrink an energy curve to `length` slots."""
+    if not curve:
+        return [5] * length
+    return [curve[i * len(curve) // length] for i in range(length)]
+
+
+@dataclass
+class ReorderResult:
+    """Best order found, with its cost and search statistics."""
+    tracks: List[TrackMetadata]
+    initial_cost: float
+    cost: float
+    initial_breakdown: Dict[str, float]   # Unweighted cost per objective
+    breakdown: Dict[str, float]
+    moves: int
+    accepted: int
+    elapsed: float
+
+
+class PlaylistReorderer:
+    """
+    Finds a low-cost order for a fixed set of tracks.
+
+    The cost of an order is the weighted sum of the selected objectives:
+    pair costs over each adjacent pair, and position costs over each track
+    at its slot. Cost matrices are built once, so a move is scored from the
+    few terms it changes:
+
+    - swap two tracks: O(1), the (up to) four neighbouring pairs and two slots
+    - reverse a segment (2-opt): O(1) for pair costs, the two boundary
+      pairs, plus O(length) for position costs, as every track in the
+      segment changes slot. Segments are capped at MAX_SEGMENT_TIMED
+      tracks while a position objective is active.
+
+    Simulated annealing starts from the input order, or from its
+    nearest-neighbour order if that is cheaper, at a temperature where
+    an average uphill move is accepted half the time, cools geometrically
+    to FINAL_TEMPERATURE of that over the run (iterations moves, or
+    time_budget seconds), and keeps the best order seen. With iterations
+    set, results are deterministic for a given seed.
+    """
+
+    def __init__(
+        self,
+        weights: Dict[str, float],
+        time_budget: float = TIME_BUDGET_DEFAULT,
+        iterations: Optional[int] = None,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize reorderer.
+
+        Args:
+            weights: Objective name → weight (see OBJECTIVES, parse_objectives)
+            time_budget: Seconds of annealing (ignored if iterations is set)
+            iterations: Moves to try instead of a time budget
+            seed: Seed for move selection and acceptance
+        """
+        unknown = set(weights) - set(OBJECTIVES)
+        if unknown:
+            raise ValueError(f"Unknown objective: {', '.join(sorted(unknown))}")
+        self.weights = weights
+        self.time_budget = time_budget
+        self.iterations = iterations
+        self.seed = seed
+
+    def _matrices(
+        self,
+        tracks: List[TrackMetadata],
+        curve: List[int]
+    ) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray]:
+        """Per-objective costs, plus the weighted pair and position totals."""
+        n = len(tracks)
+        costs = {name: OBJECTIVES[name].build(tracks, curve) for name in self.weights}
+        pair = np.zeros((n, n))
+        position = np.zeros((n, n))
+        for name, weight in self.weights.items():
+            target = pair if OBJECTIVES[name].kind == 'pair' else position
+            target += weight * costs[name]
+        return costs, pair, position
+
+    @staticmethod
+    def _breakdown(order: List[int], costs: Dict[str, np.ndarray]) -> Dict[str, float]:
+        """Unweighted cost of an order, per objective."""
+        idx = np.asarray(order)
+        breakdown = {}
+        for name, cost in costs.items():
+            if OBJECTIVES[name].kind == 'pair':
+                breakdown[name] = float(cost[idx[:-1], idx[1:]].sum())
+            else:
+                breakdown[name] = float(cost[idx, np.arange(len(idx))].sum())
+        return breakdown
+
+    @staticmethod
+    def _nearest_neighbour(pair: np.ndarray, position: np.ndarray) -> List[int]:
+        """From the first track, repeatedly append the cheapest remaining one for the next slot."""
+        n = len(pair)
+        order = [0]
+        remaining = np.ones(n, dtype=bool)
+        remaining[0] = False
+        for slot in range(1, n):
+            step = np.where(remaining, pair[order[-1]] + position[:, slot], np.inf)
+            nxt = int(np.argmin(step))
+            order.append(nxt)
+            remaining[nxt] = False
+        return order
+
+    def cost(self, tracks: List[TrackMetadata], energy_curve: List[int]) -> Dict[str, float]:
+        """Unweighted cost per objective of tracks in the given order."""
+        curve = resample_curve(energy_curve, len(tracks))
+        costs, _, _ = self._matrices(tracks, curve)
+        return self._breakdown(list(range(len(tracks))), costs)
+
+    def reorder(self, tracks: List[TrackMetadata], energy_curve: List[int]) -> ReorderResult:
+        """
+        Anneal the order of tracks.
+
+        Args:
+            tracks: Tracks in their current order
+            energy_curve: Target energy curve, resampled to len(tracks) slots
+                (only used by position objectives)
+
+        Returns:
+            ReorderResult with the best order found
+        """
+        started = time.perf_counter()
+        n = len(tracks)
+        curve = resample_curve(energy_curve, n)
+        costs, pair_np, position_np = self._matrices(tracks, curve)
+        initial = self._breakdown(list(range(n)), costs)
+
+        def total(order: List[int]) -> float:
+            idx = np.asarray(order)
+            return float(pair_np[idx[:-1], idx[1:]].sum() + position_np[idx, np.arange(n)].sum())
+
+        initial_cost = total(list(range(n)))
+        if n < 3:
+            return ReorderResult(list(tracks), initial_cost, initial_cost, initial, initial,
+                                 0, 0, time.perf_counter() - started)
+
+        # Anneal from the input order or its nearest-neighbour order,
+        # whichever is cheaper
+        order = list(range(n))
+        greedy = self._nearest_neighbour(pair_np, position_np)
+        if total(greedy) < initial_cost:
+            order = greedy
+
+        # Lists of lists index several times faster than numpy from Python
+        P = pair_np.tolist()
+        Q = position_np.tolist()
+        timed = bool(position_np.any())
+        max_segment = min(n, MAX_SEGMENT_TIMED) if timed else n
+
+        rng = random.Random(self.seed)
+        rand = rng.random
+        exp = math.exp
+
+        def propose() -> Tuple[int, int, int, float]:
+            """Random move: (kind, i, j, delta); kind 0 = reverse i..j, 1 = swap i and j."""
+            if rand() < 0.5:
+                length = 2 + int(rand() * (max_segment - 1))
+                i = int(rand() * (n - length + 1))
+                j = i + length - 1
+                kind = 0
+            else:
+                # Redraw i == j, which would be a no-op counted as a move
+                i = j = int(rand() * n)
+                while j == i:
+                    j = int(rand() * n)
+                if i > j:
+                    i, j = j, i
+                kind = 1 if j - i > 1 else 0
+
+            oi, oj = order[i], order[j]
+            delta = 0.0
+            if kind == 0:
+                if i > 0:
+                    a = P[order[i - 1]]
+                    delta += a[oj] - a[oi]
+                if j < n - 1:
+                    b = order[j + 1]
+                    delta += P[oi][b] - P[oj][b]
+                if timed:
+                    for k in range(j - i + 1):
+                        q = Q[order[i + k]]
+                        delta += q[j - k] - q[i + k]
+            else:
+                Pi, Pj = P[oi], P[oj]
+                c, e = order[i + 1], order[j - 1]
+                delta += Pj[c] - Pi[c] + Pi[e] - Pj[e]
+                if i > 0:
+                    a = P[order[i - 1]]
+                    delta += a[oj] - a[oi]
+                if j < n - 1:
+                    b = order[j + 1]
+                    delta += Pi[b] - Pj[b]
+                if timed:
+                    delta += Q[oi][j] + Q[oj][i] - Q[oi][i] - Q[oj][j]
+            return kind, i, j, delta
+
+        # Starting temperature: an average uphill move is accepted half the time
+        uphill = [d for d in (propose()[3] for _ in range(200)) if d > 0]
+        t_start = (sum(uphill) / len(uphill)) / math.log(2) if uphill else 1.0
+        t_end = t_start * FINAL_TEMPERATURE
+
+        current = best = total(order)
+        best_order = order[:]
+        moves = accepted = 0
+        temperature = t_start
+        budget = self.iterations
+
+        while True:
+            # The last batch stops at the iteration budget
+            batch = CHECK_EVERY if budget is None else max(0, min(CHECK_EVERY, budget - moves))
+            for _ in range(batch):
+                kind, i, j, delta = propose()
+                if delta <= 0 or rand() < exp(-delta / temperature):
+                    if kind == 0:
+                        order[i:j + 1] = order[i:j + 1][::-1]
+                    else:
+                        order[i], order[j] = order[j], order[i]
+                    current += delta
+                    accepted += 1
+                    if current < best - 1e-9:
+                        best = current
+                        best_order = order[:]
+            moves += batch
+
+            # Cool by the fraction of the run used so far
+            if budget is not None:
+                progress = moves / budget if budget > 0 else 1.0
+            else:
+                progress = (time.perf_counter() - started) / self.time_budget if self.time_budget > 0 else 1.0
+            if progress >= 1.0:
+                break
+            temperature = t_start * (t_end / t_start) ** progress
+
+        return ReorderResult(
+            tracks=[tracks[i] for i in best_order],
+            initial_cost=initial_cost,
+            cost=total(best_order),
+            initial_breakdown=initial,
+            breakdown=self._breakdown(best_order, costs),
+            moves=moves,
+            accepted=accepted,
+            elapsed=time.perf_counter() - started
+        )
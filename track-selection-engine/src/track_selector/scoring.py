@@ -0,0 +1,257 @@
+"""Vectorised pairwise transition scores for a candidate pool."""
+
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .models import TrackMetadata, textures_to_mask
+from .columnar import KEY_CODES, MISSING
+from .harmonic import KEY_COMPATIBLE, KEY_ALLOWED
+
+# Rows scored per block when building the matrix, to bound temporaries
+BLOCK_ROWS = 1024
+
+# Largest pool stored as full matrices (2 bytes per pair: 128 MiB); larger
+# pools score each current track's row when it is asked for
+DENSE_POOL_MAX = 8192
+
+# _score_track_compatibility terms
+BASE_SCORE = 50
+KEY_POINTS = 25
+TEXTURE_POINTS = 10
+SAME_ARTIST_PENALTY = 15
+BPM_STEPS = (2.0, 4.0, 6.0)     # 5 points per step the |BPM difference| is under
+BPM_STEP_POINTS = 5
+ENERGY_POINTS = 20              # on the target energy
+ENERGY_STEP_PENALTY = 5         # per level away from it
+
+# Best possible transition score
+MAX_SCORE = (BASE_SCORE + BPM_STEP_POINTS * len(BPM_STEPS) + KEY_POINTS
+             + TEXTURE_POINTS + ENERGY_POINTS)
+
+
+class ScoreMatrix:
+    """
+    JourneyPlanner._score_track_compatibility for every pair in a pool.
+
+    The pool is the tracks of an arc's BPM range (one per file, in BPM
+    order). The energy term depends on the slot's target energy, so it is
+    kept separate:
+
+        score(a, b, target) = max(0, BASE_SCORE + pair[a, b] + energy_points(target)[b])
+
+    pair holds the BPM, key, texture and artist terms and is built with
+    NumPy broadcasting over key codes (KEY_COMPATIBLE lookup), texture
+    bitmasks (variety = current has a texture the candidate lacks) and artist
+    IDs. allowed[a, b] marks the moves the planner permits: BPM within
+    tolerance at x1, x2 or x0.5, not the same track, and (strict_key) keys
+    compatible or missing.
+
+    Both matrices are n × n (int8 and bool), so a 5,000-track pool takes
+    about 50 MB. Pools above max_dense tracks (a wide BPM range over a large
+    library) would grow quadratically, so they store no matrices: each
+    track's row is scored against the pool when it is read, and pair and
+    allowed are None. JourneyPlanner.score_matrix() caches matrices per
+    library version and arc parameters.
+    """
+
+    def __init__(
+        self,
+        tracks: List[TrackMetadata],
+        strict_key: bool = False,
+        bpm_tolerance: float = 0.06,
+        max_dense: int = DENSE_POOL_MAX
+    ):
+        """
+        Build the matrices.
+
+        Args:
+            tracks: Candidate pool (duplicates of a file are dropped)
+            strict_key: Disallow moves between incompatible keys
+            bpm_tolerance: BPM tolerance as a fraction (0.06 = 6%)
+            max_dense: Largest pool to store as matrices; rows of larger
+                pools are scored when read
+        """
+        self.tracks: List[TrackMetadata] = []
+        self.index: Dict = {}
+        for track in tracks:
+            if track.file_path not in self.index:
+                self.index[track.file_path] = len(self.tracks)
+                self.tracks.append(track)
+
+        n = len(self.tracks)
+        self.strict_key = strict_key
+        self.bpm = np.array([t.bpm for t in self.tracks], dtype=np.float64)
+        self.energy = np.array([t.energy_level for t in self.tracks], dtype=np.int16)
+        self.duration = np.array([t.duration or 0.0 for t in self.tracks], dtype=np.float64)
+        self.key_code = np.array(
+            [KEY_CODES[t.key.value] if t.key else MISSING for t in self.tracks], dtype=np.int8)
+        self.texture_mask = np.array(
+            [textures_to_mask(t.textures) for t in self.tracks], dtype=np.uint16)
+        artists, self.artist_id = np.unique([t.artist for t in self.tracks], return_inverse=True)
+        self._artist_codes = {artist: i for i, artist in enumerate(artists.tolist())}
+        self.bpm_tolerance = bpm_tolerance
+        self._on_labels: Dict[Tuple[str, ...], np.ndarray] = {}
+
+        # BPM windows are found by binary search over the sorted BPMs and
+        # compared against each track's rank in that order
+        self._bpm_order = np.argsort(self.bpm, kind='stable')
+        self._bpm_sorted = self.bpm[self._bpm_order]
+        self._bpm_rank = np.empty(n, dtype=np.int64)
+        self._bpm_rank[self._bpm_order] = np.arange(n)
+
+        self.dense = n <= max_dense
+        self.pair: Optional[np.ndarray] = None
+        self.allowed: Optional[np.ndarray] = None
+        if self.dense:
+            self.pair = np.zeros((n, n), dtype=np.int8)
+            self.allowed = np.zeros((n, n), dtype=bool)
+            for start in range(0, n, BLOCK_ROWS):
+                self._build_block(slice(start, min(start + BLOCK_ROWS, n)), bpm_tolerance)
+
+    def _build_block(self, rows: slice, bpm_tolerance: float) -> None:
+        """Fill pair/allowed for a block of current-track rows."""
+        pair, allowed = self._rows(self.bpm[rows], self.key_code[rows], self.texture_mask[rows],
+                                   self.artist_id[rows], bpm_tolerance)
+        block_rows = np.arange(rows.start, rows.stop)
+        allowed[block_rows - rows.start, block_rows] = False
+        self.pair[rows] = pair
+        self.allowed[rows] = allowed
+
+    def _pool_row(self, current: int) -> Tuple[np.ndarray, np.ndarray]:
+        """pair and allowed rows of pool track `current`, stored or scored now."""
+        if self.dense:
+            return self.pair[current], self.allowed[current]
+        row = slice(current, current + 1)
+        pair, allowed = self._rows(self.bpm[row], self.key_code[row], self.texture_mask[row],
+                                   self.artist_id[row], self.bpm_tolerance)
+        allowed[0, current] = False
+        return pair[0], allowed[0]
+
+    def _rows(
+        self,
+        bpm: np.ndarray,
+        key_code: np.ndarray,
+        texture_mask: np.ndarray,
+        artist_id: np.ndarray,
+        bpm_tolerance: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """pair and allowed rows for current tracks with these attributes."""
+        bpm_a = bpm[:, None]
+        bpm_b = self.bpm[None, :]
+
+        # int8 throughout: the terms sum to -15..50
+        diff = np.abs(bpm_a - bpm_b)
+        pair = np.zeros(diff.shape, dtype=np.int8)
+        for step in BPM_STEPS:
+            pair += np.int8(BPM_STEP_POINTS) * (diff < step)
+
+        pair += np.int8(KEY_POINTS) * KEY_COMPATIBLE[key_code][:, self.key_code]
+
+        mask_a = texture_mask[:, None]
+        mask_b = self.texture_mask[None, :]
+        pair += np.int8(TEXTURE_POINTS) * ((mask_b != 0) & ((mask_a & ~mask_b) != 0))
+
+        pair -= np.int8(SAME_ARTIST_PENALTY) * (artist_id[:, None] == self.artist_id[None, :])
+
+        # Straight, double- and half-time windows, as get_compatible_tracks()
+        allowed = np.zeros(diff.shape, dtype=bool)
+        rank_b = self._bpm_rank[None, :]
+        for ratio in (1.0, 2.0, 0.5):
+            lo = np.searchsorted(self._bpm_sorted, bpm * (ratio - bpm_tolerance), 'left')
+            hi = np.searchsorted(self._bpm_sorted, bpm * (ratio + bpm_tolerance), 'right')
+            allowed |= (rank_b >= lo[:, None]) & (rank_b < hi[:, None])
+        if self.strict_key:
+            allowed &= KEY_ALLOWED[key_code][:, self.key_code]
+        return pair, allowed
+
+    def track_row(self, track: TrackMetadata) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        pair and allowed rows for any track, in the pool or not.
+
+        Pool tracks read their stored rows; others (e.g. a track playing
+        outside the arc's BPM range) are scored against the pool on the fly.
+        """
+        position = self.position(track)
+        if position is not None:
+            return self._pool_row(position)
+        pair, allowed = self._rows(
+            np.array([track.bpm], dtype=np.float64),
+            np.array([KEY_CODES[track.key.value] if track.key else MISSING], dtype=np.int8),
+            np.array([textures_to_mask(track.textures)], dtype=np.uint16),
+            np.array([self._artist_codes.get(track.artist, -1)]),
+            self.bpm_tolerance
+        )
+        return pair[0], allowed[0]
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+    def energy_points(self, target_energy: int) -> np.ndarray:
+        """Energy term per track: +20 on target, -5 per level away."""
+        diff = np.abs(self.energy - target_energy)
+        return np.where(diff == 0, ENERGY_POINTS, -ENERGY_STEP_PENALTY * diff)
+
+    def energy_fits(self, target_energy: int) -> np.ndarray:
+        """Tracks within ±1 of the target energy."""
+        return np.abs(self.energy - target_energy) <= 1
+
+    def scores_from(self, current: int, target_energy: int) -> np.ndarray:
+        """Score of every pool track following track `current` (allowed or not)."""
+        return self._scores(self._pool_row(current)[0], target_energy)
+
+    def _scores(self, pair_row: np.ndarray, target_energy: int) -> np.ndarray:
+        """scores_from() for a pair row."""
+        return np.maximum(0, BASE_SCORE + pair_row.astype(np.int16) + self.energy_points(target_energy))
+
+    def ranked_successors(
+        self,
+        current: Union[int, TrackMetadata],
+        target_energy: int,
+        tie_rank: np.ndarray,
+        bonus: Optional[np.ndarray] = None
+    ) -> List[Tuple[float, int]]:
+        """
+        Allowed moves from track `current` to tracks within ±1 of the target energy.
+
+        Args:
+            current: Pool position of the current track, or a track (which
+                need not be in the pool; see track_row())
+            target_energy: Target energy for the next slot
+            tie_rank: Per-track rank; equal scores are ordered by it
+            bonus: Optional per-track amount added to the score
+
+        Returns:
+            (score, pool position) pairs, best score first
+        """
+        if isinstance(current, TrackMetadata):
+            pair_row, allowed_row = self.track_row(current)
+        else:
+            pair_row, allowed_row = self._pool_row(current)
+        candidates = np.flatnonzero(allowed_row & self.energy_fits(target_energy))
+        scores = self._scores(pair_row, target_energy)[candidates]
+        if bonus is not None:
+            scores = scores + bonus[candidates]
+        best_first = np.lexsort((tie_rank[candidates], -scores))
+        return list(zip(scores[best_first].tolist(), candidates[best_first].tolist()))
+
+    def score(self, current: int, candidate: int, target_energy: int) -> float:
+        """Score of one transition; equals _score_track_compatibility."""
+        diff = abs(int(self.energy[candidate]) - target_energy)
+        energy = ENERGY_POINTS if diff == 0 else -ENERGY_STEP_PENALTY * diff
+        pair = self.pair[current, candidate] if self.dense else self._pool_row(current)[0][candidate]
+        return float(max(0, BASE_SCORE + int(pair) + energy))
+
+    def on_labels(self, labels: List[str]) -> np.ndarray:
+        """Tracks whose label contains any of `labels` (cached per label list)."""
+        cache_key = tuple(labels)
+        if cache_key not in self._on_labels:
+            self._on_labels[cache_key] = np.array([
+                bool(track.label) and any(lbl in track.label for lbl in labels)
+                for track in self.tracks
+            ], dtype=bool)
+        return self._on_labels[cache_key]
+
+    def position(self, track: TrackMetadata) -> Optional[int]:
+        """Pool position of a track, or None if it is not in the pool."""
+        return self.index.get(track.file_path)
@@ -0,0 +1,375 @@
+"""Long-running query server: keeps libraries loaded between commands.
+
+`track-selector serve` loads libraries once and answers over HTTP on
+localhost, so a command costs its own work rather than a Python start-up,
+the CLI's imports and a full library parse. Requests are handled one at a
+time on one thread (the commands are CPU bound, and SQLite connections
+stay on the thread that opened them). Between requests the server checks
+its library files every watch_interval seconds and reloads any that have
+changed; a request also checks its library first, so answers never come
+from a stale copy.
+
+Endpoints (JSON in and out):
+
+    GET  /health                          loaded libraries
+    GET  /stats?library=PATH              TrackLibrary.stats()
+    GET  /tracks?library=PATH&bpm=&key=&energy=&limit=
+    GET  /compatible?library=PATH&track=WORDS&strict_key=&tolerance=&limit=
+    POST /generate  {"library", "duration", "key", "progression", "min_bpm",
+                     "max_bpm", "blend", "strict_key", "optimize", "seed"}
+    POST /score     {"playlist", "library", "progression", "blend", "timed"}
+    POST /run       {"argv", "cwd"}       a CLI command, as client.run_remote() sends
+
+Library paths are resolved against the server's working directory, except
+in /run, which runs in the client's. POST bodies must be sent as
+application/json and the Host header must name this machine, so web pages
+can't drive the server from a browser.
+"""
+
+import contextlib
+import io
+import json
+import math
+import os
+import sys
+import time
+import traceback
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+from .library import TrackLibrary, default_storage
+from .journey_planner import JourneyPlanner
+from .evaluation import PlaylistEvaluator
+from .harmonic import parse_key
+from .playlist_io import load_playlist, playlist_arc
+from .client import SERVER_HOST, SERVER_PORT_DEFAULT, WATCH_INTERVAL_DEFAULT
+
+
+def _file_stamp(path: Path) -> Optional[Tuple[int, int]]:
+    """(size, mtime_ns) of a file, or None if it is missing."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+@dataclass
+class ResidentLibrary:
+    """A loaded library and the file stamp it was loaded from."""
+    path: Path
+    storage: str
+    stamp: Tuple[int, int]
+    library: TrackLibrary
+    load_seconds: float
+
+
+class LibraryCache:
+    """Libraries kept loaded, by resolved path and storage mode, reloaded when their file changes."""
+
+    def __init__(self, storage: Optional[str] = None):
+        """
+        Args:
+            storage: Storage mode for libraries requested without one
+                (default: the mode implied by the file extension)
+        """
+        self.storage = storage
+        self.entries: Dict[Tuple[str, str], ResidentLibrary] = {}
+
+    def _key(self, library_path: Path, storage: Optional[str]) -> Tuple[Path, str]:
+        """Resolved path and storage mode for a request."""
+        path = Path(library_path).resolve()
+        return path, storage or self.storage or default_storage(path)
+
+    def _load(self, path: Path, storage: str, stamp: Tuple[int, int]) -> ResidentLibrary:
+        started = time.perf_counter()
+        library = TrackLibrary(path, storage=storage)
+        entry = ResidentLibrary(path, storage, stamp, library, time.perf_counter() - started)
+        self.entries[(str(path), storage)] = entry
+        return entry
+
+    def get(self, library_path: Path, storage: Optional[str] = None) -> TrackLibrary:
+        """
+        The library at library_path, loading it on first use or if its file has changed.
+
+        Raises:
+            ValueError: if the file doesn't exist
+        """
+        return self.entry(library_path, storage).library
+
+    def entry(self, library_path: Path, storage: Optional[str] = None) -> ResidentLibrary:
+        """As get(), with the file stamp and load time."""
+        path, storage = self._key(library_path, storage)
+        stamp = _file_stamp(path)
+        if stamp is None:
+            raise ValueError(f"Library not found: {library_path}")
+        entry = self.entries.get((str(path), storage))
+        if entry is None or entry.stamp != stamp:
+            entry = self._load(path, storage, stamp)
+        return entry
+
+    def refresh(self) -> List[ResidentLibrary]:
+        """
+        Reload libraries whose files have changed.
+
+        A file that can't be read (e.g. caught mid-save) keeps its old copy
+        until the file changes again.
+
+        Returns:
+            Entries reloaded
+        """
+        reloaded = []
+        for entry in list(self.entries.values()):
+            stamp = _file_stamp(entry.path)
+            if stamp is None or stamp == entry.stamp:
+                continue
+            try:
+                reloaded.append(self._load(entry.path, entry.storage, stamp))
+            except Exception as e:
+                entry.stamp = stamp
+                print(f"⚠ Could not reload {entry.path}, keeping the previous copy: {e}")
+        return reloaded
+
+
+class QueryServer(HTTPServer):
+    """HTTP server holding a LibraryCache; run() serves and watches the files."""
+
+    def __init__(self, address: Tuple[str, int], libraries: LibraryCache,
+                 watch_interval: float = WATCH_INTERVAL_DEFAULT):
+        super().__init__(address, QueryHandler)
+        self.libraries = libraries
+        self.watch_interval = watch_interval
+        # handle_request() waits at most this long, then handle_timeout() runs
+        self.timeout = watch_interval
+
+    def handle_timeout(self) -> None:
+        """Idle: reload changed libraries now rather than on the next request."""
+        for entry in self.libraries.refresh():
+            print(f"✓ Reloaded {entry.path}: {len(entry.library.tracks)} tracks in {entry.load_seconds:.2f}s")
+
+    def run(self) -> None:
+        """Serve until interrupted."""
+        while True:
+            self.handle_request()
+
+
+def _json_safe(value):
+    """NaN → None, tuples → lists, for json.dumps."""
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, dict):
+        return {k: _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    return value
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Routes requests to the query methods below."""
+
+    server: QueryServer
+
+    GET_ROUTES = {'/health': 'health', '/stats': 'stats', '/tracks': 'tracks',
+                  '/compatible': 'compatible'}
+    POST_ROUTES = {'/generate': 'generate', '/score': 'score', '/run': 'run'}
+
+    def log_message(self, format: str, *args) -> None:
+        pass    # _dispatch() prints one line per request
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        self._dispatch(self.GET_ROUTES.get(url.path), params)
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        if self.headers.get('Content-Type', '').split(';')[0].strip() != 'application/json':
+            self._reply(415, {'error': 'Send the body as application/json'})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._reply(400, {'error': 'Invalid JSON body'})
+            return
+        self._dispatch(self.POST_ROUTES.get(url.path), body)
+
+    def _dispatch(self, route: Optional[str], params: dict) -> None:
+        started = time.perf_counter()
+        host = self.headers.get('Host', '').rsplit(':', 1)[0].strip('[]')
+        if host not in ('127.0.0.1', 'localhost', '::1', self.server.server_address[0]):
+            status, result = 403, {'error': f"Host not allowed: {host}"}
+        elif route is None:
+            status, result = 404, {'error': f"Unknown endpoint: {self.path}"}
+        else:
+            try:
+                status, result = 200, getattr(self, route)(params)
+            except ValueError as e:
+                status, result = 400, {'error': str(e)}
+            except Exception as e:
+                traceback.print_exc()
+                status, result = 500, {'error': f"{type(e).__name__}: {e}"}
+        self._reply(status, result)
+        label = ' '.join(params.get('argv', [])) if route == 'run' else urlparse(self.path).path
+        print(f"  {self.command} {label} → {status} ({(time.perf_counter() - started) * 1000:.0f}ms)")
+
+    def _reply(self, status: int, result: dict) -> None:
+        payload = json.dumps(_json_safe(result)).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _library(self, params: dict) -> TrackLibrary:
+        if not params.get('library'):
+            raise ValueError("Missing parameter: library")
+        return self.server.libraries.get(Path(params['library']), params.get('storage'))
+
+    # Queries
+
+    def health(self, params: dict) -> dict:
+        return {
+            'status': 'ok',
+            'libraries': [
+                {'path': str(e.path), 'storage': e.storage, 'tracks': len(e.library.tracks),
+                 'load_seconds': e.load_seconds}
+                for e in self.server.libraries.entries.values()
+            ],
+        }
+
+    def stats(self, params: dict) -> dict:
+        return self._library(params).stats()
+
+    def tracks(self, params: dict) -> dict:
+        """Tracks by BPM (±2), key and energy (±1), as `list` filters them."""
+        library = self._library(params)
+        tracks = library.tracks
+        if params.get('bpm'):
+            bpm = float(params['bpm'])
+            tracks = library.find_tracks_by_bpm_range(bpm - 2, bpm + 2)
+        if params.get('key'):
+            key = parse_key(params['key'])
+            if key is None:
+                raise ValueError(f"Invalid key: {params['key']}")
+            tracks = [t for t in tracks if t.key == key]
+        if params.get('energy'):
+            energy = int(params['energy'])
+            tracks = [t for t in tracks if abs(t.energy_level - energy) <= 1]
+        limit = int(params.get('limit', 20))
+        return {'count': len(tracks), 'tracks': [t.to_dict() for t in tracks[:limit]]}
+
+    def compatible(self, params: dict) -> dict:
+        """Tracks that mix with the first track matching `track` (TrackLibrary.get_compatible_tracks)."""
+        library = self._library(params)
+        matches = library.search(params.get('track', ''))
+        if not matches:
+            raise ValueError(f"No track matches: {params.get('track', '')}")
+        compatible = library.get_compatible_tracks(
+            matches[0],
+            bpm_tolerance=float(params.get('tolerance', 6.0)),
+            key_compatible_only=params.get('strict_key', '') in ('1', 'true', 'yes')
+        )
+        limit = int(params.get('limit', 20))
+        return {'track': matches[0].to_dict(), 'count': len(compatible),
+                'tracks': [t.to_dict() for t in compatible[:limit]]}
+
+    def generate(self, params: dict) -> dict:
+        """A playlist (greedy, or beam search with optimize), with its transition score."""
+        library = self._library(params)
+        key_center = None
+        if params.get('key'):
+            key_center = parse_key(params['key'])
+            if key_center is None:
+                raise ValueError(f"Invalid key: {params['key']}")
+        planner = JourneyPlanner(library, seed=params.get('seed'))
+        arc = planner.create_journey_arc(
+            duration_minutes=int(params.get('duration', 120)),
+            key_center=key_center,
+            bpm_range=(float(params.get('min_bpm', 118)), float(params.get('max_bpm', 124))),
+            energy_progression=params.get('progression', 'gradual_build'),
+            blend_duration=int(params.get('blend', 60))
+        )
+        with contextlib.redirect_stdout(io.StringIO()):     # dead-end warnings
+            if params.get('optimize'):
+                playlist = planner.generate_optimized_playlist(
+                    arc, strict_key=bool(params.get('strict_key')), seed=params.get('seed'))
+            else:
+                playlist = planner.generate_playlist(arc, strict_key=bool(params.get('strict_key')))
+        return {'playlist': playlist.to_dict(),
+                'score': planner.score_sequence(playlist.tracks, arc)}
+
+    def score(self, params: dict) -> dict:
+        """PlaylistEvaluator summary and transitions of a playlist file (JSON or M3U)."""
+        if not params.get('playlist'):
+            raise ValueError("Missing parameter: playlist")
+        if not Path(params['playlist']).exists():
+            raise ValueError(f"Playlist not found: {params['playlist']}")
+        library = self._library(params) if params.get('library') else None
+        loaded = load_playlist(Path(params['playlist']), library)
+        arc = playlist_arc(loaded, params.get('progression'), params.get('blend'))
+        evaluation = PlaylistEvaluator(loaded.tracks).evaluate(arc, timed=bool(params.get('timed')))
+        return {'summary': evaluation.summary(), 'transitions': evaluation.transition_rows(),
+                'missing': loaded.missing}
+
+    def run(self, params: dict) -> dict:
+        """Run a CLI command in the client's directory; its output and exit code."""
+        from . import cli
+        from .client import SERVED_COMMANDS
+
+        argv = [str(a) for a in params.get('argv', [])]
+        command = next((a for a in argv if not a.startswith('-')), None)
+        if command not in SERVED_COMMANDS:
+            raise ValueError(f"Not a served command: {command}")
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        previous = os.getcwd()
+        exit_code = 0
+        # load_library() answers from the resident copies while this runs
+        cli._resident_libraries = self.server.libraries
+        try:
+            os.chdir(params.get('cwd') or previous)
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                try:
+                    cli.main(argv)
+                except SystemExit as e:
+                    exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                    if isinstance(e.code, str):
+                        print(e.code, file=sys.stderr)
+                except Exception:
+                    traceback.print_exc()
+                    exit_code = 1
+        finally:
+            cli._resident_libraries = None
+            os.chdir(previous)
+        return {'exit_code': exit_code, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+
+
+def serve(
+    preload: List[Path],
+    host: str = SERVER_HOST,
+    port: int = SERVER_PORT_DEFAULT,
+    storage: Optional[str] = None,
+    watch_interval: float = WATCH_INTERVAL_DEFAULT
+) -> QueryServer:
+    """
+    Load libraries and bind a QueryServer; call run() on it to serve.
+
+    Args:
+        preload: Libraries to load now (others load on first request)
+        host: Address to bind (keep it on localhost: there is no authentication)
+        port: Port to bind
+        storage: Storage mode for libraries (default: from the file extension)
+        watch_interval: Seconds between library file checks when idle
+    """
+    libraries = LibraryCache(storage)
+    for path in preload:
+        entry = libraries.entry(path)
+        print(f"✓ Loaded {len(entry.library.tracks)} tracks from {path} in {entry.load_seconds:.2f}s")
+    server = QueryServer((host, port), libraries, watch_interval)
+    print(f"✓ Serving on http://{host}:{port} (watching library files every {watch_interval:g}s; "
+          f"Ctrl-C to stop)")
+    return server
@@ -0,0 +1,308 @@
+"""SQLite storage engine for track libraries (.db)."""
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+import pandas as pd
+
+from .models import TrackMetadata, MusicalKey, TextureType, JourneyPosition, TEXTURE_BITS
+from .stats import LibraryStats
+
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+SQLITE_SCHEMA_VERSION = 1
+
+# Indexable columns are copied out of the row; `data` holds the full to_dict() JSON.
+# Row ids are library positions + 1 (rows are appended; replace_rows() renumbers).
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    id INTEGER PRIMARY KEY,
+    file_path TEXT NOT NULL,
+    title TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    bpm REAL NOT NULL,
+    key TEXT,
+    duration REAL NOT NULL DEFAULT 0,
+    energy_level INTEGER NOT NULL DEFAULT 5,
+    texture_mask INTEGER NOT NULL DEFAULT 0,
+    journey_position TEXT,
+    label TEXT,
+    year INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tracks_bpm ON tracks(bpm);
+CREATE INDEX IF NOT EXISTS idx_tracks_key ON tracks(key);
+CREATE INDEX IF NOT EXISTS idx_tracks_energy ON tracks(energy_level);
+CREATE INDEX IF NOT EXISTS idx_tracks_label ON tracks(label);
+CREATE INDEX IF NOT EXISTS idx_tracks_journey_position ON tracks(journey_position);
+"""
+
+# External-content FTS5 index over title/artist/label, kept in sync by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS tracks_fts USING fts5(
+    title, artist, label, content='tracks', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS tracks_fts_insert AFTER INSERT ON tracks BEGIN
+    INSERT INTO tracks_fts(rowid, title, artist, label)
+    VALUES (new.id, new.title, new.artist, new.label);
+END;
+CREATE TRIGGER IF NOT EXISTS tracks_fts_update AFTER UPDATE ON tracks BEGIN
+    INSERT INTO tracks_fts(tracks_fts, rowid, title, artist, label)
+    VALUES ('delete', old.id, old.title, old.artist, old.label);
+    INSERT INTO tracks_fts(rowid, title, artist, label)
+    VALUES (new.id, new.title, new.artist, new.label);
+END;
+"""
+
+INSERT_SQL = """
+INSERT INTO tracks (file_path, title, artist, bpm, key, duration, energy_level,
+                    texture_mask, journey_position, label, year, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+UPDATE_SQL = """
+UPDATE tracks SET file_path = ?, title = ?, artist = ?, bpm = ?, key = ?, duration = ?,
+                  energy_level = ?, texture_mask = ?, journey_position = ?, label = ?,
+                  year = ?, data = ?
+WHERE id = ?
+"""
+
+TEXTURE_VALUE_BITS: Dict[str, int] = {t.value: bit for t, bit in TEXTURE_BITS.items()}
+
+
+def is_sqlite_library(path: Union[str, Path]) -> bool:
+    """True if path uses the SQLite library format (by extension)."""
+    return Path(path).suffix.lower() in SQLITE_SUFFIXES
+
+
+def _row_values(row: dict) -> tuple:
+    """Column values for an INSERT/UPDATE from a to_dict() row."""
+    return (
+        str(row['file_path']),
+        row['title'],
+        row['artist'],
+        row['bpm'],
+        row.get('key'),
+        row.get('duration') or 0.0,
+        row.get('energy_level', 5),
+        sum(TEXTURE_VALUE_BITS[t] for t in set(row.get('textures', []))),
+        row.get('journey_position'),
+        row.get('label'),
+        row.get('year'),
+        json.dumps(row, separators=(',', ':')),
+    )
+
+
+class SQLiteTrackStore:
+    """
+    Track library held in a SQLite database.
+
+    Filters run as SQL against B-tree indexes on bpm, key, energy_level,
+    label and journey_position; title/artist/label search uses an FTS5
+    index. Queries return row positions and a row's JSON is only decoded
+    into a TrackMetadata when the track is read.
+
+    Edits to materialised tracks are written back by flush().
+    """
+
+    def __init__(self, path: Union[str, Path] = ':memory:'):
+        """
+        Open (or create) a library database.
+
+        Args:
+            path: Database file, or ':memory:' for a temporary library
+        """
+        self.path = path
+        self.conn = sqlite3.connect(str(path))
+        self.conn.executescript(SCHEMA)
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: search() falls back to LIKE
+            self.has_fts = False
+        self.conn.execute(f"PRAGMA user_version = {SQLITE_SCHEMA_VERSION}")
+        self.conn.commit()
+
+        self._size = self.conn.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+        self._tracks: Dict[int, TrackMetadata] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ── Building ──────────────────────────────────────────────────────────────
+
+    def append_rows(self, rows: Iterable[dict]) -> None:
+        """Insert tracks in TrackMetadata.to_dict() form (one transaction)."""
+        values = [_row_values(row) for row in rows]
+        with self.conn:
+            self.conn.executemany(INSERT_SQL, values)
+        self._size += len(values)
+
+    def append_track(self, track: TrackMetadata) -> None:
+        """Insert an already-built track (committed by flush())."""
+        self.conn.execute(INSERT_SQL, _row_values(track.to_dict()))
+        self._tracks[self._size] = track
+        self._size += 1
+
+    def replace_rows(self, rows: Iterable[dict]) -> None:
+        """Replace every track (used after removals); row ids restart at 1."""
+        values = [_row_values(row) for row in rows]
+        with self.conn:
+            if self.has_fts:
+                self.conn.execute("INSERT INTO tracks_fts(tracks_fts) VALUES ('delete-all')")
+            self.conn.execute("DELETE FROM tracks")
+            self.conn.executemany(INSERT_SQL, values)
+        self._size = len(values)
+        self._tracks = {}
+
+    def flush(self) -> None:
+        """Write materialised tracks back to their rows and commit."""
+        with self.conn:
+            self.conn.executemany(UPDATE_SQL, (
+                _row_values(track.to_dict()) + (position + 1,)
+                for position, track in self._tracks.items()
+            ))
+
+    # ── Row access ────────────────────────────────────────────────────────────
+
+    def track(self, position: int) -> TrackMetadata:
+        """Materialise (once) and return the track at a row position."""
+        position = int(position)
+        track = self._tracks.get(position)
+        if track is None:
+            row = self.conn.execute(
+                "SELECT data FROM tracks WHERE id = ?", (position + 1,)).fetchone()
+            track = TrackMetadata.from_dict(json.loads(row[0]))
+            self._tracks[position] = track
+        return track
+
+    def row_dict(self, position: int) -> dict:
+        """Track at a row position in to_dict() form."""
+        track = self._tracks.get(position)
+        if track is not None:
+            return track.to_dict()
+        row = self.conn.execute("SELECT data FROM tracks WHERE id = ?", (position + 1,)).fetchone()
+        return json.loads(row[0])
+
+    def iter_rows(self) -> Iterator[dict]:
+        """Every track in to_dict() form, in library order."""
+        for row_id, data in self.conn.execute("SELECT id, data FROM tracks ORDER BY id"):
+            track = self._tracks.get(row_id - 1)
+            yield track.to_dict() if track is not None else json.loads(data)
+
+    def materialised_count(self) -> int:
+        """Number of rows that have been turned into TrackMetadata objects."""
+        return len(self._tracks)
+
+    # ── Queries (return row positions) ────────────────────────────────────────
+
+    def _positions(self, where: str, params: tuple = (), order: str = "id") -> List[int]:
+        sql = f"SELECT id - 1 FROM tracks WHERE {where} ORDER BY {order}"
+        return [row[0] for row in self.conn.execute(sql, params)]
+
+    def bpm_range_positions(self, min_bpm: float, max_bpm: float) -> List[int]:
+        """Positions with min_bpm <= bpm <= max_bpm, in BPM order."""
+        return self._positions("bpm BETWEEN ? AND ?", (min_bpm, max_bpm), order="bpm, id")
+
+    def key_positions(self, key: MusicalKey) -> List[int]:
+        return self._positions("key = ?", (key.value,))
+
+    def energy_positions(self, energy_level: int, tolerance: int) -> List[int]:
+        return self._positions("energy_level BETWEEN ? AND ?",
+                               (energy_level - tolerance, energy_level + tolerance))
+
+    def texture_positions(self, texture: TextureType) -> List[int]:
+        return self._positions("texture_mask & ?", (TEXTURE_BITS[texture],))
+
+    def label_positions(self, label: str) -> List[int]:
+        pattern = '%' + label.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        return self._positions("label LIKE ? ESCAPE '\\'", (pattern,))
+
+    def journey_position_positions(self, position: JourneyPosition) -> List[int]:
+        return self._positions("journey_position = ?", (position.value,))
+
+    def compatible_positions(
+        self,
+        ref_bpm: float,
+        tolerance: float,
+        allowed_keys: Optional[frozenset] = None
+    ) -> List[int]:
+        """
+        Positions mixable with a reference BPM at x1, x2 or x0.5 (in library order).
+
+        Args:
+            ref_bpm: Reference track BPM
+            tolerance: Tolerance as a fraction (0.06 = 6%)
+            allowed_keys: If given, only keep tracks in these keys (or with no key)
+        """
+        where = "(bpm BETWEEN ? AND ? OR bpm BETWEEN ? AND ? OR bpm BETWEEN ? AND ?)"
+        params = []
+        for ratio in (1.0, 2.0, 0.5):
+            params += [ref_bpm * (ratio - tolerance), ref_bpm * (ratio + tolerance)]
+        if allowed_keys is not None:
+            where += f" AND (key IS NULL OR key IN ({', '.join('?' * len(allowed_keys))}))"
+            params += [k.value for k in allowed_keys]
+        return self._positions(where, tuple(params))
+
+    def search_positions(self, text: str) -> List[int]:
+        """
+        Positions whose title, artist or label contain every word of text.
+
+        Uses FTS5 prefix matching on words (so "spher" finds "Spherical").
+        """
+        words = text.split()
+        if not words:
+            return []
+        if not self.has_fts:
+            where = " AND ".join(["(title || ' ' || artist || ' ' || IFNULL(label, '')) LIKE ?"] * len(words))
+            return self._positions(where, tuple(f'%{w}%' for w in words))
+
+        query = " ".join('"' + w.replace('"', '""') + '"*' for w in words)
+        sql = "SELECT rowid - 1 FROM tracks_fts WHERE tracks_fts MATCH ? ORDER BY rowid"
+        return [row[0] for row in self.conn.execute(sql, (query,))]
+
+    # ── Analysis ──────────────────────────────────────────────────────────────
+
+    def library_stats(self) -> LibraryStats:
+        """Library aggregates computed with SQL GROUP BY queries."""
+        count, bpm_sum, bpm_min, bpm_max = self.conn.execute(
+            "SELECT COUNT(*), TOTAL(bpm), MIN(bpm), MAX(bpm) FROM tracks").fetchone()
+        bpm_bins = dict(self.conn.execute(
+            "SELECT CAST(bpm AS INTEGER), COUNT(*) FROM tracks GROUP BY 1"))
+        key_energy = {
+            (MusicalKey(key) if key else None, energy): n
+            for key, energy, n in self.conn.execute(
+                "SELECT key, energy_level, COUNT(*) FROM tracks GROUP BY key, energy_level")
+        }
+        label_counts = dict(self.conn.execute(
+            "SELECT label, COUNT(*) FROM tracks WHERE label IS NOT NULL AND label != '' GROUP BY label"))
+        position_counts = {
+            JourneyPosition(position) if position else None: n
+            for position, n in self.conn.execute(
+                "SELECT journey_position, COUNT(*) FROM tracks GROUP BY journey_position")
+        }
+        return LibraryStats.from_aggregates(
+            count, bpm_sum, bpm_min, bpm_max, bpm_bins, key_energy, label_counts, position_counts)
+
+    def dataframe(self) -> pd.DataFrame:
+        """Indexable columns as a DataFrame (textures as the texture_mask bitmask)."""
+        return pd.read_sql_query("""
+            SELECT file_path, title, artist, bpm, key, duration, energy_level,
+                   texture_mask, journey_position, label, year
+            FROM tracks ORDER BY id
+        """, self.conn)
+
+
+def write_sqlite_library(path: Path, rows: Iterable[dict]) -> None:
+    """Write tracks to a new library database, replacing any existing file."""
+    path = Path(path)
+    if path.exists():
+        path.unlink()
+    store = SQLiteTrackStore(path)
+    store.append_rows(rows)
+    store.close()
@@ -0,0 +1,128 @@
+"""Running library statistics and distributions."""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+from .models import TrackMetadata, MusicalKey, JourneyPosition
+
+# Energy levels run 1-10 (see EnergyLevel)
+ENERGY_LEVELS = range(1, 11)
+
+
+class LibraryStats:
+    """
+    Aggregates over a library, updated as tracks are added.
+
+    Holds count, BPM sum/min/max, and histograms of energy level, 1-BPM bins,
+    key, label, journey position and key × energy. add_track() is O(1), so
+    summary() and the distributions never need a pass over the tracks.
+
+    Like the library's other indices, edits made directly to a track's
+    fields are only picked up when the library rebuilds its indices.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.bpm_sum = 0.0
+        self.bpm_min = math.inf
+        self.bpm_max = -math.inf
+        self.energy_sum = 0
+
+        self.energy_counts: Dict[int, int] = {}
+        self.bpm_bins: Dict[int, int] = {}                 # int(bpm) → tracks
+        self.key_counts: Dict[Optional[MusicalKey], int] = {}
+        self.label_counts: Dict[str, int] = {}
+        self.position_counts: Dict[Optional[JourneyPosition], int] = {}
+        self.key_energy: Dict[Tuple[Optional[MusicalKey], int], int] = {}
+
+    @classmethod
+    def from_tracks(cls, tracks) -> 'LibraryStats':
+        stats = cls()
+        for track in tracks:
+            stats.add_track(track)
+        return stats
+
+    @classmethod
+    def from_aggregates(
+        cls,
+        count: int,
+        bpm_sum: float,
+        bpm_min: float,
+        bpm_max: float,
+        bpm_bins: Dict[int, int],
+        key_energy: Dict[Tuple[Optional[MusicalKey], int], int],
+        label_counts: Dict[str, int],
+        position_counts: Dict[Optional[JourneyPosition], int]
+    ) -> 'LibraryStats':
+        """
+        Build from aggregates computed elsewhere (NumPy columns, SQL GROUP BY).
+
+        Energy and key histograms are derived from key_energy.
+        """
+        stats = cls()
+        stats.count = count
+        stats.bpm_sum = bpm_sum
+        if count:
+            stats.bpm_min, stats.bpm_max = bpm_min, bpm_max
+        stats.bpm_bins = dict(bpm_bins)
+        stats.key_energy = dict(key_energy)
+        stats.label_counts = dict(label_counts)
+        stats.position_counts = dict(position_counts)
+        for (key, energy), n in key_energy.items():
+            stats.energy_counts[energy] = stats.energy_counts.get(energy, 0) + n
+            stats.key_counts[key] = stats.key_counts.get(key, 0) + n
+            stats.energy_sum += energy * n
+        return stats
+
+    def add_track(self, track: TrackMetadata) -> None:
+        """Count one track."""
+        bpm = track.bpm
+        energy = track.energy_level
+        self.count += 1
+        self.bpm_sum += bpm
+        if bpm < self.bpm_min:
+            self.bpm_min = bpm
+        if bpm > self.bpm_max:
+            self.bpm_max = bpm
+        self.energy_sum += energy
+
+        bpm_bin = int(bpm)
+        self.bpm_bins[bpm_bin] = self.bpm_bins.get(bpm_bin, 0) + 1
+        self.energy_counts[energy] = self.energy_counts.get(energy, 0) + 1
+        self.key_counts[track.key] = self.key_counts.get(track.key, 0) + 1
+        self.key_energy[track.key, energy] = self.key_energy.get((track.key, energy), 0) + 1
+        self.position_counts[track.journey_position] = (
+            self.position_counts.get(track.journey_position, 0) + 1)
+        if track.label:
+            self.label_counts[track.label] = self.label_counts.get(track.label, 0) + 1
+
+    def summary(self) -> Dict:
+        """The TrackLibrary.stats() dictionary."""
+        if not self.count:
+            return {'total_tracks': 0}
+        return {
+            'total_tracks': self.count,
+            'bpm_range': (self.bpm_min, self.bpm_max),
+            'bpm_average': self.bpm_sum / self.count,
+            'energy_range': (min(self.energy_counts), max(self.energy_counts)),
+            'energy_average': self.energy_sum / self.count,
+            'keys_represented': sum(1 for key in self.key_counts if key is not None),
+            'labels': len(self.label_counts)
+        }
+
+    def bpm_histogram(self) -> Dict[int, int]:
+        """Tracks per 1-BPM bin (122 → 122.0-122.99 BPM), in BPM order."""
+        return dict(sorted(self.bpm_bins.items()))
+
+    def key_energy_matrix(self) -> Dict[MusicalKey, List[int]]:
+        """
+        Tracks per key and energy level.
+
+        Returns:
+            Key → counts for energy levels 1-10 (index 0 = energy 1), for
+            every key in MusicalKey order
+        """
+        return {
+            key: [self.key_energy.get((key, energy), 0) for energy in ENERGY_LEVELS]
+            for key in MusicalKey
+        }
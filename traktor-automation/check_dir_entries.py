@@ -4,22 +4,16 @@ Quick check: show all NML entries for a given directory substring.
 Usage:
     python3 traktor-automation/check_dir_entries.py "Testing"
 """
-import xml.etree.ElementTree as ET
 import sys
 from pathlib import Path
 
+from nml_service import open_collection
+
 NML_PATH = Path.home() / "Documents/Native Instruments/Traktor 3.11.1/collection.nml"
 target = sys.argv[1] if len(sys.argv) > 1 else "Testing"
 
-tree = ET.parse(str(NML_PATH))
-root = tree.getroot()
-collection = root.find('.//COLLECTION')
-
-matches = []
-for entry in collection.findall('ENTRY'):
-    loc = entry.find('LOCATION')
-    if loc is not None and target in loc.get('DIR', ''):
-        matches.append(entry)
+collection = open_collection(NML_PATH)
+matches = collection.entries(dir=target)
 
 print(f"Found {len(matches)} entries matching '{target}'\n")
 for entry in matches:
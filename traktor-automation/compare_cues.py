@@ -1,20 +1,19 @@
 #!/usr/bin/env python3
 """Compare cue points across two NML entries for the same track."""
-import xml.etree.ElementTree as ET
 from pathlib import Path
 
+from nml_service import open_collection
+
 NML_PATH = Path.home() / "Documents/Native Instruments/Traktor 3.11.1/collection.nml"
 FILENAME = "Amazonas Santiago (Riccicomoto Para Dub).m4a"
 DIRS = ["/:Traktor/:Music/:2026/:Best of Deep Dub Tech House/:", "Testing"]
 
-tree = ET.parse(str(NML_PATH))
-collection = tree.getroot().find('.//COLLECTION')
+collection = open_collection(NML_PATH)
+candidates = collection.entries(file=FILENAME)
 
 for target_dir in DIRS:
-    for entry in collection.findall('ENTRY'):
+    for entry in candidates:
         loc = entry.find('LOCATION')
-        if loc is None: continue
-        if loc.get('FILE') != FILENAME: continue
         if target_dir not in loc.get('DIR', ''): continue
 
         tempo = entry.find('TEMPO')
@@ -9,6 +9,12 @@ beatgrid data that Traktor has already computed for each track.
 NO audio analysis required. NO stripes parsing. NO librosa.
 Uses only the BPM and beatgrid anchor already stored in the NML.
 
+Optional: --audio-root resolves each ENTRY's LOCATION to the audio file
+and refines the Breakdown cue with librosa (lowest-energy 30s window in
+the 40-80% zone, same detection as the MCP server's TraktorTrack). The
+whole playlist is analysed in a process pool with a per-track timeout and
+a persistent result cache, then written in one NML save.
+
 Cue layout (hotcue slots 2-5, slot 1 is NEVER touched):
   Slot 2 — "Beat"      : Where the kick comes in (bar-boundary estimated)
   Slot 3 — "Groove"    : 32-bar loop in the sustained groove section
@@ -46,17 +52,36 @@ Usage:
     python3 traktor-automation/deep_house_cue_writer.py \\
         --playlist track-selection-engine/best-of-deep-dub-tech-house.json \\
         --overwrite
+
+    # Refine Breakdown cues from the audio (librosa, 6 worker processes)
+    python3 traktor-automation/deep_house_cue_writer.py \\
+        --playlist track-selection-engine/best-of-deep-dub-tech-house.json \\
+        --audio-root /Volumes/TRAKTOR --workers 6
+
+    # Plan offline, review, then apply right before the gig
+    python3 traktor-automation/deep_house_cue_writer.py plan \\
+        --playlist track-selection-engine/best-of-deep-dub-tech-house.json \\
+        --output cue_plan.csv
+    python3 traktor-automation/deep_house_cue_writer.py apply cue_plan.csv
 """
 
 import xml.etree.ElementTree as ET
+import csv
 import json
-import shutil
 import argparse
+import importlib.util
+import os
+import signal
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
 
+# Uses the NML service (nml_service.py) when it is running, else parses directly
+from nml_service import open_collection, entry_key
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # CONSTANTS
@@ -91,53 +116,34 @@ SHORT_TRACK_LOOP_RATIO = 0.40
 GROOVE_FRACTION    = 0.35   # ~35% in = sustained groove pocket
 BREAKDOWN_FRACTION = 0.65   # ~65% in = breakdown zone
 
+# Plan files (plan/apply workflow)
+PLAN_FORMAT  = "deep-house-cue-plan"
+PLAN_VERSION = 1
+PLAN_CSV_FIELDS = [
+    'key', 'file', 'slot', 'name', 'type', 'start', 'len',
+    'prev_name', 'prev_type', 'prev_start', 'prev_len',
+]
 
-# ─────────────────────────────────────────────────────────────────────────────
-# NML HELPERS
-# ─────────────────────────────────────────────────────────────────────────────
-
-def load_nml(nml_path: Path) -> tuple:
-    """Parse collection.nml and return (tree, root)."""
-    if not nml_path.exists():
-        raise FileNotFoundError(f"collection.nml not found: {nml_path}")
-    tree = ET.parse(str(nml_path))
-    return tree, tree.getroot()
+# Two START/LEN values closer than this (ms) are considered unchanged
+PLAN_MATCH_TOLERANCE_MS = 0.001
 
+# Audio-enhanced Breakdown detection (--audio-root)
+AUDIO_CACHE_DEFAULT  = Path.home() / ".cache/traktor-automation/breakdown_cache.json"
+AUDIO_CACHE_VERSION  = 2      # bump when detection logic changes
+AUDIO_WORKERS_DEFAULT = max(1, (os.cpu_count() or 2) - 1)
+AUDIO_TIMEOUT_DEFAULT = 120   # seconds per track
+AUDIO_SAMPLE_RATE    = 22050  # enough for structure, much faster than 44.1k
+BREAKDOWN_WINDOW_S   = 30.0
+BREAKDOWN_ZONE       = (0.40, 0.80)
+BREAKDOWN_MAX_FRACTION = 0.85  # detections later than this fall back to the estimate
 
-def backup_nml(nml_path: Path) -> Path:
-    """Create a timestamped backup before any write."""
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_path = nml_path.parent / f"collection_backup_{ts}.nml"
-    shutil.copy2(nml_path, backup_path)
-    return backup_path
 
+# ─────────────────────────────────────────────────────────────────────────────
+# NML HELPERS
+# ─────────────────────────────────────────────────────────────────────────────
 
-def find_track_entry(root: ET.Element, filename: str,
-                     dir_filter: Optional[str] = None) -> Optional[ET.Element]:
-    """
-    Find the best ENTRY for a given filename.
-
-    Traktor creates duplicate entries when a file appears in multiple
-    folders/playlists. We want the entry that Traktor has fully analysed —
-    i.e. the one containing an AutoGrid cue (TYPE=4). If multiple gridded
-    entries exist we pick the most recently modified. Falls back to most
-    recently modified ungridded entry if no grid is found anywhere.
-    """
-    collection = root.find('.//COLLECTION')
-    if collection is None:
-        return None
-
-    candidates = []
-    for entry in collection.findall('ENTRY'):
-        loc = entry.find('LOCATION')
-        if loc is None:
-            continue
-        if loc.get('FILE') != filename:
-            continue
-        if dir_filter and dir_filter not in loc.get('DIR', ''):
-            continue
-        candidates.append(entry)
-
+def select_best_entry(candidates: list) -> Optional[ET.Element]:
+    """Pick the most recently modified gridded entry among duplicates."""
     if not candidates:
         return None
     if len(candidates) == 1:
@@ -218,6 +224,23 @@ def occupied_hotcue_slots(entry: ET.Element) -> set:
     return slots
 
 
+def slot_snapshot(entry: ET.Element, slot: int) -> Optional[dict]:
+    """Return {name, type, start, len} of the cue in a hotcue slot, or None."""
+    for cue in entry.findall('CUE_V2'):
+        if cue.get('HOTCUE') == str(slot):
+            try:
+                return {
+                    'name':  cue.get('NAME', ''),
+                    'type':  int(cue.get('TYPE', '0')),
+                    'start': float(cue.get('START', 0)),
+                    'len':   float(cue.get('LEN', 0)),
+                }
+            except ValueError:
+                return {'name': cue.get('NAME', ''), 'type': None,
+                        'start': None, 'len': None}
+    return None
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # CUE POINT ARITHMETIC
 # ─────────────────────────────────────────────────────────────────────────────
@@ -235,7 +258,8 @@ def snap_to_bar(ms: float, bpm: float, anchor_ms: float) -> float:
     return anchor_ms + nearest_bar * bar_ms
 
 
-def calculate_positions(bpm: float, anchor_ms: float, duration_ms: float) -> dict:
+def calculate_positions(bpm: float, anchor_ms: float, duration_ms: float,
+                        detected_breakdown_ms: Optional[float] = None) -> dict:
     """
     Calculate the four cue positions using bar-boundary arithmetic.
 
@@ -249,7 +273,10 @@ def calculate_positions(bpm: float, anchor_ms: float, duration_ms: float) -> dic
 
     BREAKDOWN — bar boundary nearest to 65% of track duration.
                 Deep house breakdowns typically fall 60–70% in.
-                Flag for review.
+                Flag for review. If detected_breakdown_ms is given
+                (audio analysis), it is bar-snapped and used instead
+                as long as it lands after the groove loop and before
+                85% of the track.
 
     END       — bar boundary 32 bars before end of track.
                 Gives a full 32-bar mix-out runway.
@@ -279,7 +306,15 @@ def calculate_positions(bpm: float, anchor_ms: float, duration_ms: float) -> dic
 
     # BREAKDOWN
     breakdown_ms = snap_to_bar(duration_ms * BREAKDOWN_FRACTION, bpm, anchor_ms)
-    flags.append("BREAKDOWN: estimated at ~65% of track — verify in Traktor")
+    if detected_breakdown_ms is None:
+        flags.append("BREAKDOWN: estimated at ~65% of track — verify in Traktor")
+    else:
+        detected = snap_to_bar(detected_breakdown_ms, bpm, anchor_ms)
+        if groove_ms + bars_to_ms(8, bpm) <= detected <= duration_ms * BREAKDOWN_MAX_FRACTION:
+            breakdown_ms = detected
+            flags.append(f"BREAKDOWN: detected at {detected/1000:.1f}s by energy analysis")
+        else:
+            flags.append("BREAKDOWN: audio detection out of range — fell back to ~65% estimate")
 
     # END (mix-out marker)
     end_ms = snap_to_bar(duration_ms - loop_ms, bpm, anchor_ms)
@@ -327,52 +362,256 @@ def remove_slot(entry: ET.Element, slot: int):
             entry.remove(cue)
 
 
-def write_cues(entry: ET.Element, pos: dict, overwrite: bool = False) -> dict:
-    """
-    Write the four cue points into an ENTRY element.
-    Returns {'written': [...], 'skipped': [...]}.
-    """
-    occupied = occupied_hotcue_slots(entry)
-    written  = []
-    skipped  = []
-
-    cues = [
+def cue_layout(pos: dict) -> list:
+    """Return the four (slot, name, start_ms, type, len_ms) cues for a track."""
+    return [
         (SLOT_BEAT,      'Beat',      pos['beat_ms'],      TYPE_CUE,  0.0),
         (SLOT_BREAKDOWN, 'Breakdown', pos['breakdown_ms'], TYPE_CUE,  0.0),
         (SLOT_GROOVE,    'Groove',    pos['groove_ms'],    TYPE_LOOP, pos['groove_len_ms']),
         (SLOT_END,       'End',       pos['end_ms'],       TYPE_CUE,  0.0),
     ]
 
-    for slot, name, start_ms, cue_type, len_ms in cues:
+
+def plan_changes(entry: ET.Element, pos: dict, overwrite: bool = False) -> dict:
+    """
+    Work out every CUE_V2 change for an ENTRY without touching it.
+    Returns {'changes': [...], 'skipped': [...]}.
+
+    Each change is a plain dict (entry key, slot, name, type, start, len and
+    the slot's previous value) so it can be written to a plan file and
+    applied later with apply_change().
+    """
+    occupied = occupied_hotcue_slots(entry)
+    key      = entry_key(entry)
+    loc      = entry.find('LOCATION')
+    changes  = []
+    skipped  = []
+
+    for slot, name, start_ms, cue_type, len_ms in cue_layout(pos):
         if slot in occupied and not overwrite:
             skipped.append(f"Slot {slot} ({name}) already occupied — skipped (use --overwrite)")
             continue
-        if slot in occupied:
-            remove_slot(entry, slot)
+        changes.append({
+            'key':      key,
+            'file':     loc.get('FILE', '') if loc is not None else '',
+            'slot':     slot,
+            'name':     name,
+            'type':     cue_type,
+            'start':    round(start_ms, 6),
+            'len':      round(len_ms, 6),
+            'previous': slot_snapshot(entry, slot) if slot in occupied else None,
+        })
+
+    return {'changes': changes, 'skipped': skipped}
+
+
+def apply_change(entry: ET.Element, change: dict) -> str:
+    """Apply one planned change to an ENTRY. Returns a summary line."""
+    slot = int(change['slot'])
+    if slot == 1:
+        raise ValueError("Slot 1 is protected and can never be written")
+    remove_slot(entry, slot)
+    len_ms = float(change['len'])
+    entry.append(make_cue_element(
+        name=change['name'], start_ms=float(change['start']), hotcue=slot,
+        displ_order=slot - 1, cue_type=int(change['type']), len_ms=len_ms,
+    ))
+    loop_note = f"  [loop {len_ms/1000:.1f}s]" if len_ms > 0 else ""
+    return f"Slot {slot} ({change['name']}): {float(change['start'])/1000:.2f}s{loop_note}"
+
 
-        entry.append(make_cue_element(
-            name=name, start_ms=start_ms, hotcue=slot,
-            displ_order=slot - 1, cue_type=cue_type, len_ms=len_ms,
-        ))
-        loop_note = f"  [loop {len_ms/1000:.1f}s]" if len_ms > 0 else ""
-        written.append(f"Slot {slot} ({name}): {start_ms/1000:.2f}s{loop_note}")
+def write_cues(entry: ET.Element, pos: dict, overwrite: bool = False) -> dict:
+    """
+    Write the four cue points into an ENTRY element.
+    Returns {'written': [...], 'skipped': [...]}.
+    """
+    planned = plan_changes(entry, pos, overwrite=overwrite)
+    written = [apply_change(entry, change) for change in planned['changes']]
+    return {'written': written, 'skipped': planned['skipped']}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# AUDIO ANALYSIS (optional, --audio-root)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def resolve_audio_path(entry: ET.Element, audio_root: Path) -> Optional[Path]:
+    """
+    Map an ENTRY's LOCATION to a file under audio_root.
+
+    Traktor stores DIR as "/:Traktor/:Music/:2026/:Album/:". The full DIR is
+    tried under audio_root first, then with leading folders dropped, so
+    audio_root may be the volume (/Volumes/TRAKTOR) or any folder inside it.
+    """
+    loc = entry.find('LOCATION')
+    if loc is None or not loc.get('FILE'):
+        return None
+    parts = [p for p in loc.get('DIR', '').split('/:') if p]
+    for i in range(len(parts) + 1):
+        candidate = audio_root.joinpath(*parts[i:], loc.get('FILE'))
+        if candidate.is_file():
+            return candidate
+    return None
 
-    return {'written': written, 'skipped': skipped}
+
+def _analysis_timeout(signum, frame):
+    raise TimeoutError("analysis timed out")
+
+
+def detect_breakdown_ms(audio_path: str, duration_ms: float, timeout: int = 0) -> Optional[float]:
+    """
+    Find the start of the lowest-energy 30s window in the 40-80% zone.
+
+    Runs in a worker process. The per-track timeout uses SIGALRM inside the
+    worker, so a stuck decode is abandoned without blocking the pool.
+    Returns position in milliseconds, or None if detection fails.
+    """
+    import librosa
+    import numpy as np
+
+    use_alarm = timeout and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _analysis_timeout)
+        signal.alarm(timeout)
+    try:
+        y, sr = librosa.load(audio_path, sr=AUDIO_SAMPLE_RATE, mono=True)
+        hop = 512
+        rms = librosa.feature.rms(y=y, hop_length=hop)[0]
+        times = librosa.frames_to_time(np.arange(len(rms)), sr=sr, hop_length=hop)
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+
+    duration_s = duration_ms / 1000.0
+    zone_start = duration_s * BREAKDOWN_ZONE[0]
+    zone_end   = duration_s * BREAKDOWN_ZONE[1]
+    mask = (times >= zone_start) & (times <= zone_end)
+    if not mask.any():
+        return None
+
+    window_frames = max(1, int(BREAKDOWN_WINDOW_S * len(times) / duration_s))
+    zone_rms = rms[mask]
+    if len(zone_rms) < window_frames:
+        return None
+    windows = np.convolve(zone_rms, np.ones(window_frames) / window_frames, mode='valid')
+    return float(times[mask][int(np.argmin(windows))]) * 1000.0
+
+
+def _cache_key(audio_path: Path) -> str:
+    st = audio_path.stat()
+    return f"{audio_path.resolve()}|{st.st_size}|{st.st_mtime_ns}"
+
+
+def load_audio_cache(cache_path: Path) -> dict:
+    if not cache_path.exists():
+        return {}
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if data.get('version') != AUDIO_CACHE_VERSION:
+        return {}
+    return data.get('results', {})
+
+
+def save_audio_cache(cache_path: Path, results: dict) -> None:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'version': AUDIO_CACHE_VERSION, 'results': results}, f)
+    os.replace(tmp, cache_path)
+
+
+def analyze_breakdowns(collection, filenames: list, audio_root: Path,
+                       dir_filter: Optional[str] = None,
+                       workers: int = AUDIO_WORKERS_DEFAULT,
+                       timeout: int = AUDIO_TIMEOUT_DEFAULT,
+                       cache_path: Path = AUDIO_CACHE_DEFAULT) -> dict:
+    """
+    Detect Breakdown positions for a batch of tracks in a process pool.
+
+    Results are cached by (path, size, mtime), so re-runs only analyse new
+    or changed files. Returns {filename: breakdown_ms}; tracks that could
+    not be resolved or analysed are left out and fall back to the estimate.
+    """
+    cache   = load_audio_cache(cache_path)
+    hints   = {}
+    jobs    = {}
+    missing = []
+    cached  = 0
+
+    for filename in dict.fromkeys(filenames):
+        entry = select_best_entry(collection.entries(file=filename, dir=dir_filter))
+        if entry is None:
+            continue
+        duration_ms = get_duration_ms(entry)
+        audio_path  = resolve_audio_path(entry, audio_root)
+        if audio_path is None or not duration_ms:
+            missing.append(filename)
+            continue
+        key = _cache_key(audio_path)
+        if key in cache:
+            cached += 1
+            if cache[key]['breakdown_ms'] is not None:
+                hints[filename] = cache[key]['breakdown_ms']
+            continue
+        jobs[filename] = (audio_path, duration_ms, key)
+
+    print(f"\n🔊 Audio analysis: {cached} cached, "
+          f"{len(jobs)} to analyse, {len(missing)} not found under {audio_root}")
+    if not jobs:
+        return hints
+
+    t0 = time.perf_counter()
+    done = 0
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(detect_breakdown_ms, str(path), duration_ms, timeout): (filename, key)
+            for filename, (path, duration_ms, key) in jobs.items()
+        }
+        try:
+            for future in as_completed(futures):
+                filename, key = futures[future]
+                done += 1
+                try:
+                    breakdown_ms = future.result()
+                except Exception as e:
+                    failed.append((filename, f"{type(e).__name__}: {e}"))
+                    continue
+                cache[key] = {'breakdown_ms': breakdown_ms}
+                if breakdown_ms is not None:
+                    hints[filename] = breakdown_ms
+                elapsed = time.perf_counter() - t0
+                print(f"   [{done}/{len(jobs)}] {filename}  "
+                      f"({done / elapsed:.2f} tracks/s)")
+                if done % 10 == 0:
+                    save_audio_cache(cache_path, cache)
+        finally:
+            save_audio_cache(cache_path, cache)
+
+    print(f"   Analysed {len(jobs) - len(failed)} tracks in "
+          f"{time.perf_counter() - t0:.1f}s with {workers} workers")
+    for filename, error in failed:
+        print(f"   ⚠️  {filename}: {error} — using ~65% estimate")
+    return hints
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # TRACK PROCESSING
 # ─────────────────────────────────────────────────────────────────────────────
 
-def process_track(root: ET.Element, filename: str,
+def process_track(collection, filename: str,
                   overwrite: bool = False, dry_run: bool = False,
-                  dir_filter: Optional[str] = None) -> dict:
+                  dir_filter: Optional[str] = None, plan: bool = False,
+                  breakdown_ms: Optional[float] = None) -> dict:
     result = {
         'ok': False, 'filename': filename,
         'written': [], 'skipped': [], 'flags': [], 'error': None,
+        'changes': [],
     }
 
-    entry = find_track_entry(root, filename, dir_filter=dir_filter)
+    entry = select_best_entry(collection.entries(file=filename, dir=dir_filter))
     if entry is None:
         result['error'] = "Not found in collection.nml"
         return result
@@ -390,7 +629,8 @@ def process_track(root: ET.Element, filename: str,
         result['error'] = "Could not read track duration from NML"
         return result
 
-    pos = calculate_positions(bpm, anchor_ms, duration_ms)
+    pos = calculate_positions(bpm, anchor_ms, duration_ms,
+                              detected_breakdown_ms=breakdown_ms)
     result['flags'] = pos['flags']
 
     if dry_run:
@@ -403,15 +643,33 @@ def process_track(root: ET.Element, filename: str,
             f"  [loop {pos['groove_len_ms']/1000:.1f}s]",
             f"[DRY RUN] Slot {SLOT_END}  End:       {pos['end_ms']/1000:.2f}s",
         ]
+    elif plan:
+        planned = plan_changes(entry, pos, overwrite=overwrite)
+        result['changes'] = planned['changes']
+        result['written'] = [describe_change(c) for c in planned['changes']]
+        result['skipped'] = planned['skipped']
+        result['ok'] = True
     else:
         wr = write_cues(entry, pos, overwrite=overwrite)
         result['written'] = wr['written']
         result['skipped'] = wr['skipped']
+        result['entry'] = entry
         result['ok'] = True
 
     return result
 
 
+def describe_change(change: dict) -> str:
+    """One-line human summary of a planned change."""
+    loop_note = f"  [loop {change['len']/1000:.1f}s]" if change['len'] > 0 else ""
+    line = f"[PLAN] Slot {change['slot']}  {change['name']}: {change['start']/1000:.2f}s{loop_note}"
+    prev = change.get('previous')
+    if prev:
+        start = f"{prev['start']/1000:.2f}s" if prev.get('start') is not None else "?"
+        line += f"  (replaces {prev['name']!r} @ {start})"
+    return line
+
+
 def print_result(result: dict, verbose: bool = True):
     status = "✅" if result['ok'] else "❌"
     print(f"\n{status}  {result['filename']}")
@@ -427,25 +685,135 @@ def print_result(result: dict, verbose: bool = True):
             print(f"   📋 {flag}")
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# PLAN FILES
+# ─────────────────────────────────────────────────────────────────────────────
+#
+# A plan is the list of CUE_V2 changes a run would make, one row per slot.
+# JSON plans carry a small header (NML path, creation time); CSV plans are
+# flat rows, easier to review and edit in a spreadsheet. The format is
+# chosen from the file extension.
+
+def write_plan(plan_path: Path, changes: list, nml_path: Path, overwrite: bool) -> None:
+    """Write planned changes to a .json or .csv plan file."""
+    if plan_path.suffix.lower() == '.csv':
+        with open(plan_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=PLAN_CSV_FIELDS)
+            writer.writeheader()
+            for c in changes:
+                prev = c['previous'] or {}
+                writer.writerow({
+                    'key': c['key'], 'file': c['file'], 'slot': c['slot'],
+                    'name': c['name'], 'type': c['type'],
+                    'start': f"{c['start']:.6f}", 'len': f"{c['len']:.6f}",
+                    'prev_name':  prev.get('name', ''),
+                    'prev_type':  '' if prev.get('type') is None else prev['type'],
+                    'prev_start': '' if prev.get('start') is None else f"{prev['start']:.6f}",
+                    'prev_len':   '' if prev.get('len') is None else f"{prev['len']:.6f}",
+                })
+        return
+
+    plan = {
+        'format':    PLAN_FORMAT,
+        'version':   PLAN_VERSION,
+        'created':   datetime.now().isoformat(timespec='seconds'),
+        'nml':       str(nml_path),
+        'overwrite': overwrite,
+        'changes':   changes,
+    }
+    with open(plan_path, 'w', encoding='utf-8') as f:
+        # One change per line: compact, but still diffable and reviewable
+        f.write('{\n')
+        for field in ('format', 'version', 'created', 'nml', 'overwrite'):
+            f.write(f'  {json.dumps(field)}: {json.dumps(plan[field])},\n')
+        f.write('  "changes": [\n')
+        f.write(',\n'.join(f'    {json.dumps(c, ensure_ascii=False)}' for c in changes))
+        f.write('\n  ]\n}\n')
+
+
+def read_plan(plan_path: Path) -> tuple:
+    """
+    Read a plan file. Returns (header, changes).
+    The header is empty for CSV plans.
+    """
+    if plan_path.suffix.lower() == '.csv':
+        changes = []
+        with open(plan_path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                previous = None
+                if row.get('prev_name') or row.get('prev_start'):
+                    previous = {
+                        'name':  row.get('prev_name', ''),
+                        'type':  int(row['prev_type']) if row.get('prev_type') else None,
+                        'start': float(row['prev_start']) if row.get('prev_start') else None,
+                        'len':   float(row['prev_len']) if row.get('prev_len') else None,
+                    }
+                changes.append({
+                    'key': row['key'], 'file': row['file'], 'slot': int(row['slot']),
+                    'name': row['name'], 'type': int(row['type']),
+                    'start': float(row['start']), 'len': float(row['len']),
+                    'previous': previous,
+                })
+        return {}, changes
+
+    with open(plan_path, encoding='utf-8') as f:
+        plan = json.load(f)
+    if plan.get('format') != PLAN_FORMAT:
+        raise ValueError(f"Not a cue plan file: {plan_path}")
+    if plan.get('version', 0) > PLAN_VERSION:
+        raise ValueError(f"Plan version {plan['version']} is newer than this script supports")
+    changes = plan.pop('changes', [])
+    return plan, changes
+
+
+def snapshot_matches(current: Optional[dict], previous: Optional[dict]) -> bool:
+    """True if a slot still holds the value recorded when the plan was made."""
+    if current is None or previous is None:
+        return current is None and previous is None
+    if current.get('name') != previous.get('name'):
+        return False
+    if current.get('type') != previous.get('type'):
+        return False
+    for field in ('start', 'len'):
+        a, b = current.get(field), previous.get(field)
+        if a is None or b is None:
+            if a is not b:
+                return False
+        elif abs(a - b) > PLAN_MATCH_TOLERANCE_MS:
+            return False
+    return True
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # ENTRY POINTS
 # ─────────────────────────────────────────────────────────────────────────────
 
-def run_single(args, root, tree, nml_path):
+def breakdown_hints(args, collection, filenames: list) -> dict:
+    """Run audio analysis when --audio-root is given, else return no hints."""
+    if not args.audio_root:
+        return {}
+    return analyze_breakdowns(
+        collection, filenames, Path(args.audio_root), dir_filter=args.dir,
+        workers=args.workers, timeout=args.timeout, cache_path=Path(args.audio_cache),
+    )
+
+
+def run_single(args, collection, nml_path):
     filename = Path(args.track).name
-    result = process_track(root, filename, overwrite=args.overwrite,
-                           dry_run=args.dry_run, dir_filter=args.dir)
+    hints = breakdown_hints(args, collection, [filename])
+    result = process_track(collection, filename, overwrite=args.overwrite,
+                           dry_run=args.dry_run, dir_filter=args.dir,
+                           breakdown_ms=hints.get(filename))
     print_result(result)
     if result['ok'] and not args.dry_run and result['written']:
-        bp = backup_nml(nml_path)
+        bp = collection.save([result['entry']])
         print(f"\n💾 Backup: {bp}")
-        tree.write(str(nml_path), encoding='UTF-8', xml_declaration=True)
         print(f"✅ Saved: {nml_path}")
         print("\n⚠️  Restart Traktor to load the updated collection.")
 
 
-def run_playlist(args, root, tree, nml_path):
-    playlist_path = Path(args.playlist)
+def load_playlist_filenames(playlist_path: Path) -> list:
+    """Return the track filenames from a playlist JSON, version 1 or 2 (exits on error)."""
     if not playlist_path.exists():
         print(f"❌ Playlist not found: {playlist_path}")
         sys.exit(1)
@@ -454,19 +822,30 @@ def run_playlist(args, root, tree, nml_path):
         playlist = json.load(f)
 
     tracks = playlist.get('tracks', [])
+    if 'order' in playlist:
+        # Version 2 stores a repeated track once; "order" gives play order
+        tracks = [tracks[i] for i in playlist['order']]
     if not tracks:
         print("❌ No tracks found in playlist JSON")
         sys.exit(1)
 
-    print(f"\n🎵 Processing {len(tracks)} tracks from {playlist_path.name}")
+    return [Path(track.get('file_path', '')).name for track in tracks]
+
+
+def run_playlist(args, collection, nml_path):
+    playlist_path = Path(args.playlist)
+    filenames = load_playlist_filenames(playlist_path)
+
+    print(f"\n🎵 Processing {len(filenames)} tracks from {playlist_path.name}")
     if args.dry_run:
         print("   (DRY RUN — no changes will be written)\n")
 
+    hints = breakdown_hints(args, collection, filenames)
     results = []
-    for track in tracks:
-        filename = Path(track.get('file_path', '')).name
-        result = process_track(root, filename, overwrite=args.overwrite,
-                               dry_run=args.dry_run, dir_filter=args.dir)
+    for filename in filenames:
+        result = process_track(collection, filename, overwrite=args.overwrite,
+                               dry_run=args.dry_run, dir_filter=args.dir,
+                               breakdown_ms=hints.get(filename))
         print_result(result, verbose=args.verbose)
         results.append(result)
 
@@ -489,9 +868,8 @@ def run_playlist(args, root, tree, nml_path):
             print(f"  {r['filename']}: {r['error']}")
 
     if any(r['written'] for r in results) and not args.dry_run:
-        bp = backup_nml(nml_path)
+        bp = collection.save([r['entry'] for r in results if r['written']])
         print(f"\n💾 Backup: {bp}")
-        tree.write(str(nml_path), encoding='UTF-8', xml_declaration=True)
         print(f"✅ Saved: {nml_path}")
         print("\n⚠️  Restart Traktor to load the updated collection.")
     elif args.dry_run:
@@ -500,13 +878,121 @@ def run_playlist(args, root, tree, nml_path):
         print("\nNothing to write.")
 
 
+def run_plan(args, collection, nml_path):
+    if args.track:
+        filenames = [Path(args.track).name]
+    else:
+        playlist_path = Path(args.playlist)
+        filenames = load_playlist_filenames(playlist_path)
+        print(f"\n🎵 Planning {len(filenames)} tracks from {playlist_path.name}")
+
+    hints = breakdown_hints(args, collection, filenames)
+    results = []
+    for filename in filenames:
+        result = process_track(collection, filename, overwrite=args.overwrite,
+                               dir_filter=args.dir, plan=True,
+                               breakdown_ms=hints.get(filename))
+        print_result(result, verbose=args.verbose)
+        results.append(result)
+
+    changes = [c for r in results for c in r['changes']]
+    errors  = [r for r in results if r['error']]
+    plan_path = Path(args.output)
+    write_plan(plan_path, changes, nml_path, overwrite=args.overwrite)
+
+    print(f"\n{'─'*60}")
+    print(f"  Tracks    : {len(results)}")
+    print(f"  Changes   : {len(changes)}")
+    print(f"  Errors    : {len(errors)}")
+    print(f"{'─'*60}")
+    print(f"\n📝 Plan written: {plan_path}")
+    print(f"   Review it, then run:  deep_house_cue_writer.py apply {plan_path}")
+
+
+def run_apply(args):
+    plan_path = Path(args.plan_file)
+    if not plan_path.exists():
+        print(f"❌ Plan not found: {plan_path}")
+        sys.exit(1)
+
+    try:
+        header, changes = read_plan(plan_path)
+    except (ValueError, KeyError, json.JSONDecodeError) as e:
+        print(f"❌ Could not read plan: {e}")
+        sys.exit(1)
+
+    nml_path = Path(args.nml or header.get('nml') or NML_DEFAULT)
+    print(f"\n📝 Applying {len(changes)} changes from {plan_path.name}")
+    print(f"   NML: {nml_path}")
+    if header.get('created'):
+        print(f"   Planned: {header['created']}")
+
+    try:
+        collection = open_collection(nml_path)
+    except FileNotFoundError as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
+
+    index   = collection.by_keys(c['key'] for c in changes)
+    applied = []
+    stale   = []
+    missing = []
+    for change in changes:
+        entry = index.get(change['key'])
+        if entry is None:
+            missing.append(change)
+            continue
+        current = slot_snapshot(entry, change['slot'])
+        if not args.force and not snapshot_matches(current, change.get('previous')):
+            stale.append(change)
+            continue
+        if not args.dry_run:
+            apply_change(entry, change)
+        applied.append(change)
+
+    print(f"\n{'─'*60}")
+    print(f"  Applied   : {len(applied)}")
+    print(f"  Stale     : {len(stale)}  (slot changed since plan — use --force)")
+    print(f"  Missing   : {len(missing)}  (entry no longer in collection)")
+    print(f"{'─'*60}")
+
+    for change in stale:
+        print(f"  ⚠️  {change['file']}: slot {change['slot']} changed since plan — skipped")
+    for change in missing:
+        print(f"  ❌ {change['file']}: entry not found — {change['key']}")
+
+    if args.dry_run:
+        print("\n(Dry run complete — nothing written)")
+    elif applied:
+        bp = collection.save([index[key] for key in {c['key'] for c in applied}])
+        print(f"\n💾 Backup: {bp}")
+        print(f"✅ Saved: {nml_path}")
+        print("\n⚠️  Restart Traktor to load the updated collection.")
+    else:
+        print("\nNothing to write.")
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # CLI
 # ─────────────────────────────────────────────────────────────────────────────
 
 def main():
+    audio = argparse.ArgumentParser(add_help=False)
+    audio_group = audio.add_argument_group('audio-enhanced Breakdown detection (librosa)')
+    audio_group.add_argument('--audio-root', metavar='DIR', default=None,
+                             help='Resolve each entry\'s LOCATION under this folder and detect '
+                                  'the Breakdown from the audio (e.g. /Volumes/TRAKTOR)')
+    audio_group.add_argument('--workers', type=int, default=AUDIO_WORKERS_DEFAULT,
+                             help=f'Analysis worker processes (default: {AUDIO_WORKERS_DEFAULT})')
+    audio_group.add_argument('--timeout', type=int, default=AUDIO_TIMEOUT_DEFAULT,
+                             help=f'Per-track analysis timeout in seconds '
+                                  f'(default: {AUDIO_TIMEOUT_DEFAULT})')
+    audio_group.add_argument('--audio-cache', metavar='PATH', default=str(AUDIO_CACHE_DEFAULT),
+                             help=f'Analysis result cache (default: {AUDIO_CACHE_DEFAULT})')
+
     parser = argparse.ArgumentParser(
         description='Write deep house cue points to Traktor collection.nml',
+        parents=[audio],
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Examples:
@@ -532,10 +1018,21 @@ Examples:
   python3 traktor-automation/deep_house_cue_writer.py \\
       --playlist track-selection-engine/best-of-deep-dub-tech-house.json \\
       --nml "/Users/dantaylor/Documents/Native Instruments/Traktor 3.11.1/collection.nml"
+
+  # Refine Breakdown cues from the audio files (process pool + cache)
+  python3 traktor-automation/deep_house_cue_writer.py \\
+      --playlist track-selection-engine/best-of-deep-dub-tech-house.json \\
+      --audio-root /Volumes/TRAKTOR --workers 6 --timeout 90
+
+  # Plan now, apply later (plan format chosen by extension: .json or .csv)
+  python3 traktor-automation/deep_house_cue_writer.py plan \\
+      --playlist track-selection-engine/best-of-deep-dub-tech-house.json \\
+      --output cue_plan.csv
+  python3 traktor-automation/deep_house_cue_writer.py apply cue_plan.csv
         """
     )
 
-    mode = parser.add_mutually_exclusive_group(required=True)
+    mode = parser.add_mutually_exclusive_group()
     mode.add_argument('--track',    metavar='FILENAME',
                       help='Filename of a single track to process')
     mode.add_argument('--playlist', metavar='JSON_FILE',
@@ -554,30 +1051,80 @@ Examples:
     parser.add_argument('--verbose',   action='store_true', default=True,
                         help='Show flags and review notes (default: on)')
 
+    subparsers = parser.add_subparsers(dest='command', metavar='{plan,apply}')
+
+    plan_parser = subparsers.add_parser(
+        'plan', parents=[audio],
+        help='Write every intended CUE_V2 change to a plan file (no NML changes)')
+    plan_mode = plan_parser.add_mutually_exclusive_group(required=True)
+    plan_mode.add_argument('--track',    metavar='FILENAME',
+                           help='Filename of a single track to plan')
+    plan_mode.add_argument('--playlist', metavar='JSON_FILE',
+                           help='Path to playlist JSON file')
+    plan_parser.add_argument('-o', '--output', metavar='PLAN_FILE', required=True,
+                             help='Plan file to write (.json or .csv)')
+    plan_parser.add_argument('--nml', metavar='PATH', default=str(NML_DEFAULT),
+                             help=f'Path to collection.nml (default: {NML_DEFAULT})')
+    plan_parser.add_argument('--dir', metavar='SUBSTR', default=None,
+                             help='Only plan entries whose DIR contains this substring')
+    plan_parser.add_argument('--overwrite', action='store_true',
+                             help='Plan replacements for existing cues in slots 2-5')
+    plan_parser.add_argument('--verbose', action='store_true', default=True,
+                             help='Show flags and review notes (default: on)')
+
+    apply_parser = subparsers.add_parser(
+        'apply', help='Apply a reviewed plan file in one pass with a single write')
+    apply_parser.add_argument('plan_file', help='Plan file from the plan command')
+    apply_parser.add_argument('--nml', metavar='PATH', default=None,
+                              help='Path to collection.nml (default: path recorded in '
+                                   'the plan, else the standard location)')
+    apply_parser.add_argument('--force', action='store_true',
+                              help='Apply even where a slot changed since the plan was made')
+    apply_parser.add_argument('--dry-run', action='store_true',
+                              help='Check the plan against the NML without writing')
+
     args = parser.parse_args()
+
+    if args.command == 'apply':
+        run_apply(args)
+        return
+    if args.command is None and not (args.track or args.playlist):
+        parser.error('one of --track, --playlist or a plan/apply command is required')
+    # Checked here, once: the workers import librosa, and would otherwise
+    # each fail and fall back to the estimate track by track
+    if args.audio_root and importlib.util.find_spec('librosa') is None:
+        parser.error('--audio-root needs librosa (pip install librosa)')
+
     nml_path = Path(args.nml)
 
     print(f"\n{'═'*60}")
     print(f"  Deep House Cue Point Writer")
     print(f"  NML: {nml_path}")
-    if args.dry_run:
+    if args.command == 'plan':
+        print(f"  Mode: PLAN (no changes — writing {args.output})")
+    elif args.dry_run:
         print(f"  Mode: DRY RUN (no changes)")
     elif args.overwrite:
         print(f"  Mode: OVERWRITE (slots 2-5 replaced)")
     else:
         print(f"  Mode: SAFE (existing slots preserved)")
-    print(f"{'═'*60}")
+    if args.audio_root:
+        print(f"  Audio: {args.audio_root}  ({args.workers} workers, {args.timeout}s timeout)")
 
     try:
-        tree, root = load_nml(nml_path)
+        collection = open_collection(nml_path)
     except FileNotFoundError as e:
         print(f"\n❌ {e}")
         sys.exit(1)
+    print(f"  Via: {collection.via}")
+    print(f"{'═'*60}")
 
-    if args.track:
-        run_single(args, root, tree, nml_path)
+    if args.command == 'plan':
+        run_plan(args, collection, nml_path)
+    elif args.track:
+        run_single(args, collection, nml_path)
     else:
-        run_playlist(args, root, tree, nml_path)
+        run_playlist(args, collection, nml_path)
 
 
 if __name__ == '__main__':
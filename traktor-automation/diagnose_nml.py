@@ -8,11 +8,12 @@ Usage:
     python3 traktor-automation/diagnose_nml.py "Prof. Fee 2009 (Dub Taylor D. Mark Remix).m4a"
 """
 
-import xml.etree.ElementTree as ET
 import xml.dom.minidom
 import sys
 from pathlib import Path
 
+from nml_service import open_collection
+
 NML_PATH = Path.home() / "Documents/Native Instruments/Traktor 3.11.1/collection.nml"
 
 
@@ -28,17 +29,10 @@ def main():
     print(f"NML  : {NML_PATH}")
     print(f"Track: {filename}\n")
 
-    tree = ET.parse(str(NML_PATH))
-    root = tree.getroot()
-    collection = root.find('.//COLLECTION')
-
-    candidates = []
-    for entry in collection.findall('ENTRY'):
-        loc = entry.find('LOCATION')
-        if loc is not None and loc.get('FILE') == filename:
-            candidates.append(entry)
+    collection = open_collection(NML_PATH)
+    candidates = collection.entries(file=filename)
 
-    print(f"Entries found: {len(candidates)}")
+    print(f"Entries found: {len(candidates)}  (via {collection.via})")
 
     for i, entry in enumerate(candidates):
         cues = entry.findall('CUE_V2')
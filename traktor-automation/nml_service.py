@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""
+NML Service
+===========
+
+Optional long-lived local daemon that keeps collection.nml parsed and
+indexed in memory, so the NML utility scripts don't re-parse the whole
+collection on every invocation.
+
+The daemon listens on a Unix socket and answers newline-delimited JSON
+requests:
+
+  ping                         — health check, NML path, entry count
+  lookup  {file, dir}          — raw ENTRY XML for a filename (indexed)
+  select  {dir}                — raw ENTRY XML for every entry whose DIR matches
+  keys    {keys}               — raw ENTRY XML for a list of entry keys
+  dump    {file, dir}          — parsed summaries (BPM, duration, cues) of entries
+  diff    {file, dirs}         — cue tables for one file across DIRs + differing slots
+  write   {entries, backup}    — replace entries with edited XML, back up, save
+  reload                       — force a re-parse
+  shutdown                     — stop the daemon
+
+If collection.nml changes on disk (Traktor quit, or a script wrote it
+directly), the daemon re-parses it before answering the next request.
+
+Scripts never talk to the socket directly — they call open_collection(),
+which returns a RemoteCollection when a daemon for the same NML is running
+and a LocalCollection (plain ElementTree parse) otherwise. Both expose the
+same entries()/by_keys()/save() interface and hand back ordinary
+ET.Element objects, so script logic is identical either way.
+
+Usage:
+    # Start the daemon (foreground — run it in its own terminal tab)
+    python3 traktor-automation/nml_service.py serve
+
+    # Check / reload / stop it
+    python3 traktor-automation/nml_service.py status
+    python3 traktor-automation/nml_service.py reload
+    python3 traktor-automation/nml_service.py stop
+"""
+
+import xml.etree.ElementTree as ET
+import argparse
+import json
+import os
+import shutil
+import socket
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+from datetime import datetime
+from typing import Optional
+
+
+NML_DEFAULT = Path.home() / "Documents/Native Instruments/Traktor 3.11.1/collection.nml"
+
+# Override with TRAKTOR_NML_SOCKET if several collections are served at once
+SOCKET_DEFAULT = Path(os.environ.get(
+    'TRAKTOR_NML_SOCKET', str(Path.home() / ".traktor_nml_service.sock")))
+
+# Seconds a client waits for the daemon before falling back to direct parsing
+CONNECT_TIMEOUT = 0.5
+REQUEST_TIMEOUT = 60.0
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ENTRY HELPERS (shared by daemon, client and scripts)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def entry_key(entry: ET.Element) -> Optional[str]:
+    """Traktor's unique key for an ENTRY: VOLUME + DIR + FILE."""
+    loc = entry.find('LOCATION')
+    if loc is None:
+        return None
+    return f"{loc.get('VOLUME', '')}{loc.get('DIR', '')}{loc.get('FILE', '')}"
+
+
+def backup_nml(nml_path: Path) -> Path:
+    """Create a timestamped backup before any write."""
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    backup_path = nml_path.parent / f"collection_backup_{ts}.nml"
+    shutil.copy2(nml_path, backup_path)
+    return backup_path
+
+
+def _float(value, default=0.0) -> float:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return default
+
+
+def entry_summary(entry: ET.Element) -> dict:
+    """Parsed view of an ENTRY — what the inspection scripts print."""
+    loc   = entry.find('LOCATION')
+    tempo = entry.find('TEMPO')
+    info  = entry.find('INFO')
+    cues  = entry.findall('CUE_V2')
+    return {
+        'key':           entry_key(entry),
+        'file':          loc.get('FILE', '') if loc is not None else '',
+        'dir':           loc.get('DIR', '') if loc is not None else '',
+        'modified_date': entry.get('MODIFIED_DATE'),
+        'modified_time': entry.get('MODIFIED_TIME'),
+        'bpm':           _float(tempo.get('BPM')) if tempo is not None else None,
+        'duration_s':    _float(info.get('PLAYTIME_FLOAT')) if info is not None else None,
+        'has_grid':      any(c.get('TYPE') == '4' for c in cues),
+        'cues': [
+            {
+                'hotcue':      c.get('HOTCUE', '?'),
+                'type':        c.get('TYPE', '?'),
+                'displ_order': c.get('DISPL_ORDER', '?'),
+                'start_ms':    _float(c.get('START')),
+                'len_ms':      _float(c.get('LEN')),
+                'name':        c.get('NAME', ''),
+            }
+            for c in cues
+        ],
+    }
+
+
+def diff_summaries(summaries: list) -> list:
+    """
+    Return the hotcue slots whose cues differ between entry summaries.
+    Each item: {'hotcue': slot, 'values': [cue-or-None per summary]}.
+    """
+    by_slot = []
+    for s in summaries:
+        by_slot.append({c['hotcue']: c for c in s['cues'] if c['hotcue'] not in ('0', '?')})
+    slots = sorted({slot for cues in by_slot for slot in cues}, key=lambda x: int(x))
+    differences = []
+    for slot in slots:
+        values = [cues.get(slot) for cues in by_slot]
+        comparable = [(v['name'], v['type'], round(v['start_ms'], 3), round(v['len_ms'], 3))
+                      if v else None for v in values]
+        if len(set(comparable)) > 1:
+            differences.append({'hotcue': slot, 'values': values})
+    return differences
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# IN-MEMORY INDEX
+# ─────────────────────────────────────────────────────────────────────────────
+
+class NMLIndex:
+    """Parsed collection.nml with FILE and entry-key indexes."""
+
+    def __init__(self, nml_path: Path):
+        self.nml_path = Path(nml_path)
+        self.tree: Optional[ET.ElementTree] = None
+        self.collection: Optional[ET.Element] = None
+        self.by_file: dict = {}
+        self.by_key: dict = {}
+        self.positions: dict = {}
+        self.stamp: tuple = ()
+        self.loaded_at: Optional[str] = None
+        self.load()
+
+    def _stat_stamp(self) -> tuple:
+        st = self.nml_path.stat()
+        return (st.st_mtime_ns, st.st_size)
+
+    def load(self) -> None:
+        """Parse the NML and rebuild every index in a single pass."""
+        if not self.nml_path.exists():
+            raise FileNotFoundError(f"collection.nml not found: {self.nml_path}")
+        stamp = self._stat_stamp()
+        self.tree = ET.parse(str(self.nml_path))
+        self.collection = self.tree.getroot().find('.//COLLECTION')
+        self.by_file = {}
+        self.by_key = {}
+        self.positions = {}
+        if self.collection is not None:
+            for pos, entry in enumerate(self.collection):
+                if entry.tag != 'ENTRY':
+                    continue
+                loc = entry.find('LOCATION')
+                if loc is None:
+                    continue
+                self.by_file.setdefault(loc.get('FILE'), []).append(entry)
+                key = entry_key(entry)
+                self.by_key[key] = entry
+                self.positions[key] = pos
+        self.stamp = stamp
+        self.loaded_at = datetime.now().isoformat(timespec='seconds')
+
+    def refresh_if_changed(self) -> bool:
+        """Re-parse if the file changed on disk since the last load/save."""
+        if self._stat_stamp() != self.stamp:
+            self.load()
+            return True
+        return False
+
+    def entries(self, file: Optional[str] = None, dir: Optional[str] = None) -> list:
+        """Entries matching a filename and/or a DIR substring."""
+        if file is not None:
+            pool = self.by_file.get(file, [])
+        else:
+            pool = self.by_key.values()
+        if dir:
+            pool = [e for e in pool if dir in e.find('LOCATION').get('DIR', '')]
+        return list(pool)
+
+    def replace(self, key: str, new_entry: ET.Element) -> None:
+        """Swap an ENTRY for an edited copy, keeping its collection position."""
+        old = self.by_key.get(key)
+        if old is None:
+            raise KeyError(f"Entry not in collection: {key}")
+        self.collection[self.positions[key]] = new_entry
+        self.by_key[key] = new_entry
+        siblings = self.by_file.get(new_entry.find('LOCATION').get('FILE'), [])
+        for i, e in enumerate(siblings):
+            if e is old:
+                siblings[i] = new_entry
+
+    def save(self, backup: bool = True) -> Optional[Path]:
+        backup_path = backup_nml(self.nml_path) if backup else None
+        self.tree.write(str(self.nml_path), encoding='UTF-8', xml_declaration=True)
+        self.stamp = self._stat_stamp()
+        return backup_path
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# DAEMON
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _xml(entry: ET.Element) -> str:
+    return ET.tostring(entry, encoding='unicode')
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """One JSON request per line, one JSON response per line."""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                with self.server.lock:
+                    response = self.server.dispatch(request)
+                response['ok'] = True
+            except Exception as e:  # reported to the client, daemon keeps running
+                response = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+            if response.get('shutdown'):
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+class NMLServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, index: NMLIndex):
+        self.index = index
+        self.lock = threading.Lock()
+        super().__init__(str(socket_path), _Handler)
+
+    def dispatch(self, request: dict) -> dict:
+        op = request.get('op')
+        index = self.index
+
+        if op == 'reload':
+            index.load()
+            return {'entries': len(index.by_key), 'loaded_at': index.loaded_at}
+
+        reloaded = index.refresh_if_changed()
+
+        if op == 'ping':
+            return {'nml': str(index.nml_path.resolve()), 'entries': len(index.by_key),
+                    'loaded_at': index.loaded_at, 'reloaded': reloaded}
+        if op == 'lookup':
+            return {'entries': [_xml(e) for e in index.entries(request['file'], request.get('dir'))]}
+        if op == 'select':
+            return {'entries': [_xml(e) for e in index.entries(dir=request.get('dir'))]}
+        if op == 'keys':
+            found = (index.by_key.get(k) for k in request.get('keys', []))
+            return {'entries': [_xml(e) for e in found if e is not None]}
+        if op == 'dump':
+            return {'entries': [entry_summary(e)
+                                for e in index.entries(request.get('file'), request.get('dir'))]}
+        if op == 'diff':
+            summaries = []
+            for d in request.get('dirs') or [None]:
+                summaries.extend(entry_summary(e) for e in index.entries(request['file'], d))
+            return {'entries': summaries, 'differences': diff_summaries(summaries)}
+        if op == 'write':
+            for item in request.get('entries', []):
+                index.replace(item['key'], ET.fromstring(item['xml']))
+            backup_path = index.save(backup=request.get('backup', True))
+            return {'saved': str(index.nml_path), 'backup': str(backup_path) if backup_path else None}
+        if op == 'shutdown':
+            return {'shutdown': True}
+        raise ValueError(f"Unknown op: {op!r}")
+
+
+def serve(nml_path: Path, socket_path: Path = SOCKET_DEFAULT) -> None:
+    if not hasattr(socket, 'AF_UNIX'):
+        print("❌ Unix sockets are not available on this platform")
+        sys.exit(1)
+    if socket_path.exists():
+        if connect(socket_path) is not None:
+            print(f"❌ A service is already running on {socket_path}")
+            sys.exit(1)
+        socket_path.unlink()  # stale socket from a crashed daemon
+
+    t0 = time.perf_counter()
+    index = NMLIndex(nml_path)
+    print(f"📚 Loaded {len(index.by_key)} entries from {nml_path} "
+          f"in {time.perf_counter() - t0:.2f}s")
+
+    server = NMLServer(socket_path, index)
+    os.chmod(socket_path, 0o600)
+    print(f"🔌 Listening on {socket_path}  (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path.exists():
+            socket_path.unlink()
+        print("\n⏹  NML service stopped")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CLIENT
+# ─────────────────────────────────────────────────────────────────────────────
+
+class NMLClient:
+    """Connection to a running NML service."""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.file = sock.makefile('rwb')
+
+    def request(self, op: str, **params) -> dict:
+        params['op'] = op
+        self.file.write(json.dumps(params).encode('utf-8') + b'\n')
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("NML service closed the connection")
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise RuntimeError(f"NML service error: {response.get('error')}")
+        return response
+
+    def close(self) -> None:
+        self.file.close()
+        self.sock.close()
+
+
+def connect(socket_path: Path = SOCKET_DEFAULT) -> Optional[NMLClient]:
+    """Return a client if a service is listening on socket_path, else None."""
+    if not hasattr(socket, 'AF_UNIX') or not Path(socket_path).exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(str(socket_path))
+        client = NMLClient(sock)
+        client.request('ping')
+    except (OSError, ValueError, RuntimeError, ConnectionError):
+        sock.close()
+        return None
+    sock.settimeout(REQUEST_TIMEOUT)
+    return client
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# COLLECTION FACADE (what the scripts use)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class LocalCollection:
+    """Direct ElementTree parse — the fallback when no service is running."""
+
+    via = 'direct parse'
+
+    def __init__(self, nml_path: Path):
+        self.nml_path = Path(nml_path)
+        if not self.nml_path.exists():
+            raise FileNotFoundError(f"collection.nml not found: {self.nml_path}")
+        self.tree = ET.parse(str(self.nml_path))
+        self.root = self.tree.getroot()
+        self.collection = self.root.find('.//COLLECTION')
+
+    def _all(self):
+        if self.collection is None:
+            return []
+        return self.collection.iterfind('ENTRY')
+
+    def entries(self, file: Optional[str] = None, dir: Optional[str] = None) -> list:
+        matches = []
+        for entry in self._all():
+            loc = entry.find('LOCATION')
+            if loc is None:
+                continue
+            if file is not None and loc.get('FILE') != file:
+                continue
+            if dir and dir not in loc.get('DIR', ''):
+                continue
+            matches.append(entry)
+        return matches
+
+    def by_keys(self, keys) -> dict:
+        """Map entry key → ENTRY for the given keys in a single pass."""
+        keys = set(keys)
+        return {k: e for e in self._all() if (k := entry_key(e)) in keys}
+
+    def save(self, entries: list, backup: bool = True) -> Optional[Path]:
+        """Write the collection. Entries are live tree elements, already edited."""
+        backup_path = backup_nml(self.nml_path) if backup else None
+        self.tree.write(str(self.nml_path), encoding='UTF-8', xml_declaration=True)
+        return backup_path
+
+
+class RemoteCollection:
+    """Entries served by a running NML service; edits are sent back on save()."""
+
+    via = 'NML service'
+
+    def __init__(self, client: NMLClient, nml_path: Path):
+        self.client = client
+        self.nml_path = Path(nml_path)
+
+    @staticmethod
+    def _parse(response: dict) -> list:
+        return [ET.fromstring(xml) for xml in response['entries']]
+
+    def entries(self, file: Optional[str] = None, dir: Optional[str] = None) -> list:
+        if file is not None:
+            return self._parse(self.client.request('lookup', file=file, dir=dir))
+        return self._parse(self.client.request('select', dir=dir))
+
+    def by_keys(self, keys) -> dict:
+        entries = self._parse(self.client.request('keys', keys=list(set(keys))))
+        return {entry_key(e): e for e in entries}
+
+    def save(self, entries: list, backup: bool = True) -> Optional[Path]:
+        payload = [{'key': entry_key(e), 'xml': _xml(e)} for e in entries]
+        response = self.client.request('write', entries=payload, backup=backup)
+        return Path(response['backup']) if response.get('backup') else None
+
+
+def open_collection(nml_path: Path, socket_path: Path = SOCKET_DEFAULT):
+    """
+    Return a RemoteCollection if a service for this NML is running,
+    otherwise parse the file directly and return a LocalCollection.
+    """
+    client = connect(socket_path)
+    if client is not None:
+        try:
+            served = client.request('ping')['nml']
+            if Path(served) == Path(nml_path).resolve():
+                return RemoteCollection(client, nml_path)
+        except (OSError, RuntimeError, ConnectionError, KeyError):
+            pass
+        client.close()
+    return LocalCollection(nml_path)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CLI
+# ─────────────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Long-lived local service holding collection.nml in memory',
+    )
+    parser.add_argument('command', choices=['serve', 'status', 'reload', 'stop'])
+    parser.add_argument('--nml', metavar='PATH', default=str(NML_DEFAULT),
+                        help=f'Path to collection.nml (default: {NML_DEFAULT})')
+    parser.add_argument('--socket', metavar='PATH', default=str(SOCKET_DEFAULT),
+                        help=f'Unix socket path (default: {SOCKET_DEFAULT})')
+    args = parser.parse_args()
+    socket_path = Path(args.socket)
+
+    if args.command == 'serve':
+        try:
+            serve(Path(args.nml), socket_path)
+        except FileNotFoundError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        return
+
+    client = connect(socket_path)
+    if client is None:
+        print(f"⏹  No NML service running on {socket_path}")
+        sys.exit(1)
+
+    if args.command == 'status':
+        info = client.request('ping')
+        print(f"✅ NML service running on {socket_path}")
+        print(f"   NML      : {info['nml']}")
+        print(f"   Entries  : {info['entries']}")
+        print(f"   Loaded at: {info['loaded_at']}")
+    elif args.command == 'reload':
+        info = client.request('reload')
+        print(f"✅ Reloaded {info['entries']} entries")
+    elif args.command == 'stop':
+        client.request('shutdown')
+        print("✅ NML service stopping")
+    client.close()
+
+
+if __name__ == '__main__':
+    main()
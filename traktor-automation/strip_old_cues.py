@@ -23,11 +23,11 @@ Usage:
 """
 
 import xml.etree.ElementTree as ET
-import shutil
 import argparse
 import sys
 from pathlib import Path
-from datetime import datetime
+
+from nml_service import open_collection
 
 NML_DEFAULT = Path.home() / "Documents/Native Instruments/Traktor 3.11.1/collection.nml"
 DEFAULT_DIR = "Album – Best of Deep Dub Tech House"
@@ -61,29 +61,22 @@ def main():
         print(f"❌ NML not found: {nml_path}")
         sys.exit(1)
 
-    tree = ET.parse(str(nml_path))
-    root = tree.getroot()
-    collection = root.find('.//COLLECTION')
+    collection = open_collection(nml_path)
 
     print(f"\n{'═'*60}")
     print(f"  Strip Old Cues")
     print(f"  NML: {nml_path}")
     print(f"  Target dir: {args.dir!r}")
     print(f"  Mode: {'DRY RUN' if args.dry_run else 'LIVE'}")
+    print(f"  Via: {collection.via}")
     print(f"{'═'*60}\n")
 
     total_entries  = 0
     total_stripped = 0
+    modified = []
 
-    for entry in collection.findall('ENTRY'):
-        loc = entry.find('LOCATION')
-        if loc is None:
-            continue
-        entry_dir = loc.get('DIR', '')
-        if args.dir not in entry_dir:
-            continue
-
-        filename = loc.get('FILE', 'unknown')
+    for entry in collection.entries(dir=args.dir):
+        filename = entry.find('LOCATION').get('FILE', 'unknown')
         stripes_cues = [c for c in entry.findall('CUE_V2') if is_stripes_cue(c)]
 
         if not stripes_cues:
@@ -100,6 +93,7 @@ def main():
         if not args.dry_run:
             for cue in stripes_cues:
                 entry.remove(cue)
+            modified.append(entry)
 
     print(f"\n{'─'*60}")
     print(f"  Entries affected : {total_entries}")
@@ -115,12 +109,8 @@ def main():
         return
 
     # Backup and save
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup = nml_path.parent / f"collection_backup_{ts}.nml"
-    shutil.copy2(nml_path, backup)
+    backup = collection.save(modified)
     print(f"\n💾 Backup: {backup}")
-
-    tree.write(str(nml_path), encoding='UTF-8', xml_declaration=True)
     print(f"✅ Saved: {nml_path}")
     print("\n⚠️  Restart Traktor to load the updated collection.")
 
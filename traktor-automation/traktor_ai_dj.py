@@ -332,6 +332,10 @@ class TraktorAIDJ:
         """
         Load playlist JSON from Track Selection Engine.
 
+        Reads both formats: version 1 (full track dicts, also repeated in
+        every transition) and version 2 (each track stored once; its
+        optional "order" lists track indices in play order).
+
         Args:
             playlist_path: Path to playlist JSON
             analyze_audio: Whether to pre-analyze all tracks (recommended)
@@ -341,6 +345,9 @@ class TraktorAIDJ:
         with open(playlist_path, 'r') as f:
             self.playlist = json.load(f)
 
+        if 'order' in self.playlist:
+            self.playlist['tracks'] = [self.playlist['tracks'][i] for i in self.playlist['order']]
+
         self.total_tracks = len(self.playlist['tracks'])
         self.log(f"✓ Loaded {self.total_tracks} tracks")
         self.log(f"  Playlist: {self.playlist['name']}")